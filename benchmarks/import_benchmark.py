@@ -0,0 +1,242 @@
+"""
+Benchmark corpus imports on synthetic corpora
+
+Generates a synthetic TextGrid or Buckeye corpus (see ``synthetic.py``), imports it,
+and reports the time taken by each phase of the import as JSON, so that runs can be
+compared across commits:
+
+    python benchmarks/import_benchmark.py --format textgrid --speakers 10 --discourses 100 \\
+        --words 1000 --output results.json
+
+By default the corpus is imported into a running Neo4j database with
+:meth:`~polyglotdb.corpus.ImportContext.load`, and the phases recorded in
+``import_timings`` are reported: type_parse, type_csv_write, type_load, token_parse,
+discourse_nodes, csv_write, token_load, hierarchy_encode and audio.  With ``--offline``,
+only the phases that do not need a database (type_parse, type_csv_write, token_parse
+and csv_write) are run.
+
+With ``--baseline``, each phase is compared to an earlier result, and the script exits
+with a non-zero status if any phase is slower than the baseline by more than ``--tolerance``.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import defaultdict, OrderedDict
+
+base = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, base)
+
+from synthetic import SyntheticCorpus, FORMATS
+
+import polyglotdb.io as pgio
+from polyglotdb import CorpusContext
+from polyglotdb.config import CorpusConfig
+from polyglotdb.structure import Hierarchy
+from polyglotdb.io.parsers.base import parse_files
+from polyglotdb.io.parsers.speaker import DirectorySpeakerParser
+from polyglotdb.io.importer import GraphCSVWriter, data_to_type_csvs, data_to_graph_csvs
+
+CORPUS_NAME = 'benchmark_import'
+
+# Phases shorter than this are too noisy to compare to a baseline
+MINIMUM_COMPARED_TIME = 0.05
+
+
+def make_parser(corpus_format, paths, subannotations=False):
+    if corpus_format == 'buckeye':
+        parser = pgio.inspect_buckeye(paths[0])
+    else:
+        parser = pgio.inspect_textgrid(paths[0])
+        for tier in parser.annotation_types:
+            if tier.name == 'burst':
+                tier.linguistic_type = 'phone'
+                tier.subannotation = subannotations
+        parser.hierarchy = Hierarchy({'phone': 'word', 'word': None})
+    parser.speaker_parser = DirectorySpeakerParser()
+    return parser
+
+
+class OfflineContext(object):
+    """
+    Stand-in for a corpus when only parsing and writing CSV files, which only
+    need the corpus' name and temporary directories
+    """
+    def __init__(self, config):
+        self.config = config
+        self.corpus_name = config.corpus_name
+
+
+def run_offline(parser, paths, config, num_jobs=1):
+    timings = OrderedDict()
+    context = OfflineContext(config)
+    directory = config.temporary_directory('csv')
+    for f in os.listdir(directory):
+        os.remove(os.path.join(directory, f))
+
+    begin = time.time()
+    types = defaultdict(set)
+    type_headers = None
+    for path, information in parse_files(parser, paths, corpus_name=config.corpus_name, types_only=True,
+                                         num_jobs=num_jobs):
+        type_headers = information['type_headers']
+        for k, v in information['types'].items():
+            types[k].update(v)
+    timings['type_parse'] = time.time() - begin
+
+    begin = time.time()
+    data_to_type_csvs(context, types, type_headers)
+    timings['type_csv_write'] = time.time() - begin
+
+    timings['token_parse'] = 0
+    timings['csv_write'] = 0
+    with GraphCSVWriter(directory) as writer:
+        files = iter(parse_files(parser, paths, num_jobs=num_jobs))
+        while True:
+            begin = time.time()
+            try:
+                path, data = next(files)
+            except StopIteration:
+                break
+            timings['token_parse'] += time.time() - begin
+            begin = time.time()
+            data.corpus_name = config.corpus_name
+            data_to_graph_csvs(context, data, writer)
+            timings['csv_write'] += time.time() - begin
+    return timings
+
+
+def run_database(parser, path, config, num_jobs=1, single_pass=False):
+    with CorpusContext(config) as c:
+        c.reset()
+        c.load(parser, path, num_jobs=num_jobs, single_pass=single_pass)
+        return OrderedDict(c.import_timings)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=base,
+                                       stderr=subprocess.DEVNULL).decode('utf8').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare the phases of a result to a baseline
+
+    Returns
+    -------
+    list
+        Phases that were slower than the baseline by more than the tolerance,
+        as tuples of the phase, baseline time and new time
+    """
+    regressions = []
+    for phase, old in baseline['phases'].items():
+        new = results['phases'].get(phase)
+        if new is None or old < MINIMUM_COMPARED_TIME:
+            continue
+        if new > old * (1 + tolerance):
+            regressions.append((phase, old, new))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Benchmark corpus imports on synthetic corpora')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='textgrid', help='Format of the corpus')
+    parser.add_argument('--speakers', type=int, default=2, help='Number of speakers')
+    parser.add_argument('--discourses', type=int, default=4, help='Number of discourses')
+    parser.add_argument('--words', type=int, default=500, help='Number of words per discourse')
+    parser.add_argument('--vocabulary', type=int, default=2000, help='Number of distinct words')
+    parser.add_argument('--subannotations', action='store_true',
+                        help='Add burst subannotations to stops (TextGrid only)')
+    parser.add_argument('--seed', type=int, default=1234, help='Seed for generating the corpus')
+    parser.add_argument('--num_jobs', type=int, default=1, help='Number of processes for parsing')
+    parser.add_argument('--single_pass', action='store_true', help='Parse each file only once')
+    parser.add_argument('--repeats', type=int, default=1,
+                        help='Number of times to import the corpus, reporting the fastest time of each phase')
+    parser.add_argument('--offline', action='store_true',
+                        help='Only run the parsing and CSV writing phases, without a database')
+    parser.add_argument('--corpus_dir', help='Directory to generate the corpus in, defaults to a temporary '
+                                             'directory that is removed afterwards')
+    parser.add_argument('--host', default='localhost', help='Host of the databases')
+    parser.add_argument('--graph_http_port', type=int, default=7474)
+    parser.add_argument('--graph_bolt_port', type=int, default=7687)
+    parser.add_argument('--acoustic_http_port', type=int, default=8086)
+    parser.add_argument('--output', help='File to write the results to, defaults to standard output')
+    parser.add_argument('--baseline', help='Results of an earlier run to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Fraction a phase can be slower than the baseline by, defaults to 0.2')
+    args = parser.parse_args(args)
+
+    corpus = SyntheticCorpus(args.speakers, args.discourses, args.words, args.vocabulary,
+                             subannotations=args.subannotations, seed=args.seed)
+    corpus_dir = args.corpus_dir
+    temporary = corpus_dir is None
+    if temporary:
+        corpus_dir = tempfile.mkdtemp(prefix='pgdb_benchmark_')
+    begin = time.time()
+    paths = FORMATS[args.format](corpus, corpus_dir)
+    generate_time = time.time() - begin
+
+    config = CorpusConfig(CORPUS_NAME, host=args.host, graph_http_port=args.graph_http_port,
+                          graph_bolt_port=args.graph_bolt_port, acoustic_http_port=args.acoustic_http_port)
+    config.init()
+    runs = []
+    try:
+        for _ in range(args.repeats):
+            import_parser = make_parser(args.format, paths, args.subannotations)
+            begin = time.time()
+            if args.offline:
+                phases = run_offline(import_parser, paths, config, args.num_jobs)
+            else:
+                phases = run_database(import_parser, corpus_dir, config, args.num_jobs, args.single_pass)
+            runs.append({'phases': phases, 'total': time.time() - begin})
+    finally:
+        if temporary:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    phases = OrderedDict((k, min(r['phases'].get(k, 0) for r in runs)) for k in runs[0]['phases'])
+    total = min(r['total'] for r in runs)
+    num_phones = sum(len(w[3]) for _, _, words, _ in corpus.discourses() for w in words)
+    results = OrderedDict([('benchmark', 'import'),
+                           ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%S')),
+                           ('commit', git_commit()),
+                           ('python', platform.python_version()),
+                           ('platform', platform.platform()),
+                           ('format', args.format),
+                           ('mode', 'offline' if args.offline else 'database'),
+                           ('num_jobs', args.num_jobs),
+                           ('single_pass', args.single_pass),
+                           ('corpus', corpus.to_json()),
+                           ('counts', {'files': len(paths), 'words': corpus.num_words, 'phones': num_phones}),
+                           ('generate_time', generate_time),
+                           ('runs', runs),
+                           ('phases', phases),
+                           ('total', total),
+                           ('tokens_per_second', (corpus.num_words + num_phones) / total if total else None)])
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for phase, old, new in regressions:
+            sys.stderr.write('{} regressed: {:.3f} seconds (baseline {:.3f} seconds)\n'.format(phase, new, old))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
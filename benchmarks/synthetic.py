@@ -0,0 +1,218 @@
+"""
+Generators for synthetic corpora of configurable size, for benchmarking imports
+
+Corpora are generated from a seeded random lexicon with Zipfian word frequencies,
+so the same parameters always produce the same files.  Each speaker has a directory
+of discourses, so speakers should be parsed with
+:class:`~polyglotdb.io.parsers.speaker.DirectorySpeakerParser`.
+"""
+import os
+import random
+
+PHONES = ['aa', 'ae', 'ah', 'ao', 'aw', 'ay', 'eh', 'er', 'ey', 'ih', 'iy', 'ow', 'oy', 'uh', 'uw',
+          'b', 'ch', 'd', 'dh', 'f', 'g', 'hh', 'jh', 'k', 'l', 'm', 'n', 'ng', 'p', 'r',
+          's', 'sh', 't', 'th', 'v', 'w', 'y', 'z', 'zh']
+
+STOPS = {'b', 'd', 'g', 'k', 'p', 't'}
+
+CATEGORIES = ['NN', 'VB', 'DT', 'IN', 'JJ', 'PRP', 'RB']
+
+PAUSE_PROBABILITY = 0.1
+
+
+class SyntheticCorpus(object):
+    """
+    Specification of a synthetic corpus
+
+    Parameters
+    ----------
+    num_speakers : int
+        Number of speakers
+    num_discourses : int
+        Number of discourses, spread evenly across speakers
+    words_per_discourse : int
+        Number of words in each discourse
+    vocabulary_size : int
+        Number of distinct words
+    subannotations : bool
+        Whether to add a tier of burst subannotations for stops (TextGrid corpora only)
+    seed : int
+        Seed for the random number generator
+    """
+    def __init__(self, num_speakers=2, num_discourses=4, words_per_discourse=500, vocabulary_size=2000,
+                 subannotations=False, seed=1234):
+        self.num_speakers = num_speakers
+        self.num_discourses = num_discourses
+        self.words_per_discourse = words_per_discourse
+        self.vocabulary_size = vocabulary_size
+        self.subannotations = subannotations
+        self.seed = seed
+        rng = random.Random(seed)
+        self.lexicon = []
+        seen = set()
+        while len(self.lexicon) < vocabulary_size:
+            phones = tuple(rng.choice(PHONES) for _ in range(rng.randint(1, 6)))
+            if phones in seen:
+                continue
+            seen.add(phones)
+            self.lexicon.append((''.join(phones), phones, rng.choice(CATEGORIES)))
+        self.weights = [1 / (i + 1) for i in range(vocabulary_size)]
+
+    def to_json(self):
+        return {'num_speakers': self.num_speakers, 'num_discourses': self.num_discourses,
+                'words_per_discourse': self.words_per_discourse, 'vocabulary_size': self.vocabulary_size,
+                'subannotations': self.subannotations, 'seed': self.seed}
+
+    def discourses(self):
+        """
+        Generate the timed words and phones of each discourse
+
+        Yields
+        ------
+        str
+            Speaker of the discourse
+        str
+            Name of the discourse
+        list
+            Words as tuples of the lexicon entry, begin, end and the phones of the word,
+            each a tuple of label, begin and end, with None for pauses
+        float
+            Duration of the discourse
+        """
+        rng = random.Random(self.seed + 1)
+        for d in range(self.num_discourses):
+            speaker = 'speaker{:03d}'.format(d % self.num_speakers)
+            name = '{}_{:05d}'.format(speaker, d)
+            words = []
+            time = 0.0
+            entries = rng.choices(self.lexicon, weights=self.weights, k=self.words_per_discourse)
+            for entry in entries:
+                if rng.random() < PAUSE_PROBABILITY:
+                    pause = round(rng.uniform(0.1, 0.5), 3)
+                    words.append((None, time, round(time + pause, 3), []))
+                    time = round(time + pause, 3)
+                begin = time
+                phones = []
+                for p in entry[1]:
+                    end = round(time + rng.uniform(0.05, 0.12), 3)
+                    phones.append((p, time, end))
+                    time = end
+                words.append((entry, begin, time, phones))
+            yield speaker, name, words, round(time + 0.5, 3)
+
+    @property
+    def num_words(self):
+        return self.num_discourses * self.words_per_discourse
+
+
+def _textgrid_tier(lines, index, name, intervals, duration, fill=True):
+    # Fill gaps with empty intervals, since Praat's interval tiers cover the whole file
+    filled = []
+    time = 0.0
+    for label, begin, end in intervals:
+        if fill and begin > time:
+            filled.append(('', time, begin))
+        filled.append((label, begin, end))
+        time = end
+    if fill and time < duration:
+        filled.append(('', time, duration))
+    lines.append('    item [{}]:'.format(index))
+    lines.append('        class = "IntervalTier"')
+    lines.append('        name = "{}"'.format(name))
+    lines.append('        xmin = 0')
+    lines.append('        xmax = {}'.format(duration))
+    lines.append('        intervals: size = {}'.format(len(filled)))
+    for i, (label, begin, end) in enumerate(filled):
+        lines.append('        intervals [{}]:'.format(i + 1))
+        lines.append('            xmin = {}'.format(begin))
+        lines.append('            xmax = {}'.format(end))
+        lines.append('            text = "{}"'.format(label))
+
+
+def write_textgrid_corpus(corpus, directory):
+    """
+    Write a synthetic corpus as TextGrid files with word and phone tiers, and
+    a burst tier if the corpus has subannotations, which only contains intervals
+    for bursts, rather than covering the whole file as Praat would
+
+    Parameters
+    ----------
+    corpus : :class:`SyntheticCorpus`
+        Corpus to write
+    directory : str
+        Directory to write the corpus to
+
+    Returns
+    -------
+    list
+        Paths of the files written
+    """
+    paths = []
+    for speaker, name, words, duration in corpus.discourses():
+        word_intervals = [(w[0][0], w[1], w[2]) for w in words if w[0] is not None]
+        phone_intervals = [p for w in words for p in w[3]]
+        tiers = [('word', word_intervals), ('phone', phone_intervals)]
+        if corpus.subannotations:
+            bursts = [('burst', round(p[2] - 0.02, 3), p[2]) for p in phone_intervals if p[0] in STOPS]
+            tiers.append(('burst', bursts))
+        lines = ['File type = "ooTextFile"', 'Object class = "TextGrid"', '',
+                 'xmin = 0', 'xmax = {}'.format(duration), 'tiers? <exists>',
+                 'size = {}'.format(len(tiers)), 'item []:']
+        for i, (tier_name, intervals) in enumerate(tiers):
+            # Empty intervals would be imported as subannotations without a type
+            _textgrid_tier(lines, i + 1, tier_name, intervals, duration, fill=tier_name != 'burst')
+        speaker_directory = os.path.join(directory, speaker)
+        os.makedirs(speaker_directory, exist_ok=True)
+        path = os.path.join(speaker_directory, name + '.TextGrid')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write('\n'.join(lines) + '\n')
+        paths.append(path)
+    return paths
+
+
+_BUCKEYE_HEADER = ['signal {}', 'type 0', 'color 121', 'font -misc-*-bold-*-*-*-15-*-*-*-*-*-*-*',
+                   'separator ;', 'nfields 1', '#']
+
+
+def write_buckeye_corpus(corpus, directory):
+    """
+    Write a synthetic corpus as Buckeye-style .words and .phones files
+
+    Parameters
+    ----------
+    corpus : :class:`SyntheticCorpus`
+        Corpus to write
+    directory : str
+        Directory to write the corpus to
+
+    Returns
+    -------
+    list
+        Paths of the .words files written
+    """
+    paths = []
+    for speaker, name, words, duration in corpus.discourses():
+        speaker_directory = os.path.join(directory, speaker)
+        os.makedirs(speaker_directory, exist_ok=True)
+        header = [x.format(name) for x in _BUCKEYE_HEADER]
+        word_lines = list(header)
+        phone_lines = list(header)
+        for entry, begin, end, phones in words:
+            if entry is None:
+                word_lines.append('    {:.6f} 122 <SIL>; S; S; null'.format(end))
+                phone_lines.append('    {:.6f} 122 SIL'.format(end))
+                continue
+            citation = ' '.join(entry[1])
+            word_lines.append('    {:.6f} 122 {}; {}; {}; {}'.format(end, entry[0], citation, citation, entry[2]))
+            for label, phone_begin, phone_end in phones:
+                phone_lines.append('    {:.6f} 122 {}'.format(phone_end, label))
+        path = os.path.join(speaker_directory, name + '.words')
+        with open(path, 'w', encoding='utf8') as f:
+            f.write('\n'.join(word_lines) + '\n')
+        with open(os.path.join(speaker_directory, name + '.phones'), 'w', encoding='utf8') as f:
+            f.write('\n'.join(phone_lines) + '\n')
+        paths.append(path)
+    return paths
+
+
+FORMATS = {'textgrid': write_textgrid_corpus, 'buckeye': write_buckeye_corpus}
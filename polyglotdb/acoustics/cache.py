@@ -0,0 +1,289 @@
+import os
+import time
+import pickle
+import sqlite3
+import types
+import hashlib
+import functools
+
+from ..config import BASE_DIR
+from .store import source_hash
+
+ANALYSIS_CACHE_NAME = '_analysis_cache'
+
+ANALYSIS_CACHE_FILE = 'analysis_cache.sqlite'
+
+# Bytes of the cache file that SQLite memory maps for reads
+MMAP_SIZE = 256 * 1024 * 1024
+
+# Largest number of keys looked up per query
+LOOKUP_BATCH_SIZE = 500
+
+
+def default_analysis_cache_directory():
+    """
+    Get the default location of the analysis cache, shared by all corpora in the data directory
+
+    Returns
+    -------
+    str
+        Full path to the analysis cache directory
+    """
+    return os.path.join(BASE_DIR, ANALYSIS_CACHE_NAME)
+
+
+class _UnstableFingerprint(Exception):
+    pass
+
+
+def _attribute_fingerprint(name, value):
+    if isinstance(name, str) and name.endswith('script_path') and isinstance(value, str) \
+            and os.path.isfile(os.path.expanduser(value)):
+        return '{!r} ({})'.format(value, source_hash(value))
+    return _fingerprint(value)
+
+
+def function_fingerprint(obj):
+    """
+    Describe an analysis function and all of its parameters as a string, so that
+    functions with different parameters (such as pitch floor and ceiling, number of
+    formants or time step) get different cache keys
+
+    Attributes that are paths to scripts (such as the Praat script of a Praat analysis
+    function) are described by the hash of the script's contents as well as the path,
+    so that editing a script does not return outputs of the old script.  Objects
+    without attributes or a repr of their own would only be described by their memory
+    address, which differs between runs, so functions with them are not fingerprinted.
+
+    Parameters
+    ----------
+    obj : object
+        Analysis function, or one of its attributes
+
+    Returns
+    -------
+    str or None
+        Description of the function, or None if it cannot be described the same way across runs
+    """
+    try:
+        return _fingerprint(obj)
+    except _UnstableFingerprint:
+        return None
+
+
+def _fingerprint(obj):
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return repr(obj)
+    if isinstance(obj, (list, tuple)):
+        return '[{}]'.format(', '.join(_fingerprint(x) for x in obj))
+    if isinstance(obj, dict):
+        return '{{{}}}'.format(', '.join('{}: {}'.format(k, _attribute_fingerprint(k, v))
+                                         for k, v in sorted(obj.items())))
+    if isinstance(obj, functools.partial):
+        return 'partial({}, {}, {})'.format(_fingerprint(obj.func), _fingerprint(obj.args),
+                                            _fingerprint(obj.keywords))
+    if isinstance(obj, (types.FunctionType, types.BuiltinFunctionType, types.MethodType, type)):
+        return '{}.{}'.format(obj.__module__, obj.__qualname__)
+    name = '{}.{}'.format(type(obj).__module__, type(obj).__qualname__)
+    if hasattr(obj, '__dict__'):
+        return '{}({})'.format(name, _fingerprint(vars(obj)))
+    if type(obj).__repr__ is object.__repr__:
+        raise _UnstableFingerprint
+    return '{}({!r})'.format(name, obj)
+
+
+class AnalysisCache(object):
+    """
+    Persistent cache of the outputs of acoustic analysis functions for segments of audio files,
+    so that analyzing segments again with the same function and parameters, such as after
+    a failed analysis, does not redo the analysis
+
+    Outputs are keyed by a hash of the contents of the audio file, the segment's begin, end,
+    channel and padding, and the analysis function's fingerprint (see :func:`function_fingerprint`),
+    so outputs for audio files that have changed are never used.  The cache is a single
+    SQLite database, memory mapped for fast lookups, and can be kept under a maximum
+    size by removing the least recently used outputs with :meth:`evict`.
+
+    Parameters
+    ----------
+    directory : str
+        Full path to the directory of the cache
+    max_size : int, optional
+        Maximum size of the cached outputs in bytes, unbounded if not specified
+    """
+    def __init__(self, directory, max_size=None):
+        self.directory = directory
+        self.max_size = max_size
+        self.path = os.path.join(directory, ANALYSIS_CACHE_FILE)
+        self._connection = None
+        self._file_hashes = {}
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30)
+            self._connection.execute('PRAGMA mmap_size = {}'.format(MMAP_SIZE))
+            self._connection.execute('PRAGMA journal_mode = WAL')
+            self._connection.execute('PRAGMA synchronous = NORMAL')
+            self._connection.execute('''CREATE TABLE IF NOT EXISTS outputs
+                                        (key TEXT PRIMARY KEY, output BLOB, size INTEGER, last_used REAL)''')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS outputs_last_used ON outputs (last_used)')
+            self._connection.commit()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def segment_key(self, segment, fingerprint):
+        """
+        Get the key of the output of a function for a segment
+
+        Parameters
+        ----------
+        segment : :class:`~conch.analysis.segments.FileSegment`
+            Segment of an audio file
+        fingerprint : str
+            Fingerprint of the analysis function, from :func:`function_fingerprint`
+
+        Returns
+        -------
+        str
+            Key for the output
+        """
+        path = os.path.expanduser(segment.file_path)
+        if path not in self._file_hashes:
+            self._file_hashes[path] = source_hash(path)
+        m = hashlib.sha1()
+        m.update(repr((self._file_hashes[path], segment.begin, segment.end, segment.channel,
+                       segment['padding'], fingerprint)).encode('utf8'))
+        return m.hexdigest()
+
+    def get_many(self, keys):
+        """
+        Look up outputs, marking them as recently used
+
+        Parameters
+        ----------
+        keys : list
+            Keys of the outputs
+
+        Returns
+        -------
+        dict
+            Outputs that are cached, keyed by their keys
+        """
+        found = {}
+        keys = list(keys)
+        for i in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[i:i + LOOKUP_BATCH_SIZE]
+            statement = 'SELECT key, output FROM outputs WHERE key IN ({})'.format(', '.join('?' * len(batch)))
+            for key, output in self.connection.execute(statement, batch):
+                found[key] = pickle.loads(output)
+        if found:
+            now = time.time()
+            self.connection.executemany('UPDATE outputs SET last_used = ? WHERE key = ?',
+                                        [(now, k) for k in found])
+            self.connection.commit()
+        return found
+
+    def put_many(self, outputs):
+        """
+        Add outputs to the cache
+
+        Parameters
+        ----------
+        outputs : iterable
+            Tuples of keys and outputs
+        """
+        now = time.time()
+        rows = []
+        for key, output in outputs:
+            data = pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL)
+            rows.append((key, data, len(data), now))
+        self.connection.executemany('INSERT OR REPLACE INTO outputs (key, output, size, last_used) '
+                                    'VALUES (?, ?, ?, ?)', rows)
+        self.connection.commit()
+
+    def report(self):
+        """
+        Summarize the contents of the cache
+
+        Returns
+        -------
+        dict
+            Number and total size of the cached outputs
+        """
+        count, size = self.connection.execute('SELECT count(*), coalesce(sum(size), 0) FROM outputs').fetchone()
+        return {'directory': self.directory, 'entries': count, 'size': size, 'max_size': self.max_size}
+
+    def evict(self, max_size=None):
+        """
+        Remove the least recently used outputs until the cache is under a maximum size
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximum size of the cached outputs in bytes, defaults to the cache's maximum size
+
+        Returns
+        -------
+        int
+            Number of outputs removed
+        int
+            Number of bytes removed
+        """
+        if max_size is None:
+            max_size = self.max_size
+        if max_size is None:
+            return 0, 0
+        size = self.report()['size']
+        to_remove = []
+        removed_size = 0
+        for key, entry_size in self.connection.execute('SELECT key, size FROM outputs ORDER BY last_used'):
+            if size - removed_size <= max_size:
+                break
+            to_remove.append((key,))
+            removed_size += entry_size
+        self.connection.executemany('DELETE FROM outputs WHERE key = ?', to_remove)
+        self.connection.commit()
+        if to_remove:
+            self.connection.execute('VACUUM')
+        return len(to_remove), removed_size
+
+    def clear(self):
+        """
+        Remove all outputs from the cache
+        """
+        self.connection.execute('DELETE FROM outputs')
+        self.connection.commit()
+        self.connection.execute('VACUUM')
+
+
+def corpus_analysis_cache(corpus_context):
+    """
+    Get the analysis cache for a corpus from the ``analysis_cache_dir`` and
+    ``analysis_cache_max_size`` settings of its config
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus being analyzed
+
+    Returns
+    -------
+    :class:`AnalysisCache` or None
+        Analysis cache, or None if caching is turned off
+    """
+    directory = getattr(corpus_context.config, 'analysis_cache_dir', None)
+    if directory is None:
+        return None
+    return AnalysisCache(directory, getattr(corpus_context.config, 'analysis_cache_max_size', None))
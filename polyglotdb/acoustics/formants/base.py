@@ -1,3 +1,5 @@
+from functools import partial
+
 from conch import analyze_segments
 
 from ..segments import generate_vowel_segments, generate_utterance_segments
@@ -7,6 +9,7 @@ from .helper import generate_formants_point_function, generate_base_formants_fun
 from ...exceptions import SpeakerAttributeError
 
 from ..utils import PADDING
+from ..scheduler import analyze_speakers
 
 
 def analyze_formant_points(corpus_context, call_back=None, stop_check=None, vowel_inventory=None,
@@ -49,6 +52,19 @@ def analyze_formant_points(corpus_context, call_back=None, stop_check=None, vowe
     return output
 
 
+def _speaker_formants_function(corpus_context, speaker):
+    gender = None
+    try:
+        q = corpus_context.query_speakers().filter(corpus_context.speaker.name == speaker)
+        q = q.columns(corpus_context.speaker.gender.column_name('Gender'))
+        gender = q.all()[0]['Gender']
+    except SpeakerAttributeError:
+        pass
+    if gender is not None:
+        return generate_base_formants_function(corpus_context, gender=gender)
+    return generate_base_formants_function(corpus_context)
+
+
 def analyze_formant_tracks(corpus_context, call_back=None, stop_check=None):
     """
     Analyze formants of an entire utterance, and save the resulting formant tracks into the database.
@@ -65,20 +81,8 @@ def analyze_formant_tracks(corpus_context, call_back=None, stop_check=None):
     segment_mapping = generate_utterance_segments(corpus_context, padding=PADDING).grouped_mapping('speaker')
     if call_back is not None:
         call_back('Analyzing files...')
-    for i, (speaker, v) in enumerate(segment_mapping.items()):
-        gender = None
-        try:
-            q = corpus_context.query_speakers().filter(corpus_context.speaker.name == speaker)
-            q = q.columns(corpus_context.speaker.gender.column_name('Gender'))
-            gender = q.all()[0]['Gender']
-        except SpeakerAttributeError:
-            pass
-        if gender is not None:
-            formant_function = generate_base_formants_function(corpus_context, gender=gender)
-        else:
-            formant_function = generate_base_formants_function(corpus_context)
-        output = analyze_segments(v, formant_function, stop_check=stop_check)
-        corpus_context.save_formant_tracks(output, speaker)
+    analyze_speakers(corpus_context, segment_mapping, partial(_speaker_formants_function, corpus_context),
+                     corpus_context.save_formant_tracks, call_back=call_back, stop_check=stop_check)
 
 
 def analyze_vowel_formant_tracks(corpus_context,
@@ -108,18 +112,6 @@ def analyze_vowel_formant_tracks(corpus_context,
 
     if call_back is not None:
         call_back('Analyzing files...')
-    # goes through each phone and: makes a formant function, analyzes the phone, and saves the tracks
-    for i, (speaker, v) in enumerate(segment_mapping.items()):
-        gender = None
-        try:
-            q = corpus_context.query_speakers().filter(corpus_context.speaker.name == speaker)
-            q = q.columns(corpus_context.speaker.gender.column_name('Gender'))
-            gender = q.all()[0]['Gender']
-        except SpeakerAttributeError:
-            pass
-        if gender is not None:
-            formant_function = generate_base_formants_function(corpus_context, gender=gender)
-        else:
-            formant_function = generate_base_formants_function(corpus_context)
-        output = analyze_segments(v, formant_function, stop_check=stop_check)
-        corpus_context.save_formant_tracks(output, speaker)
+    # analyzes each speaker's phones with a formant function for their gender, and saves the tracks
+    analyze_speakers(corpus_context, segment_mapping, partial(_speaker_formants_function, corpus_context),
+                     corpus_context.save_formant_tracks, call_back=call_back, stop_check=stop_check)
@@ -15,6 +15,8 @@ from pyraat.parse_outputs import parse_point_script_output
 
 from ...exceptions import AcousticError
 
+from ..batch import NumpyFormantTrackFunction
+
 from ..io import point_measures_from_csv, point_measures_to_csv
 
 
@@ -234,6 +236,11 @@ def generate_base_formants_function(corpus_context, gender=None):
         formant_function = PraatSegmentFormantTrackFunction(praat_path=corpus_context.config.praat_path,
                                                             max_frequency=max_freq, num_formants=5, window_length=0.025,
                                                             time_step=0.01)
+    elif algorithm == 'numpy':
+        formant_function = NumpyFormantTrackFunction(max_frequency=max_freq, num_formants=5, window_length=0.025,
+                                                     time_step=0.01,
+                                                     method=getattr(corpus_context.config, 'numpy_formant_method',
+                                                                    'burg'))
     else:
         formant_function = FormantTrackFunction(max_frequency=max_freq,
                                                 time_step=0.01, num_formants=5,
@@ -1,13 +1,19 @@
 import os
-import subprocess
-import shutil
 import csv
+import json
+import shutil
+import logging
+import subprocess
+import multiprocessing
+import numpy as np
 import librosa
 import audioread
+from scipy.io import wavfile
 
 from conch.utils import write_wav
 
-from ..io.importer.from_csv import make_path_safe
+from ..io.importer.loader import load_csv
+from .store import AudioStore, source_hash
 
 
 def resample_audio(filepath, new_filepath, new_sr):
@@ -24,49 +30,272 @@ def resample_audio(filepath, new_filepath, new_sr):
         write_wav(sig, sr, new_filepath)
 
 
-def add_discourse_sound_info(corpus_context, discourse, filepath):
+# Sampling rates of the copies of each discourse's audio used for different analyses
+AUDIO_RATES = [('consonant', 16000), ('vowel', 11000), ('low_freq', 2000)]
+
+AUDIO_QUEUE_FILE = 'audio_queue.json'
+
+# Number of discourses recorded in the graph database per update while preparing audio
+AUDIO_UPDATE_BATCH_SIZE = 100
+
+# Attenuation applied when resampling, to avoid clipping (matching sox's "gain -1")
+RESAMPLE_GAIN = 10 ** (-1 / 20)
+
+
+def _write_resampled(path, signal, sr):
+    signal = np.clip(signal * RESAMPLE_GAIN, -1, 32767 / 32768)
+    if len(signal.shape) > 1:
+        signal = signal.T
+    wavfile.write(path, sr, (signal * 32768).astype('int16'))
+
+
+def prepare_discourse_audio(discourse, filepath, audio_dir, store_dir=None):
+    """
+    Create the consonant, vowel and low frequency copies of a discourse's audio file
+
+    Copies are resampled with sox if it is installed (see :func:`resample_audio`), each
+    from the previous, higher rate copy, and otherwise all of them are resampled from a
+    single decoding of the file.
+    Copies that already exist are not created again, so interrupted preparation
+    can be resumed.  Sources with a sampling rate at or below a copy's rate are
+    copied unchanged.  If an audio store is used, copies are looked up by the
+    contents of the source file and linked from the store, and new copies are
+    added to it, see :class:`~polyglotdb.acoustics.store.AudioStore`.  The store is
+    not used if files cannot be hard linked from it into ``audio_dir``.
+
+    Parameters
+    ----------
+    discourse : str
+        Name of the discourse
+    filepath : str
+        Full path to the discourse's audio file
+    audio_dir : str
+        Directory to store the copies in
+    store_dir : str, optional
+        Directory of the audio store to use
+
+    Returns
+    -------
+    dict
+        Paths of the audio files, with the user's home directory as ``~`` for the
+        copies, along with the duration, sampling rate and number of channels of the source
+    """
     with audioread.audio_open(filepath) as f:
         sample_rate = f.samplerate
         n_channels = f.channels
         duration = f.duration
-    audio_dir = corpus_context.discourse_audio_directory(discourse)
     os.makedirs(audio_dir, exist_ok=True)
-    consonant_rate = 16000
-    consonant_path = os.path.join(audio_dir, 'consonant.wav')
-    vowel_rate = 11000
-    vowel_path = os.path.join(audio_dir, 'vowel.wav')
-    low_freq_rate = 2000
-    low_freq_path = os.path.join(audio_dir, 'low_freq.wav')
-    if sample_rate > consonant_rate:
-        resample_audio(filepath, consonant_path, consonant_rate)
-    else:
-        shutil.copy(filepath, consonant_path)
-        consonant_rate = sample_rate
-    if sample_rate > vowel_rate:
-        resample_audio(consonant_path, vowel_path, vowel_rate)
-    else:
-        shutil.copy(filepath, vowel_path)
-        vowel_rate = sample_rate
-    if sample_rate > low_freq_rate:
-        resample_audio(vowel_path, low_freq_path, low_freq_rate)
-    else:
-        shutil.copy(filepath, low_freq_path)
-        low_freq_rate = sample_rate
     user_path = os.path.expanduser('~')
-    statement = '''MATCH (d:Discourse:{corpus_name}) where d.name = {{discourse_name}}
-                    SET d.file_path = {{filepath}},
-                    d.consonant_file_path = {{consonant_filepath}},
-                    d.vowel_file_path = {{vowel_filepath}},
-                    d.low_freq_file_path = {{low_freq_filepath}},
-                    d.duration = {{duration}},
-                    d.sampling_rate = {{sampling_rate}},
-                    d.num_channels = {{n_channels}}'''.format(corpus_name=corpus_context.cypher_safe_name)
-    corpus_context.execute_cypher(statement, filepath=filepath,
-                                  consonant_filepath=consonant_path.replace(user_path, '~'),
-                                  vowel_filepath=vowel_path.replace(user_path, '~'),
-                                  low_freq_filepath=low_freq_path.replace(user_path, '~'),
-                                  duration=duration, sampling_rate=sample_rate,
-                                  n_channels=n_channels, discourse_name=discourse)
+    info = {'discourse': discourse, 'file_path': filepath, 'duration': duration,
+            'sampling_rate': sample_rate, 'num_channels': n_channels}
+    store = None
+    if store_dir is not None:
+        store = AudioStore(store_dir)
+        if store.can_link(audio_dir):
+            source = source_hash(filepath)
+        else:
+            store = None
+    sox_path = shutil.which('sox')
+    signal = None
+    previous_path = filepath
+    for name, rate in AUDIO_RATES:
+        path = os.path.join(audio_dir, '{}.wav'.format(name))
+        resample_path, previous_path = previous_path, path
+        info['{}_file_path'.format(name)] = path.replace(user_path, '~')
+        if os.path.exists(path):
+            continue
+        rate = min(rate, sample_rate)
+        if store is not None:
+            entry = store.get(source, rate, n_channels)
+            if entry is not None:
+                store.link(entry, path)
+                continue
+        # Write to a temporary file first, so that a file at the final path is always complete
+        temp_path = os.path.join(audio_dir, '{}.tmp.wav'.format(name))
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        if rate == sample_rate:
+            shutil.copy(filepath, temp_path)
+        elif sox_path is not None:
+            resample_audio(resample_path, temp_path, rate)
+        else:
+            if signal is None:
+                signal, signal_rate = librosa.load(filepath, sr=None, mono=False)
+            _write_resampled(temp_path, librosa.resample(signal, orig_sr=signal_rate, target_sr=rate), rate)
+        if store is not None:
+            store.link(store.put(temp_path, source, rate, n_channels), path)
+        else:
+            os.replace(temp_path, path)
+    return info
+
+
+def _prepare_audio_job(job):
+    discourse, filepath, audio_dir, store_dir = job
+    try:
+        return prepare_discourse_audio(discourse, filepath, audio_dir, store_dir)
+    except Exception as e:
+        return discourse, e
+
+
+def update_sound_info(corpus_context, infos, batch_size=500):
+    """
+    Set the audio file paths and properties of discourses, in batches rather
+    than with a query for each discourse
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to update
+    infos : list
+        Audio information for each discourse, as returned by :func:`prepare_discourse_audio`
+    batch_size : int
+        Number of discourses to update per query, defaults to 500
+    """
+    statement = '''UNWIND $infos AS info
+                    MATCH (d:Discourse:{corpus_name}) WHERE d.name = info.discourse
+                    SET d.file_path = info.file_path,
+                    d.consonant_file_path = info.consonant_file_path,
+                    d.vowel_file_path = info.vowel_file_path,
+                    d.low_freq_file_path = info.low_freq_file_path,
+                    d.duration = info.duration,
+                    d.sampling_rate = info.sampling_rate,
+                    d.num_channels = info.num_channels'''.format(corpus_name=corpus_context.cypher_safe_name)
+    for i in range(0, len(infos), batch_size):
+        corpus_context.execute_cypher(statement, infos=infos[i:i + batch_size])
+
+
+def audio_queue_path(corpus_context):
+    return os.path.join(corpus_context.config.temporary_directory('audio'), AUDIO_QUEUE_FILE)
+
+
+def load_audio_queue(corpus_context):
+    """
+    Load the discourses waiting for their audio to be prepared
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to check
+
+    Returns
+    -------
+    list
+        Discourse names and audio file paths
+    """
+    path = audio_queue_path(corpus_context)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf8') as f:
+        return [tuple(x) for x in json.load(f)]
+
+
+def save_audio_queue(corpus_context, discourses):
+    """
+    Save the discourses waiting for their audio to be prepared, so that
+    preparation can be resumed if it is interrupted
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to save the queue for
+    discourses : list
+        Discourse names and audio file paths
+    """
+    path = audio_queue_path(corpus_context)
+    with open(path + '.tmp', 'w', encoding='utf8') as f:
+        json.dump([list(x) for x in discourses], f)
+    os.replace(path + '.tmp', path)
+
+
+def prepare_audio(corpus_context, discourses=None, num_jobs=1, call_back=None, stop_check=None):
+    """
+    Prepare the resampled audio files of discourses across multiple processes,
+    and record them in the graph database in batches
+
+    Discourses are taken from the corpus' audio queue if not specified, and are
+    removed from the queue as their audio is recorded, so that calling this
+    function again after an interruption only prepares the remaining discourses.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to prepare audio for
+    discourses : list, optional
+        Discourse names and audio file paths, defaults to the queued discourses
+    num_jobs : int
+        Number of processes to use, defaults to 1
+    call_back : callable, optional
+        Function to report progress
+    stop_check : callable, optional
+        Function to check whether to halt
+
+    Returns
+    -------
+    list
+        Names of discourses whose audio could not be prepared
+    """
+    queued = discourses is None
+    if queued:
+        discourses = load_audio_queue(corpus_context)
+    discourses = [(name, path) for name, path in discourses if path is not None and os.path.exists(path)]
+    remaining = {x[0]: x for x in discourses}
+    store_dir = getattr(corpus_context.config, 'audio_store_dir', None)
+    jobs = [(name, path, corpus_context.discourse_audio_directory(name), store_dir) for name, path in discourses]
+    log = logging.getLogger('{}_loading'.format(corpus_context.corpus_name))
+    if call_back is not None:
+        call_back('Preparing audio...')
+        call_back(0, len(jobs))
+    failed = []
+    infos = []
+
+    def record():
+        update_sound_info(corpus_context, infos)
+        for x in infos:
+            del remaining[x['discourse']]
+        infos.clear()
+        if queued:
+            save_audio_queue(corpus_context, list(remaining.values()))
+
+    if num_jobs is None or num_jobs <= 1:
+        results = map(_prepare_audio_job, jobs)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(num_jobs)
+        results = pool.imap_unordered(_prepare_audio_job, jobs)
+    try:
+        for i, result in enumerate(results):
+            if stop_check is not None and stop_check():
+                break
+            if call_back is not None:
+                call_back(i + 1)
+            if isinstance(result, tuple):
+                discourse, e = result
+                log.warning('Could not prepare audio for {}: {}'.format(discourse, e))
+                failed.append(discourse)
+                continue
+            infos.append(result)
+            if len(infos) >= AUDIO_UPDATE_BATCH_SIZE:
+                record()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+    if infos:
+        record()
+    elif queued:
+        save_audio_queue(corpus_context, list(remaining.values()))
+    max_size = getattr(corpus_context.config, 'audio_store_max_size', None)
+    if store_dir is not None and max_size is not None:
+        removed, removed_size = AudioStore(store_dir, max_size).evict()
+        if removed:
+            log.info('Removed {} files ({} bytes) from the audio store'.format(removed, removed_size))
+    return failed
+
+
+def add_discourse_sound_info(corpus_context, discourse, filepath):
+    info = prepare_discourse_audio(discourse, filepath, corpus_context.discourse_audio_directory(discourse),
+                                   getattr(corpus_context.config, 'audio_store_dir', None))
+    update_sound_info(corpus_context, [info])
 
 
 def setup_audio(corpus_context, data):
@@ -113,22 +342,14 @@ def point_measures_from_csv(corpus_context, header_info):
     for s in corpus_context.speakers:
         path = os.path.join(corpus_context.config.temporary_directory('csv'),
                             '{}_point_measures.csv'.format(s))
-        import_path = 'file:///{}'.format(make_path_safe(path))
-        import_statement = '''
-                USING PERIODIC COMMIT 2000
-                LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-                MATCH (n:{phone_type}:{corpus_name}) where n.id = csvLine.id
+        import_statement = '''MATCH (n:{phone_type}:{corpus_name}) where n.id = csvLine.id
                 SET {new_properties}'''
 
-        statement = import_statement.format(path=import_path,
-                                            corpus_name=corpus_context.cypher_safe_name,
+        statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                             phone_type=corpus_context.phone_name,
                                             new_properties=properties)
-        corpus_context.execute_cypher(statement)
-    for h in header_info.keys():
-        if h == 'id':
-            continue
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % (corpus_context.phone_name, h))
+        load_csv(corpus_context, path, statement, commit_size=2000, planner_rule=False)
+    corpus_context.schema.ensure(indexes=[(corpus_context.phone_name, h) for h in header_info.keys() if h != 'id'])
     corpus_context.hierarchy.add_token_properties(corpus_context, corpus_context.phone_name,
                                                   [(h, t) for h, t in header_info.items() if h != 'id'])
     corpus_context.encode_hierarchy()
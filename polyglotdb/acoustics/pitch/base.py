@@ -1,4 +1,5 @@
 import math
+import random
 
 from conch import analyze_segments
 from conch.analysis.segments import SegmentMapping
@@ -8,6 +9,7 @@ from ..segments import generate_utterance_segments
 from ...exceptions import SpeakerAttributeError
 
 from ..utils import PADDING
+from ..scheduler import analyze_speakers
 
 
 def analyze_discourse_pitch(corpus_context, discourse, pitch_source='praat', min_pitch=50, max_pitch=500, **kwargs):
@@ -52,9 +54,140 @@ def analyze_discourse_pitch(corpus_context, discourse, pitch_source='praat', min
     return track, sorted(pulses)
 
 
+PITCH_STATISTICS_PROPERTIES = [('pitch_mean', float), ('pitch_sd', float), ('pitch_statistics_source', str),
+                               ('pitch_statistics_utterances', int)]
+
+
+def pitch_statistics(output):
+    """
+    Calculate the mean and standard deviation of voiced frames in pitch tracks
+
+    Parameters
+    ----------
+    output : dict
+        Pitch tracks of segments
+
+    Returns
+    -------
+    list or None
+        Mean and standard deviation of F0, or None if there are fewer than two voiced frames
+    """
+    sum_pitch = 0
+    sum_square_pitch = 0
+    n = 0
+    for seg, track in output.items():
+        for t, v in track.items():
+            v = v['F0']
+
+            if v is not None and v > 0:  # only voiced frames
+
+                n += 1
+                sum_pitch += v
+                sum_square_pitch += v * v
+    if n < 2:
+        return None
+    return [sum_pitch / n, math.sqrt(max(n * sum_square_pitch - sum_pitch * sum_pitch, 0) / (n * (n - 1)))]
+
+
+def sample_segments(segments, sample_size, seed):
+    """
+    Randomly sample segments, the same sample for the same seed
+
+    Parameters
+    ----------
+    segments : list
+        Segments to sample from
+    sample_size : int or None
+        Number of segments to sample, or None to use all of them
+    seed : str
+        Seed for the random sample
+
+    Returns
+    -------
+    list
+        Sampled segments
+    """
+    if sample_size is None or len(segments) <= sample_size:
+        return segments
+    return random.Random(seed).sample(sorted(segments), sample_size)
+
+
+def load_speaker_pitch_statistics(corpus_context, source):
+    """
+    Get speakers' pitch means and standard deviations saved by an earlier analysis
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to get statistics for
+    source : str
+        Pitch source the statistics must have been calculated with
+
+    Returns
+    -------
+    dict
+        Mean and standard deviation of F0 keyed by speaker name
+    """
+    statement = '''MATCH (s:Speaker:{corpus_name})
+    WHERE s.pitch_statistics_source = $source AND s.pitch_mean IS NOT NULL AND s.pitch_sd IS NOT NULL
+    RETURN s.name AS speaker, s.pitch_mean AS mean, s.pitch_sd AS sd'''.format(
+        corpus_name=corpus_context.cypher_safe_name)
+    return {r['speaker']: [r['mean'], r['sd']] for r in corpus_context.execute_cypher(statement, source=source)}
+
+
+def save_speaker_pitch_statistics(corpus_context, statistics, source):
+    """
+    Save speakers' pitch means and standard deviations as speaker properties, so that
+    later analyses can reuse them
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to save statistics for
+    statistics : dict
+        Mean, standard deviation and number of utterances analyzed, keyed by speaker name
+    source : str
+        Pitch source the statistics were calculated with
+    """
+    if not statistics:
+        return
+    rows = [{'speaker': k, 'mean': v[0], 'sd': v[1], 'utterances': v[2]} for k, v in statistics.items()]
+    statement = '''UNWIND $rows AS row
+    MATCH (s:Speaker:{corpus_name}) WHERE s.name = row.speaker
+    SET s.pitch_mean = row.mean, s.pitch_sd = row.sd, s.pitch_statistics_source = $source,
+    s.pitch_statistics_utterances = row.utterances'''.format(corpus_name=corpus_context.cypher_safe_name)
+    corpus_context.execute_cypher(statement, rows=rows, source=source)
+    if not all(corpus_context.hierarchy.has_speaker_property(k) for k, _ in PITCH_STATISTICS_PROPERTIES):
+        corpus_context.hierarchy.add_speaker_properties(corpus_context, PITCH_STATISTICS_PROPERTIES)
+        corpus_context.encode_hierarchy()
+
+
 def analyze_pitch(corpus_context,
                   call_back=None,
-                  stop_check=None):
+                  stop_check=None,
+                  recalculate_speaker_statistics=False):
+    """
+    Analyze the pitch of utterances, and save the resulting pitch tracks into the database.
+
+    With the 'speaker_adjusted' pitch algorithm, each speaker's pitch range is
+    estimated from a first pass over a random sample of ``pitch_sample_size`` of their
+    utterances (see :class:`~polyglotdb.config.CorpusConfig`).  Each speaker's mean
+    and standard deviation are saved as speaker properties, and reused by later analyses
+    with the same pitch source, so only speakers without statistics (for instance, ones
+    added since the last analysis) go through the first pass.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        corpus context to use
+    call_back : callable
+        call back function, optional
+    stop_check : callable
+        stop check function, optional
+    recalculate_speaker_statistics : bool
+        Whether to estimate the pitch range of every speaker again, rather than reusing
+        saved statistics, defaults to False
+    """
     absolute_min_pitch = 55
     absolute_max_pitch = 480
     if not 'utterance' in corpus_context.hierarchy:
@@ -62,7 +195,9 @@ def analyze_pitch(corpus_context,
     segment_mapping = generate_utterance_segments(corpus_context, padding=PADDING).grouped_mapping('speaker')
     num_speakers = len(segment_mapping)
     algorithm = corpus_context.config.pitch_algorithm
+    source = corpus_context.config.pitch_source
     path = None
+    kwargs = None
     if corpus_context.config.pitch_source == 'praat':
         path = corpus_context.config.praat_path
         # kwargs = {'silence_threshold': 0.03,
@@ -71,34 +206,36 @@ def analyze_pitch(corpus_context,
     elif corpus_context.config.pitch_source == 'reaper':
         path = corpus_context.config.reaper_path
         # kwargs = None
+    elif corpus_context.config.pitch_source == 'numpy':
+        kwargs = {'method': getattr(corpus_context.config, 'numpy_pitch_method', 'ac')}
     pitch_function = generate_pitch_function(corpus_context.config.pitch_source, absolute_min_pitch, absolute_max_pitch,
-                                             path=path)
+                                             path=path, kwargs=kwargs)
     if algorithm == 'speaker_adjusted':
         speaker_data = {}
-        if call_back is not None:
-            call_back('Getting original speaker means and SDs...')
-        for i, (k, v) in enumerate(segment_mapping.items()):
+        if not recalculate_speaker_statistics:
+            saved = load_speaker_pitch_statistics(corpus_context, source)
+            speaker_data = {k: saved[k[0]] for k in segment_mapping if k[0] in saved}
+        sample_size = getattr(corpus_context.config, 'pitch_sample_size', None)
+        to_estimate = {k: sample_segments(v, sample_size, k[0]) for k, v in segment_mapping.items()
+                       if k not in speaker_data}
+        if to_estimate:
             if call_back is not None:
-                call_back('Analyzing speaker {} ({} of {})'.format(k, i, num_speakers))
-            output = analyze_segments(v, pitch_function, stop_check=stop_check)
-
-            sum_pitch = 0
-            sum_square_pitch = 0
-            n = 0
-            for seg, track in output.items():
-                for t, v in track.items():
-                    v = v['F0']
-
-                    if v is not None and v > 0:  # only voiced frames
-
-                        n += 1
-                        sum_pitch += v
-                        sum_square_pitch += v * v
-            speaker_data[k] = [sum_pitch / n, math.sqrt((n * sum_square_pitch - sum_pitch * sum_pitch) / (n * (n - 1)))]
-
-    for i, (speaker, v) in enumerate(segment_mapping.items()):
-        if call_back is not None:
-            call_back('Analyzing speaker {} ({} of {})'.format(speaker, i, num_speakers))
+                call_back('Getting original speaker means and SDs...')
+            new_statistics = {}
+
+            def save_speaker_data(output, speaker):
+                statistics = pitch_statistics(output)
+                speaker_data[speaker] = statistics
+                if statistics is not None:
+                    new_statistics[speaker[0]] = statistics + [len(output)]
+
+            completed = analyze_speakers(corpus_context, to_estimate, lambda speaker: pitch_function,
+                                         save_speaker_data, call_back=call_back, stop_check=stop_check)
+            save_speaker_pitch_statistics(corpus_context, new_statistics, source)
+            if not completed:
+                return
+
+    def speaker_pitch_function(speaker):
         if algorithm == 'gendered':
             min_pitch = absolute_min_pitch
             max_pitch = absolute_max_pitch
@@ -113,9 +250,9 @@ def analyze_pitch(corpus_context,
                         max_pitch = 400
             except SpeakerAttributeError:
                 pass
-            pitch_function = generate_pitch_function(corpus_context.config.pitch_source, min_pitch, max_pitch,
-                                                     path=path)
-        elif algorithm == 'speaker_adjusted':
+            return generate_pitch_function(corpus_context.config.pitch_source, min_pitch, max_pitch,
+                                           path=path, kwargs=kwargs)
+        elif algorithm == 'speaker_adjusted' and speaker_data[speaker] is not None:
             mean_pitch, sd_pitch = speaker_data[speaker]
             min_pitch = int(mean_pitch - 3 * sd_pitch)
             max_pitch = int(mean_pitch + 3 * sd_pitch)
@@ -123,7 +260,11 @@ def analyze_pitch(corpus_context,
                 min_pitch = absolute_min_pitch
             if max_pitch > absolute_max_pitch:
                 max_pitch = absolute_max_pitch
-            pitch_function = generate_pitch_function(corpus_context.config.pitch_source, min_pitch, max_pitch,
-                                                     path=path)
-        output = analyze_segments(v, pitch_function, stop_check=stop_check)
-        corpus_context.save_pitch_tracks(output, speaker)
+            return generate_pitch_function(corpus_context.config.pitch_source, min_pitch, max_pitch,
+                                           path=path, kwargs=kwargs)
+        return pitch_function
+
+    if call_back is not None:
+        call_back('Analyzing pitch of {} speakers...'.format(num_speakers))
+    analyze_speakers(corpus_context, segment_mapping, speaker_pitch_function, corpus_context.save_pitch_tracks,
+                     call_back=call_back, stop_check=stop_check)
@@ -1,5 +1,8 @@
 from conch.analysis.pitch import ReaperPitchTrackFunction, PraatSegmentPitchTrackFunction, PitchTrackFunction
 
+from ...exceptions import AcousticError
+from ..batch import NumpyPitchTrackFunction
+
 
 def generate_pitch_function(algorithm, min_pitch, max_pitch, path=None, pulses=False, kwargs=None):
     time_step = 0.01
@@ -11,6 +14,13 @@ def generate_pitch_function(algorithm, min_pitch, max_pitch, path=None, pulses=F
             kwargs = {}
         pitch_function = PraatSegmentPitchTrackFunction(praat_path=path, min_pitch=min_pitch, max_pitch=max_pitch,
                                                  time_step=time_step, **kwargs)
+    elif algorithm == 'numpy':
+        if pulses:
+            raise (AcousticError('Pulses cannot be found with the numpy pitch source'))
+        if kwargs is None:
+            kwargs = {}
+        pitch_function = NumpyPitchTrackFunction(min_pitch=min_pitch, max_pitch=max_pitch, time_step=time_step,
+                                                 **kwargs)
     else:
         pitch_function = PitchTrackFunction(min_pitch=min_pitch, max_pitch=max_pitch, time_step=time_step)
     return pitch_function
@@ -0,0 +1,220 @@
+import math
+from multiprocessing import cpu_count
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .cache import corpus_analysis_cache, function_fingerprint
+
+# Seconds between progress reports and checks for stopping while analyzing
+PROGRESS_INTERVAL = 0.5
+
+# Largest number of segments sent to a worker process at once
+ANALYSIS_CHUNK_SIZE = 16
+
+# Number of chunks waiting for or being analyzed per worker process
+CHUNKS_PER_WORKER = 2
+
+# Number of speakers that can be saving at once before analysis pauses
+MAX_PENDING_SAVES = 1
+
+
+def default_num_jobs():
+    return max(1, int(0.75 * cpu_count()))
+
+
+def _analyze_chunk(analysis_function, segments):
+    if hasattr(analysis_function, 'analyze_many'):
+        return list(zip(segments, analysis_function.analyze_many(segments)))
+    return [(s, analysis_function(s)) for s in segments]
+
+
+def _chunks(segments, num_jobs):
+    segments = sorted(segments)
+    size = max(1, min(ANALYSIS_CHUNK_SIZE, int(math.ceil(len(segments) / num_jobs))))
+    for i in range(0, len(segments), size):
+        yield segments[i:i + size]
+
+
+class _InProcessExecutor(object):
+    """
+    Executor that runs each job as soon as it is submitted, for analyzing without worker processes
+    """
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def analyze_speakers(corpus_context, segment_mapping, make_function, save, num_jobs=None, call_back=None,
+                     stop_check=None, use_cache=True):
+    """
+    Analyze the segments of each speaker over a single pool of worker processes,
+    saving each speaker's output once all of their segments are analyzed
+
+    Segments are sent to the workers in small chunks, so the next speaker's segments
+    start being analyzed as soon as workers free up from the current speaker, and outputs
+    are saved on a separate thread, so that saving one speaker's output (for instance,
+    writing tracks to InfluxDB) overlaps with analyzing the next speaker's segments.
+    If a speaker finishes while the previous speaker is still being saved, analysis
+    pauses until that save is done, so only a few speakers' outputs are kept in memory at once.
+
+    Functions with an ``analyze_many`` method, such as those in :mod:`~polyglotdb.acoustics.batch`,
+    are called once per chunk with all of the chunk's segments, rather than once per segment.
+
+    Outputs are looked up in and added to the corpus' analysis cache (see
+    :class:`~polyglotdb.acoustics.cache.AnalysisCache`), if one is set up, so segments that were
+    already analyzed with the same function and parameters are not analyzed again.  Functions
+    without a stable fingerprint (see :func:`~polyglotdb.acoustics.cache.function_fingerprint`)
+    are not cached.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus being analyzed
+    segment_mapping : dict
+        Segments to analyze for each speaker
+    make_function : callable
+        Function that takes a speaker and returns the analysis function for their segments,
+        called just before the speaker's segments are first sent to the workers
+    save : callable
+        Function that takes the output for a speaker (a dictionary of segments to analysis results)
+        and the speaker, called on a separate thread, one speaker at a time
+    num_jobs : int, optional
+        Number of worker processes shared by all speakers, defaults to the ``analysis_num_jobs``
+        setting of the corpus config, or three quarters of the available CPUs if that is not set
+    call_back : callable, optional
+        Function to report progress, as the number of segments analyzed
+    stop_check : callable, optional
+        Function to check whether to stop analyzing, checked while waiting on the workers,
+        after which segments not yet being analyzed are cancelled and speakers that were
+        not completely analyzed are not saved
+    use_cache : bool
+        Whether to use the analysis cache set up in the corpus config, defaults to True
+
+    Returns
+    -------
+    bool
+        True if all speakers were analyzed and saved, False if analysis was stopped
+    """
+    if num_jobs is None:
+        num_jobs = getattr(corpus_context.config, 'analysis_num_jobs', None)
+    if num_jobs is None:
+        num_jobs = default_num_jobs()
+    total = sum(len(v) for v in segment_mapping.values())
+    if call_back is not None:
+        call_back('Analyzing segments...')
+        call_back(0, total)
+
+    cache = None
+    if use_cache:
+        cache = corpus_analysis_cache(corpus_context)
+    segment_keys = {}
+
+    def jobs():
+        # Chunks of each speaker's segments that need analyzing, followed by the
+        # speaker's cached outputs (with no function) once all chunks are sent
+        for speaker, segments in segment_mapping.items():
+            cached = {}
+            if not segments:
+                yield speaker, None, cached
+                continue
+            function = make_function(speaker)
+            fingerprint = None
+            if cache is not None:
+                fingerprint = function_fingerprint(function)
+            if fingerprint is not None:
+                keys = {s: cache.segment_key(s, fingerprint) for s in segments}
+                found = cache.get_many(keys.values())
+                cached = {s: found[k] for s, k in keys.items() if k in found}
+                segments = [s for s in segments if s not in cached]
+                segment_keys.update((s, keys[s]) for s in segments)
+            if segments:
+                for chunk in _chunks(segments, num_jobs):
+                    yield speaker, function, chunk
+            yield speaker, None, cached
+
+    if num_jobs > 1:
+        executor = ProcessPoolExecutor(num_jobs)
+    else:
+        executor = _InProcessExecutor()
+    saver = ThreadPoolExecutor(1)
+    window = max(num_jobs, 1) * CHUNKS_PER_WORKER
+    outputs = {}
+    remaining = {}
+    submitted = set()
+    in_flight = {}
+    saves = []
+    analyzed = 0
+    stopped = False
+    job_iter = jobs()
+    exhausted = False
+
+    def check_saves(limit):
+        # Raise any error from saving, and wait until at most ``limit`` saves are pending
+        for f in [f for f in saves if f.done()]:
+            saves.remove(f)
+            f.result()
+        while len(saves) > limit:
+            f = saves.pop(0)
+            f.result()
+
+    def finish(speaker):
+        output = outputs.pop(speaker)
+        del remaining[speaker]
+        check_saves(MAX_PENDING_SAVES - 1)
+        saves.append(saver.submit(save, output, speaker))
+
+    try:
+        while True:
+            while not exhausted and len(in_flight) < window:
+                try:
+                    speaker, function, job = next(job_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if speaker not in remaining:
+                    remaining[speaker] = 0
+                    outputs[speaker] = {}
+                if function is None:
+                    submitted.add(speaker)
+                    outputs[speaker].update(job)
+                    analyzed += len(job)
+                    if remaining[speaker] == 0:
+                        finish(speaker)
+                    continue
+                remaining[speaker] += 1
+                in_flight[executor.submit(_analyze_chunk, function, job)] = speaker
+            if not in_flight:
+                break
+            done, _ = wait(list(in_flight), timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+            for f in done:
+                speaker = in_flight.pop(f)
+                results = f.result()
+                outputs[speaker].update(results)
+                if cache is not None:
+                    cache.put_many((segment_keys.pop(seg), output) for seg, output in results
+                                   if seg in segment_keys)
+                analyzed += len(results)
+                remaining[speaker] -= 1
+                if remaining[speaker] == 0 and speaker in submitted:
+                    finish(speaker)
+            if call_back is not None:
+                call_back(analyzed)
+            if stop_check is not None and stop_check():
+                stopped = True
+                break
+    finally:
+        for f in in_flight:
+            f.cancel()
+        executor.shutdown(wait=True)
+        saver.shutdown(wait=True)
+        if cache is not None:
+            cache.evict()
+            cache.close()
+    check_saves(0)
+    return not stopped
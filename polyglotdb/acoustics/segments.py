@@ -1,11 +1,71 @@
 from conch.analysis.segments import SegmentMapping
 
+from ..query.base.helper import key_for_cypher
+
+
+FILE_TYPES = {'vowel': 'vowel_file_path', 'low_freq': 'low_freq_file_path', 'consonant': 'consonant_file_path'}
+
+
+def segment_statement(corpus_context, annotation_type, subset=None, file_type='vowel', duration_threshold=None,
+                      speakers=None, discourses=None):
+    """
+    Construct a Cypher statement returning the file path, begin, end, channel, label, id, speaker and discourse
+    of every annotation of a type, as columns in that order
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglot.corpus.context.CorpusContext`
+        The CorpusContext object of the corpus
+    annotation_type : str
+        The type of annotation to use in generating segments
+    subset : str, optional
+        Token or type subset of annotations to include
+    file_type : str, optional
+        One of 'low_freq', 'vowel', or 'consonant', specifies the type of audio file to use
+    duration_threshold: float, optional
+        Annotations shorter than this value (in seconds) will not be included
+    speakers : list, optional
+        Names of the speakers to include, adds a ``$speakers`` parameter
+    discourses : list, optional
+        Names of the discourses to include, adds a ``$discourses`` parameter
+
+    Returns
+    -------
+    str
+        Cypher statement
+    """
+    token_label = ''
+    type_label = ''
+    if subset is not None:
+        if corpus_context.hierarchy.has_token_subset(annotation_type, subset):
+            token_label = ':' + key_for_cypher(subset)
+        else:
+            type_label = ':' + key_for_cypher(subset)
+    file_property = FILE_TYPES.get(file_type, 'consonant_file_path')
+    conditions = ['d.{} IS NOT NULL'.format(file_property), 'n.end > n.begin']
+    if duration_threshold is not None:
+        conditions.append('n.end - n.begin >= {}'.format(float(duration_threshold)))
+    if speakers is not None:
+        conditions.append('s.name IN $speakers')
+    if discourses is not None:
+        conditions.append('d.name IN $discourses')
+    return '''MATCH (s:Speaker:{corpus})-[r:speaks_in]->(d:Discourse:{corpus}),
+    (t:{anno}_type:{corpus}{type_label})<-[:is_a]-(n:{anno}:{corpus}{token_label})-[:spoken_by]->(s),
+    (n)-[:spoken_in]->(d)
+    WHERE {conditions}
+    RETURN d.{file_property}, n.begin, n.end, r.channel, coalesce(n.label, t.label), n.id, s.name, d.name'''.format(
+        corpus=corpus_context.cypher_safe_name, anno=annotation_type, type_label=type_label,
+        token_label=token_label, conditions=' AND '.join(conditions), file_property=file_property)
+
 
 def generate_segments(corpus_context, annotation_type='utterance', subset=None, file_type='vowel',
-                      duration_threshold=0.001, padding=None):
+                      duration_threshold=0.001, padding=None, speakers=None, discourses=None):
     """
     Generate segment vectors for an annotation type, to be used as input to analyze_file_segments.
 
+    All segments are fetched with a single query, whose rows are streamed into the
+    segment mapping as they arrive.
+
     Parameters
     ----------
     corpus_context : :class:`~polyglot.corpus.context.CorpusContext`
@@ -17,7 +77,13 @@ def generate_segments(corpus_context, annotation_type='utterance', subset=None,
     file_type : str, optional
         One of 'low_freq', 'vowel', or 'consonant', specifies the type of audio file to use
     duration_threshold: float, optional
-        Segments with length shorter than this value (in milliseconds) will not be included
+        Segments with length shorter than this value (in seconds) will not be included
+    padding : float, optional
+        Padding to add to each segment when it is analyzed
+    speakers : list, optional
+        Names of speakers to generate segments for, defaults to all speakers
+    discourses : list, optional
+        Names of discourses to generate segments for, defaults to all discourses
 
     Returns
     -------
@@ -26,46 +92,32 @@ def generate_segments(corpus_context, annotation_type='utterance', subset=None,
     """
     if annotation_type not in corpus_context.hierarchy.annotation_types:
         raise Exception()
-    if subset is not None and not corpus_context.hierarchy.has_type_subset(annotation_type, subset):
+    if subset is not None and not corpus_context.hierarchy.has_type_subset(annotation_type, subset) \
+            and not corpus_context.hierarchy.has_token_subset(annotation_type, subset):
         raise Exception()
-    speakers = corpus_context.speakers
+    file_property = FILE_TYPES.get(file_type, 'consonant_file_path')
+    parameters = {}
+    if speakers is not None:
+        parameters['speakers'] = list(speakers)
+    if discourses is not None:
+        parameters['discourses'] = list(discourses)
+    missing = corpus_context.execute_cypher('''MATCH (s:Speaker:{corpus})-[:speaks_in]->(d:Discourse:{corpus})
+    WHERE d.{file_property} IS NULL{speakers}{discourses}
+    RETURN DISTINCT d.name AS discourse'''.format(corpus=corpus_context.cypher_safe_name, file_property=file_property,
+                                                speakers=' AND s.name IN $speakers' if speakers is not None else '',
+                                                discourses=' AND d.name IN $discourses' if discourses is not None else ''),
+                                            **parameters)
+    for r in missing:
+        print("Skipping discourse {} because no wav file exists.".format(r['discourse']))
+
+    statement = segment_statement(corpus_context, annotation_type, subset=subset, file_type=file_type,
+                                  duration_threshold=duration_threshold, speakers=speakers, discourses=discourses)
     segment_mapping = SegmentMapping()
-    for s in speakers:
-        statement = '''MATCH (s:Speaker:{corpus_name})-[r:speaks_in]->(d:Discourse:{corpus_name})
-                    WHERE s.name = {{speaker_name}}
-                    RETURN d, r'''.format(corpus_name=corpus_context.cypher_safe_name)
-        results = corpus_context.execute_cypher(statement, speaker_name=s)
-
-        for r in results:
-            channel = r['r']['channel']
-            discourse = r['d']['name']
-            if file_type == 'vowel':
-                file_path = r['d']['vowel_file_path']
-            elif file_type == 'low_freq':
-                file_path = r['d']['low_freq_file_path']
-            else:
-                file_path = r['d']['consonant_file_path']
-            if file_path is None:
-                print("Skipping discourse {} because no wav file exists.".format(discourse))
-                continue
-            at = getattr(corpus_context, annotation_type)
-            qr = corpus_context.query_graph(at)
-            if subset is not None:
-                qr = qr.filter(at.subset == subset)
-            qr = qr.filter(at.discourse.name == discourse)
-            qr = qr.filter(at.speaker.name == s)
-            if qr.count() == 0:
-                continue
-            annotations = qr.all()
-            if annotations is not None:
-                for a in annotations:
-                    if duration_threshold is not None and a.end - a.begin < duration_threshold:
-                        continue
-                    if a.begin == a.end: # Skip zero duration segments if they exist
-                        continue
-                    segment_mapping.add_file_segment(file_path, a.begin, a.end, label=a.label,
-                                                     id=a.id, discourse=discourse, channel=channel, speaker=s,
-                                                     annotation_type=annotation_type, padding=padding)
+    with corpus_context.graph_driver.session() as session:
+        for file_path, begin, end, channel, label, id, speaker, discourse in session.run(statement, **parameters):
+            segment_mapping.add_file_segment(file_path, begin, end, label=label, id=id, discourse=discourse,
+                                             channel=channel, speaker=speaker, annotation_type=annotation_type,
+                                             padding=padding)
     return segment_mapping
 
 
@@ -0,0 +1,293 @@
+import os
+import time
+import hashlib
+import tempfile
+
+from ..config import BASE_DIR
+
+AUDIO_STORE_NAME = '_audio_store'
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_source_hashes = {}
+
+
+def default_audio_store_directory():
+    """
+    Get the default location of the audio store, shared by all corpora in the data directory
+
+    Returns
+    -------
+    str
+        Full path to the audio store directory
+    """
+    return os.path.join(BASE_DIR, AUDIO_STORE_NAME)
+
+
+def source_hash(path):
+    """
+    Compute a hash of the contents of an audio file, remembering the hash of files
+    that have not changed since they were last hashed
+
+    Parameters
+    ----------
+    path : str
+        Full path to the audio file
+
+    Returns
+    -------
+    str
+        Hex digest of the file's contents
+    """
+    path = os.path.abspath(os.path.expanduser(path))
+    stat = os.stat(path)
+    key = (path, stat.st_mtime, stat.st_size)
+    if key in _source_hashes:
+        return _source_hashes[key]
+    m = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            m.update(chunk)
+    _source_hashes[key] = m.hexdigest()
+    return _source_hashes[key]
+
+
+class AudioStore(object):
+    """
+    Content-addressed store of resampled audio files, so that audio is only
+    resampled once for a given source file, sampling rate and number of channels,
+    regardless of the corpus or discourse it is used for
+
+    Files are hard linked from the store into each discourse's audio directory, so the
+    store is only used for directories that it can hard link to (see :meth:`can_link`),
+    as copies could not be told apart from unused files.  Files in the store
+    that are not linked anywhere else are orphans, and can be removed with
+    :meth:`collect_garbage`, while :meth:`evict` keeps the store under a maximum size
+    by removing the least recently used files.
+
+    Parameters
+    ----------
+    directory : str
+        Full path to the directory of the store
+    max_size : int, optional
+        Maximum size of the store in bytes, unbounded if not specified
+    """
+    def __init__(self, directory, max_size=None):
+        self.directory = directory
+        self.max_size = max_size
+
+    def entry_path(self, source, rate, channels):
+        """
+        Get the path of a file in the store
+
+        Parameters
+        ----------
+        source : str
+            Hash of the source file, from :func:`source_hash`
+        rate : int
+            Sampling rate of the file
+        channels : int
+            Number of channels of the file
+
+        Returns
+        -------
+        str
+            Full path of the file in the store
+        """
+        return os.path.join(self.directory, source[:2], '{}_{}_{}.wav'.format(source, rate, channels))
+
+    def get(self, source, rate, channels):
+        """
+        Look up a file in the store, marking it as recently used
+
+        Parameters
+        ----------
+        source : str
+            Hash of the source file
+        rate : int
+            Sampling rate of the file
+        channels : int
+            Number of channels of the file
+
+        Returns
+        -------
+        str or None
+            Full path of the file in the store, or None if it is not stored
+        """
+        path = self.entry_path(source, rate, channels)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, path, source, rate, channels):
+        """
+        Move a file into the store
+
+        Parameters
+        ----------
+        path : str
+            Full path of the file to move
+        source : str
+            Hash of the source file
+        rate : int
+            Sampling rate of the file
+        channels : int
+            Number of channels of the file
+
+        Returns
+        -------
+        str
+            Full path of the file in the store
+        """
+        entry = self.entry_path(source, rate, channels)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        os.replace(path, entry)
+        return entry
+
+    def can_link(self, directory):
+        """
+        Check whether files in the store can be hard linked into a directory
+
+        Parameters
+        ----------
+        directory : str
+            Full path of the directory to link files into
+
+        Returns
+        -------
+        bool
+            True if hard links from the store to the directory are supported
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        fd, probe = tempfile.mkstemp(dir=self.directory, suffix='.probe')
+        os.close(fd)
+        link_path = os.path.join(directory, os.path.basename(probe))
+        try:
+            os.link(probe, link_path)
+        except OSError:
+            return False
+        else:
+            os.remove(link_path)
+            return True
+        finally:
+            os.remove(probe)
+
+    def link(self, entry, path):
+        """
+        Hard link a file in the store to another path
+
+        Parameters
+        ----------
+        entry : str
+            Full path of the file in the store
+        path : str
+            Full path to link the file to
+        """
+        temp_path = path + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        os.link(entry, temp_path)
+        os.replace(temp_path, path)
+
+    def entries(self):
+        """
+        List the files in the store
+
+        Returns
+        -------
+        list
+            Dictionaries with the path, size, last use time and number of links of each file
+        """
+        entries = []
+        if not os.path.exists(self.directory):
+            return entries
+        for d in os.listdir(self.directory):
+            sub_directory = os.path.join(self.directory, d)
+            if not os.path.isdir(sub_directory):
+                continue
+            for f in os.listdir(sub_directory):
+                if not f.endswith('.wav'):
+                    continue
+                path = os.path.join(sub_directory, f)
+                stat = os.stat(path)
+                entries.append({'path': path, 'size': stat.st_size, 'last_used': stat.st_mtime,
+                                'links': stat.st_nlink})
+        return entries
+
+    def report(self):
+        """
+        Summarize the contents of the store
+
+        Returns
+        -------
+        dict
+            Number and total size of files, and number and total size of orphaned files
+        """
+        entries = self.entries()
+        orphans = [x for x in entries if x['links'] <= 1]
+        return {'directory': self.directory,
+                'entries': len(entries),
+                'size': sum(x['size'] for x in entries),
+                'orphans': len(orphans),
+                'orphan_size': sum(x['size'] for x in orphans),
+                'max_size': self.max_size}
+
+    def _remove(self, entries):
+        for x in entries:
+            try:
+                os.remove(x['path'])
+            except FileNotFoundError:
+                pass
+        return len(entries), sum(x['size'] for x in entries)
+
+    def collect_garbage(self, min_age=0):
+        """
+        Remove files that are not linked to from any discourse's audio directory
+
+        Parameters
+        ----------
+        min_age : float
+            Only remove files that have not been used for this many seconds, defaults to 0
+
+        Returns
+        -------
+        int
+            Number of files removed
+        int
+            Number of bytes removed
+        """
+        now = time.time()
+        return self._remove([x for x in self.entries() if x['links'] <= 1 and now - x['last_used'] >= min_age])
+
+    def evict(self, max_size=None):
+        """
+        Remove the least recently used files until the store is under a maximum size,
+        removing orphaned files before linked ones
+
+        Parameters
+        ----------
+        max_size : int, optional
+            Maximum size of the store in bytes, defaults to the store's maximum size
+
+        Returns
+        -------
+        int
+            Number of files removed
+        int
+            Number of bytes removed
+        """
+        if max_size is None:
+            max_size = self.max_size
+        if max_size is None:
+            return 0, 0
+        entries = self.entries()
+        size = sum(x['size'] for x in entries)
+        to_remove = []
+        for x in sorted(entries, key=lambda x: (x['links'] > 1, x['last_used'])):
+            if size <= max_size:
+                break
+            to_remove.append(x)
+            size -= x['size']
+        return self._remove(to_remove)
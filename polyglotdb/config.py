@@ -59,6 +59,54 @@ class CorpusConfig(object):
     base_dir : str
         Base directory to store information and temporary files for the corpus
         defaults to "Documents/SCT" under the current user's home directory
+    num_jobs : int
+        Number of processes to use when parsing files during import, defaults to 1
+    pitch_sample_size : int or None
+        Number of utterances randomly sampled from each speaker to estimate their pitch range
+        for the 'speaker_adjusted' pitch algorithm, defaults to None (all utterances)
+    numpy_formant_method : str
+        Method for estimating linear prediction coefficients when ``formant_source`` is 'numpy',
+        either 'burg' (as in Praat) or 'autocorrelation', defaults to 'burg'
+    numpy_pitch_method : str
+        Method for finding pitch when ``pitch_source`` is 'numpy', either 'ac' (autocorrelation,
+        as in Praat) or 'cepstral', defaults to 'ac'.  The 'numpy' sources analyze segments in
+        process, see :mod:`~polyglotdb.acoustics.batch`
+    analysis_num_jobs : int or None
+        Number of processes shared by all speakers when analyzing pitch, formants and
+        intensity, defaults to None (three quarters of the available CPUs)
+    import_backend : str
+        How rows are loaded into the graph database, either 'csv' for having the
+        database read temporary CSV files with ``LOAD CSV`` (requires the database to be
+        on the same file system) or 'unwind' for sending rows over Bolt, defaults to 'csv'
+    import_batch_size : int
+        Number of rows per transaction when using the 'unwind' backend, defaults to 1000
+    import_num_sessions : int
+        Number of sessions to use in parallel when importing, defaults to 1.  Each
+        speaker's tokens are loaded over a single session, with up to this many speakers
+        loaded at once; otherwise batches for the 'unwind' backend are sent over this
+        many sessions; when resetting a corpus, up to this many speakers are deleted at once
+    delete_batch_size : int
+        Number of nodes deleted per transaction when resetting a corpus to start with,
+        which is then adjusted so transactions take ``delete_transaction_time``, defaults to 10000
+    delete_transaction_time : float
+        Number of seconds that each transaction should take when resetting a corpus, defaults to 1.0
+    audio_store_dir : str or None
+        Directory of a content-addressed store of resampled audio files that can be
+        shared by corpora (such as :func:`~polyglotdb.acoustics.store.default_audio_store_directory`),
+        defaults to None (no store), see :class:`~polyglotdb.acoustics.store.AudioStore`
+    audio_store_max_size : int or None
+        Maximum size in bytes of the audio store, with the least recently used
+        files removed after preparing audio, defaults to None (unbounded)
+    analysis_cache_dir : str or None
+        Directory of a cache of acoustic analysis outputs for segments that can be shared
+        by corpora (such as :func:`~polyglotdb.acoustics.cache.default_analysis_cache_directory`),
+        defaults to None (no cache), see :class:`~polyglotdb.acoustics.cache.AnalysisCache`
+    analysis_cache_max_size : int or None
+        Maximum size in bytes of the analysis cache, with the least recently used
+        outputs removed after each analysis, defaults to None (unbounded)
+    type_id_cache_size : int
+        Maximum number of type ids to keep in memory when importing and encoding
+        syllables, so that repeated types are only hashed once, defaults to 100000
     """
 
     def __init__(self, corpus_name, data_dir=None, **kwargs):
@@ -83,6 +131,10 @@ class CorpusConfig(object):
         self.temp_dir = os.path.join(self.base_dir, 'temp')
         self.data_dir = os.path.join(self.base_dir, 'data')
         self.audio_dir = os.path.join(self.data_dir, 'audio')
+        self.audio_store_dir = None
+        self.audio_store_max_size = None
+        self.analysis_cache_dir = None
+        self.analysis_cache_max_size = None
 
         self.engine = 'sqlite'
         self.db_path = os.path.join(self.data_dir, self.corpus_name)
@@ -91,8 +143,23 @@ class CorpusConfig(object):
         self.pitch_algorithm = 'speaker_adjusted'
         self.formant_source = 'praat'
         self.formant_algorithm = 'fave'
+        self.numpy_formant_method = 'burg'
+        self.numpy_pitch_method = 'ac'
         self.intensity_source = 'praat'
         self.time_sampling = 0.01
+        self.pitch_sample_size = None
+
+        self.num_jobs = 1
+        self.analysis_num_jobs = None
+
+        self.import_backend = 'csv'
+        self.import_batch_size = 1000
+        self.import_num_sessions = 1
+
+        self.delete_batch_size = 10000
+        self.delete_transaction_time = 1.0
+
+        self.type_id_cache_size = 100000
 
         for k, v in kwargs.items():
             setattr(self, k, v)
@@ -102,20 +102,22 @@ class AudioContext(SyllabicContext):
         signal, sr = librosa.load(path, sr=None)
         return signal, sr
 
-    def analyze_pitch(self, stop_check=None, call_back=None):
-        analyze_pitch(self, stop_check, call_back)
+    def analyze_pitch(self, stop_check=None, call_back=None, recalculate_speaker_statistics=False):
+        analyze_pitch(self, call_back=call_back, stop_check=stop_check,
+                      recalculate_speaker_statistics=recalculate_speaker_statistics)
 
     def analyze_discourse_pitch(self, discourse, **kwargs):
         return analyze_discourse_pitch(self, discourse, **kwargs)
 
     def analyze_formant_tracks(self, stop_check=None, call_back=None):
-        analyze_formant_tracks(self, stop_check, call_back)
+        analyze_formant_tracks(self, call_back=call_back, stop_check=stop_check)
 
     def analyze_vowel_formant_tracks(self, stop_check=None, call_back=None, vowel_inventory=None):
-        analyze_vowel_formant_tracks(self, stop_check, call_back, vowel_inventory)
+        analyze_vowel_formant_tracks(self, call_back=call_back, stop_check=stop_check,
+                                     vowel_inventory=vowel_inventory)
 
     def analyze_intensity(self, stop_check=None, call_back=None):
-        analyze_intensity(self, stop_check, call_back)
+        analyze_intensity(self, call_back=call_back, stop_check=stop_check)
 
     def analyze_script(self, phone_class, script_path, arguments=None, stop_check=None, call_back=None):
         analyze_script(self, phone_class, script_path, arguments=arguments, stop_check=stop_check, call_back=call_back)
@@ -17,6 +17,10 @@ from ..exceptions import (CorpusConfigError, GraphQueryError,
                           ConnectionError, AuthorizationError, TemporaryConnectionError,
                           NetworkAddressError)
 from ..structure import Hierarchy
+from ..io.importer.schema import SchemaManager
+from ..io.importer.checkpoint import checkpoint_path
+from ..io.importer.deletion import delete_corpus_graph
+from ..io.helper import TypeIdCache
 
 
 class BaseContext(object):
@@ -100,6 +104,35 @@ class BaseContext(object):
         except Exception as e:
             raise
 
+    @property
+    def schema(self):
+        """
+        Manager for the constraints and indexes of the graph database
+
+        Returns
+        -------
+        :class:`~polyglotdb.io.importer.schema.SchemaManager`
+            Schema manager for the corpus
+        """
+        if getattr(self, '_schema', None) is None:
+            self._schema = SchemaManager(self)
+        return self._schema
+
+    @property
+    def type_id_cache(self):
+        """
+        Cache of type ids shared by importing and syllable encoding, bounded by
+        the ``type_id_cache_size`` setting of the corpus config
+
+        Returns
+        -------
+        :class:`~polyglotdb.io.helper.TypeIdCache`
+            Type id cache for the corpus
+        """
+        if getattr(self, '_type_id_cache', None) is None:
+            self._type_id_cache = TypeIdCache(getattr(self.config, 'type_id_cache_size', 100000))
+        return self._type_id_cache
+
     @property
     def cypher_safe_name(self):
         return '`{}`'.format(self.corpus_name)
@@ -214,53 +247,23 @@ class BaseContext(object):
     def reset_graph(self, call_back=None, stop_check=None):
         '''
         Remove all nodes and relationships in the corpus.
-        '''
-
-        delete_statement = '''MATCH (n:{corpus}:{anno})-[:spoken_by]->(s:{corpus}:Speaker)
-        where s.name = {{speaker}}
-        with n LIMIT 1000 DETACH DELETE n return count(n) as deleted_count'''
-
-        delete_type_statement = '''MATCH (n:{corpus}:{anno}_type)
-        with n LIMIT 1000 DETACH DELETE n return count(n) as deleted_count'''
 
+        Nodes are deleted in batches, with speakers deleted in parallel, see
+        :func:`~polyglotdb.io.importer.deletion.delete_corpus_graph`.  If deleting is stopped,
+        the hierarchy is kept so that the corpus can be reset again later.
+        '''
         if call_back is not None:
             call_back('Resetting database...')
-            number = self.execute_cypher(
-                '''MATCH (n:{}) return count(*) as number '''.format(self.cypher_safe_name))['number']
-            call_back(0, number)
-        num_deleted = 0
-        for a in self.hierarchy.annotation_types:
-            if stop_check is not None and stop_check():
-                break
-            for s in self.speakers:
-                if stop_check is not None and stop_check():
-                    break
-                deleted = 1000
-                while deleted > 0:
-                    if stop_check is not None and stop_check():
-                        break
-                    deleted = self.execute_cypher(delete_statement.format(corpus=self.cypher_safe_name, anno=a),
-                                                  speaker=s).single()['deleted_count']
-                    num_deleted += deleted
-                    if call_back is not None:
-                        call_back(num_deleted)
-
-            deleted = 1000
-            while deleted > 0:
-                if stop_check is not None and stop_check():
-                    break
-                deleted = self.execute_cypher(
-                    delete_type_statement.format(corpus=self.cypher_safe_name, anno=a)).single()['deleted_count']
-                num_deleted += deleted
-                if call_back is not None:
-                    call_back(num_deleted)
-
-        self.execute_cypher('''MATCH (n:{}:Speaker) DETACH DELETE n '''.format(self.cypher_safe_name))
-        self.execute_cypher('''MATCH (n:{}:Discourse) DETACH DELETE n '''.format(self.cypher_safe_name))
+        if not delete_corpus_graph(self, call_back=call_back, stop_check=stop_check):
+            return
         self.reset_hierarchy()
         self.execute_cypher('''MATCH (n:Corpus) where n.name = {corpus_name} DELETE n ''', corpus_name=self.corpus_name)
         self.hierarchy = Hierarchy(corpus_name=self.corpus_name)
         self.cache_hierarchy()
+        # Nothing remains of an interrupted import to resume
+        path = checkpoint_path(self)
+        if os.path.exists(path):
+            os.remove(path)
 
     def reset(self, call_back=None, stop_check=None):
         '''
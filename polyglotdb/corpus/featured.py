@@ -82,18 +82,22 @@ class FeaturedContext(LexicalContext):
 
         Parameters
         ----------
-        feature_data : dict
-            the enrichment data
+        feature_data : dict or iterable
+            the enrichment data, either as a dictionary or as an iterable of label
+            and properties pairs that is streamed to the database
         type_data : dict
-            By default None
+            By default None, required if feature_data is not a dictionary
         """
 
         if type_data is None:
             type_data = {k: type(v) for k, v in next(iter(feature_data.values())).items()}
         labels = set(self.phones)
-        feature_data = {k: v for k, v in feature_data.items() if k in labels}
-        feature_data_to_csvs(self, feature_data)
-        import_feature_csvs(self, type_data)
+        if isinstance(feature_data, dict):
+            feature_data = {k: v for k, v in feature_data.items() if k in labels}
+            feature_data_to_csvs(self, feature_data)
+            import_feature_csvs(self, type_data)
+        else:
+            import_feature_csvs(self, type_data, rows=((k, v) for k, v in feature_data if k in labels))
         self.hierarchy.add_type_properties(self, self.phone_name, type_data.items())
         self.encode_hierarchy()
 
@@ -2,18 +2,52 @@ import os
 import logging
 import time
 import csv
-from collections import defaultdict
+from contextlib import contextmanager
+from collections import defaultdict, OrderedDict
 
-from ..acoustics.io import setup_audio
+from ..acoustics.io import prepare_audio, load_audio_queue, save_audio_queue
 
-from ..io.importer import (data_to_graph_csvs, import_csvs,
+from ..io.importer import (GraphCSVWriter, data_to_graph_csvs, import_csvs,
                            data_to_type_csvs, import_type_csvs)
+from ..io.importer.bulk import BulkImportWriter, load_bulk_manifest
+from ..io.importer.checkpoint import ImportCheckpoint, checkpoint_path
+from ..io.parsers.base import parse_files
+from ..io.helper import cached_type_ids
 
-from ..exceptions import ParseError
+from ..exceptions import ParseError, HierarchyError, AcousticError
+from ..structure import Hierarchy
 from .structured import StructuredContext
 
 
 class ImportContext(StructuredContext):
+    _graph_csv_writer = None
+    _audio_queue = None
+    _checkpoint = None
+    _token_properties = None
+
+    # Seconds spent in each phase of the last import, see load_directory
+    import_timings = None
+
+    @contextmanager
+    def _timed(self, phase):
+        begin = time.time()
+        try:
+            yield
+        finally:
+            if self.import_timings is not None:
+                self.import_timings[phase] = self.import_timings.get(phase, 0) + time.time() - begin
+
+    def _timed_iter(self, iterable, phase):
+        # Only the time spent producing items counts towards the phase, not the time spent using them
+        iterator = iter(iterable)
+        while True:
+            with self._timed(phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
     def add_types(self, types, type_headers):
         '''
         This function imports types of annotations into the corpus.
@@ -24,49 +58,139 @@ class ImportContext(StructuredContext):
             Dictionary with keys for discourse names and values of :class:`~polyglotdb.io.helper.DiscourseData`
             objects
         '''
-        data_to_type_csvs(self, types, type_headers)
-        import_type_csvs(self, type_headers)
+        if self._checkpoint is not None and self._checkpoint.is_committed('types'):
+            return
+        with self._timed('type_csv_write'):
+            data_to_type_csvs(self, types, type_headers)
+        with self._timed('type_load'):
+            import_type_csvs(self, type_headers)
+        if self._checkpoint is not None:
+            self._checkpoint.commit('types')
+
+    def initialize_csvs(self, speakers, token_headers, subannotations=None, initialized=None):
+        """
+        Create the per-speaker token, precedence and subannotation CSV files with their headers
 
-    def initialize_import(self, speakers, token_headers, subannotations=None):
-        """ prepares corpus for import of types of annotations """
+        Parameters
+        ----------
+        speakers : iterable
+            Speakers to create files for
+        token_headers : dict
+            Headers for each annotation type
+        subannotations : dict, optional
+            Subannotation types for each annotation type
+        initialized : set, optional
+            Paths of files that already have headers, which will be skipped;
+            newly created files are added to it
+        """
         directory = self.config.temporary_directory('csv')
+        headers = {}
         for s in speakers:
             for k, v in token_headers.items():
-                path = os.path.join(directory, '{}_{}.csv'.format(s, k))
-                with open(path, 'w', newline='', encoding='utf8') as f:
-                    w = csv.DictWriter(f, v, delimiter=',')
-                    w.writeheader()
+                headers[os.path.join(directory, '{}_{}.csv'.format(s, k))] = v
+                headers[os.path.join(directory, '{}_{}_precedes.csv'.format(s, k))] = ['previous_id', 'id']
             if subannotations is not None:
                 for k, v in subannotations.items():
                     for sub in v:
                         path = os.path.join(directory, '{}_{}_{}.csv'.format(s, k, sub))
-                        with open(path, 'w', newline='', encoding='utf8') as f:
-                            header = ['id', 'begin', 'end', 'annotation_id', 'label']
-                            w = csv.DictWriter(f, header, delimiter=',')
-                            w.writeheader()
-
-        def corpus_index(tx):
-            tx.run('CREATE CONSTRAINT ON (node:Corpus) ASSERT node.name IS UNIQUE')
+                        headers[path] = ['id', 'begin', 'end', 'annotation_id', 'label']
+        for path, header in headers.items():
+            if initialized is not None:
+                if path in initialized:
+                    continue
+                initialized.add(path)
+            with open(path, 'w', newline='', encoding='utf8') as f:
+                w = csv.DictWriter(f, header, delimiter=',')
+                w.writeheader()
+
+    def _extend_token_csvs(self, speakers, token_headers):
+        # Token files are shared by the discourses of a speaker, so their headers
+        # are extended with the token properties of each discourse
+        for s in speakers:
+            for k, header in token_headers.items():
+                self._graph_csv_writer.extend_header('{}_{}.csv'.format(s, k), header)
 
-        def discourse_index(tx):
-            tx.run('CREATE INDEX ON :Discourse(name)')
+    def initialize_import(self, speakers, token_headers, subannotations=None):
+        """ prepares corpus for import of types of annotations """
+        self.initialize_csvs(speakers, token_headers, subannotations)
+        if self._graph_csv_writer is not None:
+            self._graph_csv_writer.close()
+        self._graph_csv_writer = GraphCSVWriter(self.config.temporary_directory('csv'))
+        self._extend_token_csvs(speakers, token_headers)
+        self._token_properties = defaultdict(set)
+        self.initialize_graph()
 
-        def speaker_index(tx):
-            tx.run('CREATE INDEX ON :Speaker(name)')
+    def initialize_graph(self):
+        """ creates the corpus node and the indexes for speakers and discourses """
 
         def corpus_create(tx, corpus_name):
             tx.run('MERGE (n:Corpus {name: $corpus_name}) return n', corpus_name=corpus_name)
 
+        self.schema.ensure(constraints=[('Corpus', 'name')], indexes=[('Discourse', 'name'), ('Speaker', 'name')])
         with self.graph_driver.session() as session:
-            session.write_transaction(corpus_index)
-            session.write_transaction(discourse_index)
-            session.write_transaction(speaker_index)
             session.write_transaction(corpus_create, self.corpus_name)
 
-    def finalize_import(self, data, call_back=None, stop_check=None):
+    def finalize_import(self, data, call_back=None, stop_check=None, speakers=None):
         """ generates hierarchy and saves variables"""
-        import_csvs(self, data, call_back, stop_check)
-        self.encode_hierarchy()
+        self._finalize_tokens(data, call_back, stop_check, speakers)
+        if self._checkpoint is None or not self._checkpoint.is_committed('hierarchy'):
+            with self._timed('hierarchy_encode'):
+                self.encode_hierarchy()
+            if self._checkpoint is not None:
+                self._checkpoint.commit('hierarchy')
+        self._prepare_import_audio(call_back=call_back, stop_check=stop_check)
+
+    def prepare_audio(self, num_jobs=None, call_back=None, stop_check=None):
+        '''
+        Prepare the resampled audio files of imported discourses across multiple
+        processes, separately from importing their annotations
+
+        Discourses are queued as they are added, and the queue is saved to the corpus'
+        temporary directory, so calling this method again after an interruption
+        resumes where it left off.
+
+        Parameters
+        ----------
+        num_jobs : int, optional
+            Number of processes to use, defaults to the ``num_jobs`` setting of the corpus config
+        call_back : callable, optional
+            Function to report progress
+        stop_check : callable, optional
+            Function to check whether to halt
+
+        Returns
+        -------
+        list
+            Names of discourses whose audio could not be prepared
+        '''
+        if num_jobs is None:
+            num_jobs = self.config.num_jobs
+        self._save_audio_queue()
+        return prepare_audio(self, num_jobs=num_jobs, call_back=call_back, stop_check=stop_check)
+
+    def _prepare_import_audio(self, num_jobs=None, call_back=None, stop_check=None):
+        with self._timed('audio'):
+            failed = self.prepare_audio(num_jobs=num_jobs, call_back=call_back, stop_check=stop_check)
+        if failed:
+            raise AcousticError('Could not prepare the audio of {} (see the log for details), '
+                                'which can be retried with prepare_audio.'.format(', '.join(sorted(failed))))
+
+    def _save_audio_queue(self):
+        if self._audio_queue:
+            queue = load_audio_queue(self)
+            queued = set(x[0] for x in queue)
+            queue.extend(x for x in self._audio_queue if x[0] not in queued)
+            save_audio_queue(self, queue)
+            self._audio_queue = None
+
+    def _finalize_tokens(self, data, call_back=None, stop_check=None, speakers=None):
+        if self._graph_csv_writer is not None:
+            self._graph_csv_writer.close()
+            self._graph_csv_writer = None
+        with self._timed('token_load'):
+            import_csvs(self, data, call_back, stop_check, speakers=speakers, checkpoint=self._checkpoint,
+                        token_properties=self._token_properties)
+        self._token_properties = None
 
     def add_discourse(self, data):
         '''
@@ -77,8 +201,17 @@ class ImportContext(StructuredContext):
         data : :class:`~polyglotdb.io.helper.DiscourseData`
             Data for the discourse to be added
         '''
-        if data.name in self.discourses:
+        self._add_discourse_data(data)
+        self.hierarchy.update(data.hierarchy)
+
+    def _add_discourse_data(self, data):
+        # Discourses are recorded in the checkpoint before their nodes are created,
+        # so that an interrupted import can add them again when it is resumed
+        if data.name in self.discourses and (self._checkpoint is None or
+                                             not self._checkpoint.has_discourse(data.name)):
             raise (ParseError('The discourse \'{}\' already exists in this corpus.'.format(data.name)))
+        if self._checkpoint is not None:
+            self._checkpoint.add_discourse(data.name)
         log = logging.getLogger('{}_loading'.format(self.corpus_name))
         log.info('Begin adding discourse {}...'.format(data.name))
         begin = time.time()
@@ -91,21 +224,29 @@ class ImportContext(StructuredContext):
                         SET r.channel = $channel'''.format(corpus_name=self.cypher_safe_name),
                    speaker_name=speaker_name, discourse_name=discourse_name, channel=channel)
 
-        with self.graph_driver.session() as session:
+        with self._timed('discourse_nodes'), self.graph_driver.session() as session:
             for s in data.speakers:
                 if s in data.speaker_channel_mapping:
                     session.write_transaction(create_speaker_discourse, s, data.name, data.speaker_channel_mapping[s])
                 else:
                     session.write_transaction(create_speaker_discourse, s, data.name, 0)
         data.corpus_name = self.corpus_name
-        data_to_graph_csvs(self, data)
-        self.hierarchy.update(data.hierarchy)
-        setup_audio(self, data)
+        with self._timed('csv_write'):
+            data_to_graph_csvs(self, data, self._graph_csv_writer)
+        # Tokens of all discourses are loaded together, so their properties are collected across discourses
+        if self._token_properties is None:
+            self._token_properties = defaultdict(set)
+        for at in data.annotation_types:
+            self._token_properties[at].update(data[at].token_property_keys)
+        if data.wav_path is not None:
+            if self._audio_queue is None:
+                self._audio_queue = []
+            self._audio_queue.append((data.name, data.wav_path))
 
         log.info('Finished adding discourse {}!'.format(data.name))
         log.debug('Total time taken: {} seconds'.format(time.time() - begin))
 
-    def load(self, parser, path):
+    def load(self, parser, path, num_jobs=None, single_pass=False, bulk=False, resume=False):
         """
         Use a specified parser on a path to either a directory or a single
         file
@@ -117,21 +258,84 @@ class ImportContext(StructuredContext):
 
         path : str
             The location of the corpus
+        num_jobs : int, optional
+            Number of processes to use for parsing files in a directory,
+            defaults to the ``num_jobs`` setting of the corpus config
+        single_pass : bool
+            If True, parse each file in a directory only once, see
+            :meth:`~polyglotdb.corpus.ImportContext.load_directory`
+        bulk : bool
+            If True and the database is empty, write files for Neo4j's offline
+            bulk importer rather than loading the corpus through Cypher, see
+            :meth:`~polyglotdb.corpus.ImportContext.load_bulk`
+        resume : bool
+            If True, resume an earlier import of the same path that was interrupted,
+            from its checkpoint in the corpus' temporary directory.  Files that were
+            already loaded are skipped and rows that were already committed are not
+            created again.  If False (the default), any earlier checkpoint is discarded
 
         Returns
         -------
         could_not_parse : list
             list of files that it could not parse
         """
-
-        if os.path.isdir(path):
-            print("loading {} with {}".format(path, parser))
-            could_not_parse = self.load_directory(parser, path)
-
-        else:
-            could_not_parse = self.load_discourse(parser, path)
+        if bulk:
+            if self.database_is_empty():
+                return self.load_bulk(parser, path, num_jobs=num_jobs)
+            log = logging.getLogger('{}_loading'.format(self.corpus_name))
+            log.warning('The database is not empty, so the corpus will be imported without the bulk importer.')
+
+        self.import_timings = OrderedDict()
+        self._checkpoint = self._start_checkpoint(path, resume)
+        try:
+            if self._checkpoint.csvs_written:
+                could_not_parse = self._resume_import(parser)
+            elif os.path.isdir(path):
+                print("loading {} with {}".format(path, parser))
+                could_not_parse = self.load_directory(parser, path, num_jobs=num_jobs, single_pass=single_pass)
+            else:
+                could_not_parse = self.load_discourse(parser, path)
+            if parser.stop_check is None or not parser.stop_check():
+                self._checkpoint.remove()
+        finally:
+            self._checkpoint = None
         return could_not_parse
 
+    def _start_checkpoint(self, path, resume):
+        source = os.path.abspath(path)
+        path = checkpoint_path(self)
+        if resume:
+            checkpoint = ImportCheckpoint.load(path)
+            if checkpoint is not None:
+                if checkpoint.source != source:
+                    raise ParseError('The interrupted import of \'{}\' cannot be resumed '
+                                     'by importing \'{}\'.'.format(checkpoint.source, source))
+                log = logging.getLogger('{}_loading'.format(self.corpus_name))
+                log.info('Resuming the import of {} with {} files already loaded'.format(
+                    source, len(checkpoint.committed)))
+                return checkpoint
+        checkpoint = ImportCheckpoint(path, source)
+        checkpoint.start()
+        return checkpoint
+
+    def _finish_csvs(self, last_path, could_not_parse):
+        # Audio is queued in memory as discourses are added, so it is saved before tokens are loaded
+        self._save_audio_queue()
+        if self._checkpoint is not None:
+            self._checkpoint.finish_csvs(self.hierarchy, last_path, could_not_parse, self._token_properties)
+
+    def _resume_import(self, parser):
+        csvs = self._checkpoint.csvs
+        self.hierarchy = Hierarchy(corpus_name=self.corpus_name)
+        self.hierarchy.from_json(csvs['hierarchy'])
+        # The token properties of all discourses are kept in the checkpoint, while the last file
+        # parsed supplies the annotation types that the CSV files were written with
+        if csvs.get('token_properties') is not None:
+            self._token_properties = {k: set(v) for k, v in csvs['token_properties'].items()}
+        data = parser.parse_discourse(csvs['last_path'])
+        self.finalize_import(data, parser.call_back, parser.stop_check)
+        return csvs['could_not_parse']
+
     def load_discourse(self, parser, path):
         """
         initializes, adds types, adds data, and finalizes import
@@ -148,14 +352,33 @@ class ImportContext(StructuredContext):
         empty list
 
         """
-        data = parser.parse_discourse(path)
+        self.import_timings = OrderedDict()
+        with self._timed('token_parse'):
+            data = parser.parse_discourse(path)
         self.initialize_import(data.speakers, data.token_headers, data.hierarchy.subannotations)
         self.add_types(*data.types(self.corpus_name))
         self.add_discourse(data)
-        self.finalize_import(data)
+        self._finish_csvs(path, [])
+        self.finalize_import(data, speakers=data.speakers)
         return []
 
-    def load_directory(self, parser, path):
+    def _find_files(self, parser, path):
+        if not os.path.isdir(path):
+            return [path]
+        paths = []
+        for root, subdirs, files in os.walk(path, followlinks=True):
+            for filename in files:
+                if parser.stop_check is not None and parser.stop_check():
+                    return
+                if not parser.match_extension(filename):
+                    continue
+                paths.append(os.path.join(root, filename))
+        if len(paths) == 0:
+            raise (ParseError(
+                'No files in the specified directory matched the parser. Please check to make sure you have the correct parser.'))
+        return paths
+
+    def load_directory(self, parser, path, num_jobs=None, single_pass=False):
         """
         Checks if it can parse each file in dir,
         initializes, adds types, adds data, and finalizes import
@@ -166,84 +389,371 @@ class ImportContext(StructuredContext):
                 the type of parser used for corpus
         path : str
             the location of the directory
+        num_jobs : int, optional
+            Number of processes to use for parsing files, defaults to the
+            ``num_jobs`` setting of the corpus config
+        single_pass : bool
+            If True, parse each file once, writing its tokens to CSV files as it is
+            parsed and collecting types along the way, rather than parsing every
+            file once for types and again for tokens.  Defaults to False
+
+        The seconds spent in each phase of the import (parsing types and tokens,
+        writing CSV files, loading types and tokens, encoding the hierarchy and
+        preparing audio) are recorded in ``import_timings``.
 
         Returns
         -------
         could_not_parse : list
             list of files that were not able to be parsed
         """
+        self.import_timings = OrderedDict()
+        # Type ids are cached for the whole run, as the same types recur across files
+        with cached_type_ids(self.type_id_cache) as cache:
+            cache.reset_stats()
+            could_not_parse = self._load_directory(parser, path, num_jobs, single_pass)
+        log = logging.getLogger('{}_loading'.format(self.corpus_name))
+        log.info('Type id cache: {hits} hits, {misses} misses ({hit_rate:.1%} hit rate), '
+                 '{evictions} evictions'.format(**cache.stats()))
+        log.debug('Import phases took: {}'.format(', '.join('{} {:.3f} seconds'.format(k, v)
+                                                             for k, v in self.import_timings.items())))
+        return could_not_parse
+
+    def _load_directory(self, parser, path, num_jobs=None, single_pass=False):
+        if num_jobs is None:
+            num_jobs = self.config.num_jobs
         call_back = parser.call_back
         parser.call_back = None
         if call_back is not None:
             call_back('Finding  files...')
             call_back(0, 0)
-        file_tuples = []
-        for root, subdirs, files in os.walk(path, followlinks=True):
-            for filename in files:
-                if parser.stop_check is not None and parser.stop_check():
-                    return
-                if not parser.match_extension(filename):
-                    continue
-                file_tuples.append((root, filename))
-        if len(file_tuples) == 0:
-            raise (ParseError(
-                'No files in the specified directory matched the parser. Please check to make sure you have the correct parser.'))
+        paths = self._find_files(parser, path)
+        if paths is None:
+            return
+        if single_pass:
+            could_not_parse = self._load_files_single_pass(parser, paths, num_jobs, call_back)
+            parser.call_back = call_back
+            return could_not_parse
+        information = self._parse_types(parser, paths, num_jobs, call_back)
+        if information is None:
+            return
+        speakers, types, type_headers, token_headers, subannotations = information
+        if call_back is not None:
+            call_back('Importing types...')
+        self.initialize_import(speakers, token_headers, subannotations)
+        self.add_types(types, type_headers)
+
+        if call_back is not None:
+            call_back('Parsing files...')
+            call_back(0, len(paths))
+            cur = 0
+        could_not_parse = []
+        data = None
+        files = self._timed_iter(parse_files(parser, paths, num_jobs=num_jobs, stop_check=parser.stop_check),
+                                 'token_parse')
+        for i, (path, result) in enumerate(files):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if call_back is not None:
+                call_back('Parsing file {} of {} ({})...'.format(i + 1, len(paths), name))
+                call_back(i)
+            if isinstance(result, ParseError):
+                could_not_parse.append(path)
+                continue
+            data = result
+            data_path = path
+            self.add_discourse(data)
+        if parser.stop_check is not None and parser.stop_check():
+            return
+        if data is None:
+            raise ParseError('None of the files in the specified directory could be parsed.')
+        self._finish_csvs(data_path, could_not_parse)
+        self.finalize_import(data, call_back, parser.stop_check)
+        parser.call_back = call_back
+        return could_not_parse
+
+    def _parse_types(self, parser, paths, num_jobs, call_back=None):
         if call_back is not None:
             call_back('Parsing types...')
-            call_back(0, len(file_tuples))
+            call_back(0, len(paths))
             cur = 0
         speakers = set()
         types = defaultdict(set)
         type_headers = None
         token_headers = None
         subannotations = None
-        for i, t in enumerate(file_tuples):
-            if parser.stop_check is not None and parser.stop_check():
-                return
+        log = logging.getLogger('{}_loading'.format(self.corpus_name))
+        files = self._timed_iter(parse_files(parser, paths, corpus_name=self.corpus_name, types_only=True,
+                                             num_jobs=num_jobs, stop_check=parser.stop_check), 'type_parse')
+        for i, (path, information) in enumerate(files):
             if call_back is not None:
-                call_back('Parsing types from file {} of {}...'.format(i + 1, len(file_tuples)))
+                call_back('Parsing types from file {} of {}...'.format(i + 1, len(paths)))
                 call_back(i)
-            root, filename = t
-            path = os.path.join(root, filename)
-            try:
-                information = parser.parse_information(path, self.corpus_name)
-                if not information['type_headers']:
-                    raise ParseError('There was an issue using this parser to parse the file {}.'.format(path))
-                speakers.update(information['speakers'])
-                type_headers = information['type_headers']
-                token_headers = information['token_headers']
-                subannotations = information['subannotations']
-            except ParseError:
-                print (t)
-                raise
-                continue
+            if isinstance(information, ParseError):
+                log.error('Could not parse {}'.format(path))
+                raise information
+            if not information['type_headers']:
+                log.error('Could not parse {}'.format(path))
+                raise ParseError('There was an issue using this parser to parse the file {}.'.format(path))
+            speakers.update(information['speakers'])
+            type_headers = information['type_headers']
+            # Token files are shared across discourses, so their headers cover the token properties of every file
+            if token_headers is None:
+                token_headers = {}
+            for k, v in information['token_headers'].items():
+                header = token_headers.setdefault(k, [])
+                for x in v:
+                    if x not in header:
+                        header.append(x)
+            subannotations = information['subannotations']
             for k, v in information['types'].items():
                 types[k].update(v)
+        if parser.stop_check is not None and parser.stop_check():
+            return
+        return speakers, types, type_headers, token_headers, subannotations
+
+    def _load_files_single_pass(self, parser, paths, num_jobs, call_back=None):
+        self.initialize_import([], {})
+        if call_back is not None:
+            call_back('Parsing files...')
+            call_back(0, len(paths))
+        types = defaultdict(set)
+        type_headers = None
+        initialized = set()
+        could_not_parse = []
+        data = None
+        files = self._timed_iter(parse_files(parser, paths, num_jobs=num_jobs, stop_check=parser.stop_check),
+                                 'token_parse')
+        for i, (path, result) in enumerate(files):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if call_back is not None:
+                call_back('Parsing file {} of {} ({})...'.format(i + 1, len(paths), name))
+                call_back(i)
+            if isinstance(result, ParseError):
+                could_not_parse.append(path)
+                continue
+            data = result
+            with self._timed('type_parse'):
+                file_types, file_type_headers = data.types(self.corpus_name)
+            if not file_type_headers:
+                raise ParseError('There was an issue using this parser to parse the file {}.'.format(path))
+            type_headers = file_type_headers
+            for k, v in file_types.items():
+                types[k].update(v)
+            self.initialize_csvs(data.speakers, data.token_headers, data.hierarchy.subannotations,
+                                 initialized=initialized)
+            self._extend_token_csvs(data.speakers, data.token_headers)
+            data_path = path
+            self.add_discourse(data)
+        if parser.stop_check is not None and parser.stop_check():
+            return
+        if data is None:
+            raise ParseError('None of the files in the specified directory could be parsed.')
+        if call_back is not None:
+            call_back('Importing types...')
+        self.add_types(types, type_headers)
+        self._finish_csvs(data_path, could_not_parse)
+        self.finalize_import(data, call_back, parser.stop_check)
+        return could_not_parse
+
+    def add_discourses(self, parser, paths, num_jobs=None):
+        """
+        Add new discourses to an existing corpus, without reimporting anything
+        already in the corpus
+
+        Only types that are not in the database yet are imported, only the tokens of the
+        new discourses are loaded, and the corpus hierarchy is extended with any new
+        annotation types and properties rather than being regenerated, so the time taken
+        depends on the number of new files rather than the size of the corpus.
+
+        New tokens are linked as they are parsed, so corpora that have been enriched
+        with annotation types between existing ones (such as syllables or utterances)
+        cannot be added to until those encodings are reset.
+
+        Parameters
+        ----------
+        parser : :class:`~polyglotdb.io.parsers.BaseParser`
+            The type of parser used for the files
+        paths : str or list
+            Full paths of the files to add, or a directory containing them
+        num_jobs : int, optional
+            Number of processes to use for parsing files, defaults to the
+            ``num_jobs`` setting of the corpus config
+
+        Returns
+        -------
+        could_not_parse : list
+            list of files that were not able to be parsed
+        """
+        if num_jobs is None:
+            num_jobs = self.config.num_jobs
+        if isinstance(paths, str):
+            paths = self._find_files(parser, paths)
+            if paths is None:
+                return
+        log = logging.getLogger('{}_loading'.format(self.corpus_name))
+        self.import_timings = OrderedDict()
+        call_back = parser.call_back
+        parser.call_back = None
+        information = self._parse_types(parser, paths, num_jobs, call_back)
+        if information is None:
+            parser.call_back = call_back
+            return
+        speakers, types, type_headers, token_headers, subannotations = information
+        if parser.hierarchy is not None:
+            conflicts = self.hierarchy.conflicts(parser.hierarchy)
+            if conflicts:
+                raise HierarchyError('The corpus contains {} in different annotation types than the new files ({}), '
+                                     'likely from encoding syllables or utterances. Reset those encodings before '
+                                     'adding discourses and re-encode them afterwards.'.format(
+                                         ', '.join(conflicts), ', '.join('{} in {}'.format(k, parser.hierarchy[k])
+                                                                         for k in conflicts)))
+        new_speakers = speakers - set(self.speakers)
         if call_back is not None:
             call_back('Importing types...')
+        types = self._new_types(types, type_headers)
+        log.info('Adding {} discourses with {} new speakers and {} new types'.format(
+            len(paths), len(new_speakers), sum(len(v) for v in types.values())))
         self.initialize_import(speakers, token_headers, subannotations)
         self.add_types(types, type_headers)
 
         if call_back is not None:
             call_back('Parsing files...')
-            call_back(0, len(file_tuples))
-            cur = 0
+            call_back(0, len(paths))
         could_not_parse = []
-        for i, t in enumerate(file_tuples):
-            if parser.stop_check is not None and parser.stop_check():
-                return
-            root, filename = t
-            name = os.path.splitext(filename)[0]
+        data = None
+        hierarchy_changed = False
+        files = self._timed_iter(parse_files(parser, paths, num_jobs=num_jobs, stop_check=parser.stop_check),
+                                 'token_parse')
+        for i, (path, result) in enumerate(files):
+            name = os.path.splitext(os.path.basename(path))[0]
             if call_back is not None:
-                call_back('Parsing file {} of {} ({})...'.format(i + 1, len(file_tuples), name))
+                call_back('Parsing file {} of {} ({})...'.format(i + 1, len(paths), name))
                 call_back(i)
-            path = os.path.join(root, filename)
-            try:
-                data = parser.parse_discourse(path)
-            except ParseError:
+            if isinstance(result, ParseError):
                 could_not_parse.append(path)
                 continue
-            self.add_discourse(data)
-        self.finalize_import(data, call_back, parser.stop_check)
+            data = result
+            self._add_discourse_data(data)
+            if self.hierarchy.merge(data.hierarchy):
+                hierarchy_changed = True
+        parser.call_back = call_back
+        if parser.stop_check is not None and parser.stop_check():
+            return
+        if data is None:
+            raise ParseError('None of the specified files could be parsed.')
+        self._finalize_tokens(data, call_back, parser.stop_check, speakers=sorted(speakers))
+        if hierarchy_changed:
+            with self._timed('hierarchy_encode'):
+                self.encode_hierarchy()
+        self._prepare_import_audio(num_jobs=num_jobs, call_back=call_back, stop_check=parser.stop_check)
+        return could_not_parse
+
+    def _new_types(self, types, type_headers, batch_size=10000):
+        statement = '''UNWIND $ids AS type_id
+        MATCH (n:{annotation_type}_type:{corpus_name} {{id: type_id}})
+        RETURN n.id AS id'''
+        new_types = {}
+        for at, header in type_headers.items():
+            id_index = header.index('id')
+            ids = sorted(set(t[id_index] for t in types[at]))
+            existing = set()
+            for i in range(0, len(ids), batch_size):
+                res = self.execute_cypher(statement.format(annotation_type=at, corpus_name=self.cypher_safe_name),
+                                          ids=ids[i:i + batch_size])
+                existing.update(x['id'] for x in res)
+            new_types[at] = set(t for t in types[at] if t[id_index] not in existing)
+        return new_types
+
+    def database_is_empty(self):
+        """
+        Check whether the graph database has no nodes at all, in any corpus
+
+        Returns
+        -------
+        bool
+            True if the database is empty
+        """
+        res = self.execute_cypher('MATCH (n) RETURN n LIMIT 1')
+        return len(list(res)) == 0
+
+    def load_bulk(self, parser, path, num_jobs=None):
+        """
+        Parse a file or directory into node and relationship files for Neo4j's
+        offline bulk importer (``neo4j-admin import``), which is much faster than
+        importing through Cypher for large corpora, but requires the database to be empty.
+
+        Once the files are written, the database has to be stopped and the files
+        imported with the printed command, after which
+        :meth:`~polyglotdb.corpus.ImportContext.finalize_bulk_import` should be
+        called with the database running again.
+
+        Parameters
+        ----------
+        parser : :class:`~polyglotdb.io.parsers.BaseParser`
+            The type of parser used for corpus
+        path : str
+            The location of the corpus
+        num_jobs : int, optional
+            Number of processes to use for parsing files, defaults to the
+            ``num_jobs`` setting of the corpus config
+
+        Returns
+        -------
+        could_not_parse : list
+            list of files that were not able to be parsed
+        """
+        if num_jobs is None:
+            num_jobs = self.config.num_jobs
+        call_back = parser.call_back
+        parser.call_back = None
+        paths = self._find_files(parser, path)
+        if paths is None:
+            return
+        information = self._parse_types(parser, paths, num_jobs, call_back)
+        if information is None:
+            return
+        speakers, types, type_headers, token_headers, subannotations = information
+        writer = BulkImportWriter(self, token_headers, type_headers, parser.hierarchy)
+        writer.add_types(types)
+        if call_back is not None:
+            call_back('Parsing files...')
+            call_back(0, len(paths))
+        could_not_parse = []
+        for i, (path, result) in enumerate(parse_files(parser, paths, num_jobs=num_jobs,
+                                                       stop_check=parser.stop_check)):
+            name = os.path.splitext(os.path.basename(path))[0]
+            if call_back is not None:
+                call_back('Parsing file {} of {} ({})...'.format(i + 1, len(paths), name))
+                call_back(i)
+            if isinstance(result, ParseError):
+                could_not_parse.append(path)
+                continue
+            writer.add_discourse(result)
+            self.hierarchy.update(result.hierarchy)
+        writer.close()
         parser.call_back = call_back
+        if parser.stop_check is not None and parser.stop_check():
+            return
+        self.cache_hierarchy()
+        log = logging.getLogger('{}_loading'.format(self.corpus_name))
+        command = ' '.join('"{}"'.format(x) if ' ' in x else x for x in writer.command())
+        log.info('Bulk import files written to {}'.format(writer.directory))
+        print('Stop the database and run the following command, then start the database and call '
+              'finalize_bulk_import:\n{}'.format(command))
         return could_not_parse
+
+    def finalize_bulk_import(self, call_back=None):
+        """
+        Finish a bulk import started with :meth:`~polyglotdb.corpus.ImportContext.load_bulk`
+        once the files have been imported, by creating indexes, encoding the hierarchy
+        and setting up audio files for discourses
+        """
+        manifest = load_bulk_manifest(self)
+        if manifest is None:
+            raise ParseError('No bulk import was found for the corpus \'{}\'.'.format(self.corpus_name))
+        if call_back is not None:
+            call_back('Creating indexes...')
+        self.initialize_graph()
+        self.schema.ensure_hierarchy(self.hierarchy)
+        self.encode_hierarchy()
+        self._audio_queue = [tuple(x) for x in manifest['discourses']]
+        self._prepare_import_audio(call_back=call_back)
@@ -10,10 +10,11 @@ class LexicalContext(SpokenContext):
 
         Parameters
         ----------
-        lexicon_data : dict
-            the data in the lexicon
+        lexicon_data : dict or iterable
+            the data in the lexicon, either as a dictionary or as an iterable of
+            label and properties pairs that is streamed to the database
         type_data : dict
-            default to None
+            default to None, required if lexicon_data is not a dictionary
         case_sensitive : bool
             default to False
         """
@@ -23,8 +24,11 @@ class LexicalContext(SpokenContext):
         type_data = {k: v for k,v in type_data.items() if k not in removed}
         if not type_data:
             return
-        lexicon_data_to_csvs(self, lexicon_data, case_sensitive=case_sensitive)
-        import_lexicon_csvs(self, type_data, case_sensitive=case_sensitive)
+        if isinstance(lexicon_data, dict):
+            lexicon_data_to_csvs(self, lexicon_data, case_sensitive=case_sensitive)
+            import_lexicon_csvs(self, type_data, case_sensitive=case_sensitive)
+        else:
+            import_lexicon_csvs(self, type_data, case_sensitive=case_sensitive, rows=lexicon_data)
         self.hierarchy.add_type_properties(self, self.word_name, type_data.items())
         self.encode_hierarchy()
 
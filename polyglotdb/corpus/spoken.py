@@ -50,19 +50,24 @@ class SpokenContext(AudioContext):
 
         Parameters
         ----------
-        speaker_data : dict
-            the data about the speakers to add
+        speaker_data : dict or iterable
+            the data about the speakers to add, either as a dictionary or as an iterable
+            of name and properties pairs that is streamed to the database
         type_data : dict
-            Specifies the type of the data to be added, defaults to None
+            Specifies the type of the data to be added, defaults to None, required
+            if speaker_data is not a dictionary
 
         """
         if type_data is None:
             type_data = {k: type(v) for k, v in next(iter(speaker_data.values())).items()}
         speakers = set(self.speakers)
-        speaker_data = {k: v for k, v in speaker_data.items() if k in speakers}
+        if isinstance(speaker_data, dict):
+            speaker_data = {k: v for k, v in speaker_data.items() if k in speakers}
 
-        speaker_data_to_csvs(self, speaker_data)
-        import_speaker_csvs(self, type_data)
+            speaker_data_to_csvs(self, speaker_data)
+            import_speaker_csvs(self, type_data)
+        else:
+            import_speaker_csvs(self, type_data, rows=((k, v) for k, v in speaker_data if k in speakers))
         self.hierarchy.add_speaker_properties(self, type_data.items())
         self.encode_hierarchy()
 
@@ -91,20 +96,24 @@ class SpokenContext(AudioContext):
 
         Parameters
         ----------
-        discourse_data : dict
-            the data about the discourse to add
+        discourse_data : dict or iterable
+            the data about the discourse to add, either as a dictionary or as an iterable
+            of name and properties pairs that is streamed to the database
         type_data : dict
-            Specifies the type of the data to be added, defaults to None
+            Specifies the type of the data to be added, defaults to None, required
+            if discourse_data is not a dictionary
 
         """
         if type_data is None:
             type_data = {k: type(v) for k, v in next(iter(discourse_data.values())).items()}
 
         discourses = set(self.discourses)
-        print(discourses, discourse_data)
-        discourse_data = {k: v for k, v in discourse_data.items() if k in discourses}
-        discourse_data_to_csvs(self, discourse_data)
-        import_discourse_csvs(self, type_data)
+        if isinstance(discourse_data, dict):
+            discourse_data = {k: v for k, v in discourse_data.items() if k in discourses}
+            discourse_data_to_csvs(self, discourse_data)
+            import_discourse_csvs(self, type_data)
+        else:
+            import_discourse_csvs(self, type_data, rows=((k, v) for k, v in discourse_data if k in discourses))
         self.hierarchy.add_discourse_properties(self, type_data.items())
         self.encode_hierarchy()
 
@@ -220,7 +220,7 @@ return coda, count(coda) as freq'''.format(corpus_name=self.cypher_safe_name,
                            'coda_id': phone_ids[-1],
                            'begin': phone_begins[0],
                            'label': label,
-                           'type_id': make_type_id([label], self.corpus_name),
+                           'type_id': make_type_id([label], self.corpus_name, cache=self.type_id_cache),
                            'end': phone_ends[-1]}
                     speaker_non_syls[s].append(row)
                     prev_id = cur_id
@@ -277,7 +277,7 @@ return coda, count(coda) as freq'''.format(corpus_name=self.cypher_safe_name,
                     row = {'id': cur_id, 'prev_id': prev_id,
                            'vowel_id': cur_vow_id, 'onset_id': cur_ons_id,
                            'label': label,
-                           'type_id': make_type_id([label], self.corpus_name),
+                           'type_id': make_type_id([label], self.corpus_name, cache=self.type_id_cache),
                            'coda_id': cur_coda_id, 'begin': begin, 'end': end}
                     speaker_boundaries[s].append(row)
                     prev_id = cur_id
@@ -202,10 +202,12 @@ class SubsetError(PGError):
 
 
 class AlphabetError(PGError):
-    def __init__(self):
-        self.value = "None of these phones appear to be in the corpus alphabet. " \
-                     "Please check to make sure the alphabet you are using corresponds " \
-                     "to that of the corpus\n\n"
+    def __init__(self, value=None):
+        if value is None:
+            value = "None of these phones appear to be in the corpus alphabet. " \
+                    "Please check to make sure the alphabet you are using corresponds " \
+                    "to that of the corpus\n\n"
+        self.value = value
 
 
 class HierarchyError(PGError):
@@ -127,10 +127,8 @@ class DiscourseData(object):
         type_headers = {}
         for k, v in self.items():
             types[k] = set()
-            for w in v:
+            for i in range(len(v)):
                 if k not in type_headers:
-                    type_headers[k] = ['id'] + w.type_keys()
-                id = w.sha(corpus_name)
-                props = tuple([id] + [x for x in w.type_values()])
-                types[k].add(props)
+                    type_headers[k] = ['id'] + v.row_type_keys(i)
+                types[k].add(v.row_type(i, corpus_name))
         return types, type_headers
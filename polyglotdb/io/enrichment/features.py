@@ -1,4 +1,5 @@
-from .helper import parse_file
+from ...exceptions import AlphabetError
+from .helper import stream_file, key_column
 
 
 def enrich_features_from_csv(corpus_context, path):
@@ -12,5 +13,12 @@ def enrich_features_from_csv(corpus_context, path):
     path : str
         the path to the csv file
     """
-    data, type_data = parse_file(path)
-    corpus_context.enrich_features(data, type_data)
+    type_data, rows = stream_file(path, labels=set(corpus_context.phones))
+    if rows is None:
+        raise AlphabetError('None of the segments in the \'{}\' column of {} are phones in the corpus. '
+                            'Please check that the file uses the same alphabet as the corpus.'.format(
+                                key_column(path), path))
+    try:
+        corpus_context.enrich_features(rows, type_data)
+    finally:
+        rows.close()
@@ -1,6 +1,13 @@
 import csv
+from itertools import islice
 from collections import defaultdict
 
+# Number of characters read from the start of a file to detect its dialect
+SNIFF_SIZE = 64 * 1024
+
+# Number of rows that the types of properties are inferred from
+TYPE_SAMPLE_SIZE = 10000
+
 
 def sanitize_name(string):
     return string.strip().replace(' ', '_').lower()
@@ -38,6 +45,145 @@ def parse_string(value):
         return value
 
 
+def sniff_dialect(csvfile, sniff_size=SNIFF_SIZE):
+    """
+    Detect the dialect of a csv file from its first lines, leaving the file
+    positioned at its beginning
+
+    Parameters
+    ----------
+    csvfile : file
+        the open csv file
+    sniff_size : int
+        the maximum number of characters to read, defaults to 64 KB
+
+    Returns
+    -------
+    :class:`csv.Dialect`
+        the dialect of the file
+    """
+    sample = csvfile.read(sniff_size)
+    csvfile.seek(0)
+    if len(sample) == sniff_size and '\n' in sample:
+        # Only sniff complete lines
+        sample = sample[:sample.rindex('\n')]
+    dialect = csv.Sniffer().sniff(sample)
+    if dialect.delimiter == '-':
+        dialect.delimiter = ','
+    return dialect
+
+
+def infer_types(rows):
+    """
+    Infers the type of each property as the most common type of its values
+
+    Parameters
+    ----------
+    rows : iterable
+        properties of each row as dictionaries
+
+    Returns
+    -------
+    dict
+        types of each property, properties without any values are strings
+    """
+    counts = {}
+    for row in rows:
+        for k, v in row.items():
+            if k not in counts:
+                counts[k] = defaultdict(int)
+            if v is not None:
+                counts[k][type(v)] += 1
+    return {k: max(v.keys(), key=lambda x: v[x]) if v else str for k, v in counts.items()}
+
+
+def key_column(path):
+    """
+    Get the name of the first column of a csv file, which is the key of each row
+
+    Parameters
+    ----------
+    path : str
+        the path to the file
+
+    Returns
+    -------
+    str
+        name of the key column
+    """
+    with open(path, 'r', encoding='utf-8-sig') as csvfile:
+        dialect = sniff_dialect(csvfile)
+        return next(csv.reader(csvfile, dialect=dialect))[0]
+
+
+def stream_file(path, labels=None, case_sensitive=True, sample_size=TYPE_SAMPLE_SIZE):
+    """
+    Reads a csv file one row at a time, inferring the types of its columns
+    from the first rows
+
+    The first column of the file is the key of each row, and the other columns are its properties.
+    Only the rows used to infer types are kept in memory.
+
+    Parameters
+    ----------
+    path : str
+        the path to the file
+    labels : collection, optional
+        keys to keep, rows with other keys are skipped
+    case_sensitive : boolean
+        Defaults to true, otherwise keys are lower cased
+    sample_size : int, optional
+        the number of rows to infer types from, defaults to 10000, or all rows if None
+
+    Returns
+    -------
+    dict
+        types of each property
+    iterator or None
+        key and properties of each row, or None if there are no rows to enrich with
+    """
+    csvfile = open(path, 'r', encoding='utf-8-sig')
+    try:
+        dialect = sniff_dialect(csvfile)
+        reader = csv.reader(csvfile, dialect=dialect)
+        header = next(reader)
+        key_name = header[0]
+        # Like csv.DictReader, the key is in the last column with the key's name
+        key_index = len(header) - 1 - header[::-1].index(key_name)
+        columns = [(i, sanitize_name(x)) for i, x in enumerate(header) if x != key_name]
+
+        def parse_rows():
+            for line in reader:
+                if not line:
+                    continue
+                line += [None] * (len(header) - len(line))
+                p = line[key_index]
+                if not case_sensitive:
+                    p = p.lower()
+                if labels is not None and p not in labels:
+                    continue
+                yield p, {k: parse_string(line[i]) for i, k in columns}
+
+        rows = parse_rows()
+        sample = list(islice(rows, sample_size))
+    except:
+        csvfile.close()
+        raise
+    type_data = infer_types(x[1] for x in sample)
+    if not sample:
+        csvfile.close()
+        return type_data, None
+
+    def stream():
+        with csvfile:
+            for row in sample:
+                yield row
+            for row in rows:
+                yield row
+
+    return type_data, stream()
+
+
 def parse_file(path, labels=None, case_sensitive=True):
     """
     Parses a csv file into data and type_data
@@ -55,33 +201,8 @@ def parse_file(path, labels=None, case_sensitive=True):
         data and type_data for a csv file
 
     """
-    with open(path, 'r', encoding='utf-8-sig') as csvfile:
-        dialect = csv.Sniffer().sniff(csvfile.read())
-        if dialect.delimiter == '-':
-            dialect.delimiter = ','
-        csvfile.seek(0)
-        reader = csv.DictReader(csvfile, dialect=dialect)
-        header = reader.fieldnames
-        key_name = header[0]
-        sanitized_names = [sanitize_name(x) for x in header]
-        data = {}
-        type_data = {}
-        for line in reader:
-            p = line[key_name]
-            if not case_sensitive:
-                p = p.lower()
-            if labels is not None and p not in labels:
-                continue
-            data[p] = {}
-            for i, f in enumerate(header):
-                if f == key_name:
-                    continue
-                k = sanitized_names[i]
-                if k not in type_data:
-                    type_data[k] = defaultdict(int)
-                v = parse_string(line[f])
-                if v is not None:
-                    type_data[k][type(v)] += 1
-                data[p][k] = v
-    type_data = {k: max(v.keys(), key=lambda x: v[x]) for k, v in type_data.items()}
+    type_data, rows = stream_file(path, labels=labels, case_sensitive=case_sensitive, sample_size=None)
+    data = {}
+    if rows is not None:
+        data.update(rows)
     return data, type_data
@@ -1,4 +1,4 @@
-from .helper import parse_file
+from .helper import stream_file
 
 
 def enrich_lexicon_from_csv(corpus_context, path, case_sensitive=False):
@@ -18,6 +18,10 @@ def enrich_lexicon_from_csv(corpus_context, path, case_sensitive=False):
         labels = set(corpus_context.words)
     else:
         labels = set(x.lower() for x in corpus_context.words)
-    data, type_data = parse_file(path, labels=labels, case_sensitive=case_sensitive)
-    if data:
-        corpus_context.enrich_lexicon(data, type_data, case_sensitive=case_sensitive)
+    type_data, rows = stream_file(path, labels=labels, case_sensitive=case_sensitive)
+    if rows is None:
+        return
+    try:
+        corpus_context.enrich_lexicon(rows, type_data, case_sensitive=case_sensitive)
+    finally:
+        rows.close()
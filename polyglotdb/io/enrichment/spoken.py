@@ -1,7 +1,4 @@
-import csv
-from collections import defaultdict
-
-from .helper import parse_file
+from .helper import stream_file
 
 
 def enrich_speakers_from_csv(corpus_context, path):
@@ -15,10 +12,13 @@ def enrich_speakers_from_csv(corpus_context, path):
     path : str
         the path to the csv file
     """
-    data, type_data = parse_file(path, labels=corpus_context.speakers)
-    if not data:
+    type_data, rows = stream_file(path, labels=set(corpus_context.speakers))
+    if rows is None:
         return
-    corpus_context.enrich_speakers(data, type_data)
+    try:
+        corpus_context.enrich_speakers(rows, type_data)
+    finally:
+        rows.close()
 
 
 def enrich_discourses_from_csv(corpus_context, path):
@@ -32,5 +32,11 @@ def enrich_discourses_from_csv(corpus_context, path):
     path : str
         the path to the csv file
     """
-    data, type_data = parse_file(path)
-    corpus_context.enrich_discourses(data, type_data)
+    type_data, rows = stream_file(path)
+    if rows is None:
+        corpus_context.enrich_discourses([], type_data)
+        return
+    try:
+        corpus_context.enrich_discourses(rows, type_data)
+    finally:
+        rows.close()
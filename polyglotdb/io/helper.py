@@ -5,15 +5,19 @@ import logging
 import operator
 import hashlib
 import wave
-from collections import Counter
+from contextlib import contextmanager
+from collections import Counter, OrderedDict
 
-from textgrid import TextGrid
 
 from polyglotdb.exceptions import DelimiterError, TextGridError
+from .textgrid_reader import read_textgrid
 
 ATT_TYPES = ['orthography', 'transcription', 'numeric',
              'morpheme', 'tobi', 'grouping']
 
+# Maximum number of type ids to keep in a TypeIdCache
+TYPE_ID_CACHE_SIZE = 100000
+
 tobi_characters = set('LH%-+!*')
 morph_delimiters = set('-=')
 
@@ -321,7 +325,177 @@ def log_annotation_types(annotation_types):
         logging.info(a.pretty_print())
 
 
-def make_type_id(type_values, corpus):
+def _type_values_string(type_values, corpus):
+    value = ' '.join(map(str, type_values))
+    if corpus is not None:
+        value += ' ' + corpus
+    return value
+
+
+def _hash_string(value):
+    m = hashlib.sha1()
+    m.update(value.encode())
+    return m.hexdigest()
+
+
+def _hash_type_values(type_values, corpus):
+    return _hash_string(_type_values_string(type_values, corpus))
+
+
+class TypeIdCache(object):
+    """
+    Bounded cache of type ids, so that the hash for a type that is repeated
+    across many tokens is only computed once
+
+    The least recently used ids are removed once the cache is full.
+
+    Parameters
+    ----------
+    max_size : int
+        Maximum number of type ids to keep, defaults to 100000
+
+    Attributes
+    ----------
+    hits : int
+        Number of ids that were found in the cache
+    misses : int
+        Number of ids that had to be computed
+    evictions : int
+        Number of ids removed to keep the cache under its maximum size
+    """
+    def __init__(self, max_size=TYPE_ID_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._ids)
+
+    def get(self, type_values, corpus=None):
+        """
+        Get the type id for type values, computing it if it is not cached
+
+        Parameters
+        ----------
+        type_values : iterable
+            Normalized type values
+        corpus : str, optional
+            Name of the corpus
+
+        Returns
+        -------
+        str
+            Hex digest of the values and corpus name
+        """
+        # Keyed by the string that is hashed, since values such as 1, 1.0 and True are
+        # equal as keys but give different type ids
+        key = _type_values_string(type_values, corpus)
+        try:
+            type_id = self._ids[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self._ids.move_to_end(key)
+            return type_id
+        self.misses += 1
+        type_id = _hash_string(key)
+        self._ids[key] = type_id
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+            self.evictions += 1
+        return type_id
+
+    @property
+    def hit_rate(self):
+        """
+        Proportion of lookups that were found in the cache
+        """
+        total = self.hits + self.misses
+        if not total:
+            return 0.0
+        return self.hits / total
+
+    def stats(self):
+        """
+        Get the usage statistics of the cache
+
+        Returns
+        -------
+        dict
+            Number of hits, misses and evictions, the hit rate, and the current
+            and maximum size of the cache
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': self.hit_rate, 'size': len(self), 'max_size': self.max_size}
+
+    def reset_stats(self):
+        """
+        Reset the hit, miss and eviction counts, keeping the cached ids
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+        """
+        Remove all cached ids and reset the statistics
+        """
+        self._ids.clear()
+        self.reset_stats()
+
+
+_type_id_cache = None
+
+
+def set_type_id_cache(cache):
+    """
+    Set the cache used by :func:`make_type_id` when no cache is passed to it
+
+    Parameters
+    ----------
+    cache : :class:`TypeIdCache` or None
+        Cache to use, or None to compute every type id
+
+    Returns
+    -------
+    :class:`TypeIdCache` or None
+        Previously used cache
+    """
+    global _type_id_cache
+    previous = _type_id_cache
+    _type_id_cache = cache
+    return previous
+
+
+@contextmanager
+def cached_type_ids(cache=None):
+    """
+    Context manager for using a type id cache for all type ids computed inside of it,
+    including those of annotations being parsed
+
+    Parameters
+    ----------
+    cache : :class:`TypeIdCache`, optional
+        Cache to use, a new cache is created if not specified
+
+    Yields
+    ------
+    :class:`TypeIdCache`
+        Cache in use
+    """
+    if cache is None:
+        cache = TypeIdCache()
+    previous = set_type_id_cache(cache)
+    try:
+        yield cache
+    finally:
+        set_type_id_cache(previous)
+
+
+def make_type_id(type_values, corpus, cache=None):
     """
     Constructs hash table of values and corpus
 
@@ -330,18 +504,21 @@ def make_type_id(type_values, corpus):
     type_values : list
         list of type values
     corpus : str
-        the corpus 
+        the corpus
+    cache : :class:`TypeIdCache`, optional
+        Cache of type ids to use, defaults to the cache set by :func:`cached_type_ids`,
+        if any
 
     Returns
     -------
     str
         a hex string containing the digest of the values as hexadecimal numbers
     """
-    m = hashlib.sha1()
-    value = ' '.join(map(str, type_values))
-    value += ' ' + corpus
-    m.update(value.encode())
-    return m.hexdigest()
+    if cache is None:
+        cache = _type_id_cache
+    if cache is None:
+        return _hash_type_values(type_values, corpus)
+    return cache.get(type_values, corpus)
 
 
 def guess_textgrid_format(path):
@@ -366,11 +543,7 @@ def guess_textgrid_format(path):
                 if not f.lower().endswith('.textgrid'):
                     continue
                 tg_path = os.path.join(root, f)
-                tg = TextGrid()
-                try:
-                    tg.read(tg_path)
-                except ValueError as e:
-                    raise (TextGridError('The file {} could not be parsed: {}'.format(tg_path, str(e))))
+                tg = read_textgrid(tg_path)
 
                 labbcat_parser = inspect_labbcat(tg_path)
                 mfa_parser = inspect_mfa(tg_path)
@@ -385,8 +558,7 @@ def guess_textgrid_format(path):
                     counts[None] += 1
         return max(counts.keys(), key=lambda x: counts[x])
     elif path.lower().endswith('.textgrid'):
-        tg = TextGrid()
-        tg.read(path)
+        tg = read_textgrid(path)
         labbcat_parser = inspect_labbcat(path)
         mfa_parser = inspect_mfa(path)
         fave_parser = inspect_fave(path)
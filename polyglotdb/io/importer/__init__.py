@@ -1,4 +1,4 @@
-from .to_csv import (data_to_type_csvs, data_to_graph_csvs,
+from .to_csv import (GraphCSVWriter, data_to_type_csvs, data_to_graph_csvs,
                      utterance_data_to_csvs, subannotations_data_to_csv,
                      lexicon_data_to_csvs, syllables_data_to_csvs,
                      nonsyls_data_to_csvs, feature_data_to_csvs,
@@ -11,3 +11,11 @@ from .from_csv import (import_type_csvs, import_csvs, import_lexicon_csvs,
                        import_syllable_csv, import_nonsyl_csv,
                        import_feature_csvs, import_speaker_csvs,
                        import_discourse_csvs, import_syllable_enrichment_csvs, import_utterance_enrichment_csvs)
+
+from .bulk import BulkImportWriter, bulk_import_command
+
+from .loader import load_csv, load_rows, load_row_stream, read_csv_batches, load_csv_with_retry, load_csv_groups
+
+from .deletion import AdaptiveBatchSize, delete_corpus_graph
+
+from .schema import SchemaManager, ensure_schema, hierarchy_schema
@@ -0,0 +1,275 @@
+import os
+import csv
+import json
+
+from ...config import CONFIG
+from .to_csv import GraphCSVWriter
+
+BULK_MANIFEST = 'manifest.json'
+
+
+class BulkImportWriter(object):
+    """
+    Writer for node and relationship files in the format used by Neo4j's offline
+    bulk importer (``neo4j-admin import``)
+
+    All node ids are resolved while writing, so no lookups are needed when the
+    files are imported.  Each node and relationship group has a separate header
+    file, written when the writer is closed, and a data file that rows are appended to.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to import
+    token_headers : dict
+        Token headers for each annotation type, as returned by
+        :attr:`~polyglotdb.io.discoursedata.DiscourseData.token_headers`
+    type_headers : dict
+        Type headers for each annotation type
+    hierarchy : :class:`~polyglotdb.structure.Hierarchy`
+        Hierarchy of the corpus
+    """
+    def __init__(self, corpus_context, token_headers, type_headers, hierarchy):
+        self.corpus_name = corpus_context.corpus_name
+        self.directory = corpus_context.config.temporary_directory('bulk')
+        for f in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, f))
+        self.token_headers = token_headers
+        self.type_headers = type_headers
+        self.hierarchy = hierarchy
+        self.speakers = set()
+        self.discourses = []
+        self.writer = GraphCSVWriter(self.directory)
+        self.headers = {}
+        self.relationships = set()
+        self._add_node_group('corpus', ['name:ID(Corpus)'])
+        self._add_node_group('speaker', ['name:ID(Speaker)'])
+        self._add_node_group('discourse', ['name:ID(Discourse)'])
+        self._add_relationship_group('speaks_in', 'Speaker', 'Discourse', ['channel:int'])
+        self.writer.writerows('corpus.csv', [(self.corpus_name, 'Corpus')])
+
+    def _add_node_group(self, name, header):
+        self.headers[name] = header + [':LABEL']
+
+    def _add_relationship_group(self, name, start, end, properties=None):
+        header = [':START_ID({})'.format(start), ':END_ID({})'.format(end)]
+        if properties is not None:
+            header += properties
+        self.headers[name] = header + [':TYPE']
+        self.relationships.add(name)
+
+    def _token_properties(self, annotation_type):
+        supertype = self.hierarchy[annotation_type]
+        return [x for x in self.token_headers[annotation_type][7:] if x != supertype]
+
+    def add_types(self, types):
+        """
+        Write type nodes
+
+        Parameters
+        ----------
+        types : dict
+            Sets of type tuples for each annotation type, in the order of the type headers
+        """
+        for at, header in self.type_headers.items():
+            type_header = ['id:ID({}_type)'.format(at)] + header[1:]
+            label_index = None
+            if 'label' in header:
+                type_header.append('label_insensitive')
+                label_index = header.index('label')
+            group = '{}_type'.format(at)
+            self._add_node_group(group, type_header)
+            labels = '{}_type;{}'.format(at, self.corpus_name)
+            seen = set()
+            rows = []
+            for t in sorted(types[at], key=lambda x: x[0]):
+                if t[0] in seen:
+                    continue
+                seen.add(t[0])
+                row = list(t)
+                if label_index is not None:
+                    row.append(str(t[label_index]).lower() if t[label_index] is not None else None)
+                row.append(labels)
+                rows.append(row)
+            self.writer.writerows('{}.csv'.format(group), rows)
+
+    def add_discourse(self, data):
+        """
+        Write the nodes and relationships for a discourse
+
+        Parameters
+        ----------
+        data : :class:`~polyglotdb.io.discoursedata.DiscourseData`
+            Data for the discourse
+        """
+        w = self.writer
+        speaker_label = 'Speaker;{}'.format(self.corpus_name)
+        w.writerows('discourse.csv', [(data.name, 'Discourse;{}'.format(self.corpus_name))])
+        self.discourses.append((data.name, data.wav_path))
+        for s in sorted(data.speakers):
+            if s not in self.speakers:
+                self.speakers.add(s)
+                w.writerows('speaker.csv', [(s, speaker_label)])
+            w.writerows('speaks_in.csv', [(s, data.name, data.speaker_channel_mapping.get(s, 0), 'speaks_in')])
+
+        written = set()
+        for at in data.highest_to_lowest():
+            group = at
+            if group not in self.headers:
+                properties = self._token_properties(at)
+                header = ['id:ID({})'.format(at), 'begin:float', 'end:float'] + properties
+                if 'label' in properties:
+                    header.append('label_insensitive')
+                self._add_node_group(group, header)
+                self._add_relationship_group('{}_is_a'.format(at), at, '{}_type'.format(at))
+                self._add_relationship_group('{}_spoken_in'.format(at), at, 'Discourse')
+                self._add_relationship_group('{}_spoken_by'.format(at), at, 'Speaker')
+                self._add_relationship_group('{}_precedes'.format(at), at, at)
+                if self.hierarchy[at] is not None:
+                    self._add_relationship_group('{}_contained_by'.format(at), at, self.hierarchy[at])
+            properties = self.headers[group][3:-1]
+            if 'label' in properties:
+                properties = properties[:-1]
+            annotations = data[at]
+            supertype = annotations.supertype
+            labels = '{};{};speech'.format(at, self.corpus_name)
+            nodes, is_a, spoken_in, spoken_by, precedes, contained_by = [], [], [], [], [], []
+            subannotations = {}
+            for i in range(len(annotations)):
+                begin, end = annotations.row_times(i)
+                if begin is None or end is None:
+                    continue
+                super_id = annotations.row_super_id(i)
+                if supertype is not None and super_id not in written:
+                    continue
+                token_id = annotations.row_id(i)
+                written.add(token_id)
+                s = annotations.row_speaker(i)
+                if s is None:
+                    s = 'unknown'
+                token_additional = annotations.row_token_properties(i)
+                row = [token_id, begin, end] + [token_additional.get(x) for x in properties]
+                if 'label' in properties:
+                    label = annotations.row_label(i)
+                    row.append(label.lower() if label is not None else None)
+                row.append(labels)
+                nodes.append(row)
+                is_a.append((token_id, annotations.row_sha(i, corpus=self.corpus_name), 'is_a'))
+                spoken_in.append((token_id, data.name, 'spoken_in'))
+                spoken_by.append((token_id, s, 'spoken_by'))
+                previous_id = annotations.row_previous_id(i)
+                if previous_id is not None and previous_id in written:
+                    precedes.append((previous_id, token_id, 'precedes'))
+                if supertype is not None:
+                    contained_by.append((token_id, super_id, 'contained_by'))
+                for sub in annotations.row_subannotations(i):
+                    subannotations.setdefault(sub.type, []).append((str(sub.id), sub.begin, sub.end,
+                                                                    sub.label if sub.label is not None else '',
+                                                                    '{};{};speech'.format(sub.type, self.corpus_name),
+                                                                    token_id))
+            w.writerows('{}.csv'.format(group), nodes)
+            w.writerows('{}_is_a.csv'.format(at), is_a)
+            w.writerows('{}_spoken_in.csv'.format(at), spoken_in)
+            w.writerows('{}_spoken_by.csv'.format(at), spoken_by)
+            w.writerows('{}_precedes.csv'.format(at), precedes)
+            if supertype is not None:
+                w.writerows('{}_contained_by.csv'.format(at), contained_by)
+            for sub_type, rows in subannotations.items():
+                sub_group = '{}_{}'.format(at, sub_type)
+                if sub_group not in self.headers:
+                    self._add_node_group(sub_group, ['id:ID({})'.format(sub_group), 'begin:float', 'end:float',
+                                                     'label'])
+                    self._add_relationship_group('{}_annotates'.format(sub_group), sub_group, at)
+                w.writerows('{}.csv'.format(sub_group), [x[:-1] for x in rows])
+                w.writerows('{}_annotates.csv'.format(sub_group), [(x[0], x[-1], 'annotates') for x in rows])
+
+    def close(self):
+        """
+        Close all data files, and write the header files and a manifest of the import
+        """
+        self.writer.close()
+        for name, header in self.headers.items():
+            with open(os.path.join(self.directory, '{}_header.csv'.format(name)), 'w', newline='',
+                      encoding='utf8') as f:
+                csv.writer(f, delimiter=',').writerow(header)
+            data_path = os.path.join(self.directory, '{}.csv'.format(name))
+            if not os.path.exists(data_path):
+                open(data_path, 'w').close()
+        with open(os.path.join(self.directory, BULK_MANIFEST), 'w', encoding='utf8') as f:
+            json.dump({'corpus_name': self.corpus_name,
+                       'discourses': self.discourses,
+                       'nodes': sorted(x for x in self.headers if x not in self.relationships),
+                       'relationships': sorted(self.relationships)}, f)
+
+    def command(self, database='graph.db'):
+        """
+        Construct the command for importing the files with ``neo4j-admin``
+
+        Parameters
+        ----------
+        database : str
+            Name of the Neo4j database to create, defaults to 'graph.db'
+
+        Returns
+        -------
+        list
+            Command line arguments
+        """
+        return bulk_import_command(self.directory, database)
+
+
+def load_bulk_manifest(corpus_context):
+    """
+    Load the manifest written by a :class:`~polyglotdb.io.importer.bulk.BulkImportWriter`
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus that was written
+
+    Returns
+    -------
+    dict or None
+        Manifest of the bulk import, or None if there is no manifest
+    """
+    path = os.path.join(corpus_context.config.temporary_directory('bulk'), BULK_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf8') as f:
+        return json.load(f)
+
+
+def bulk_import_command(directory, database='graph.db'):
+    """
+    Construct the ``neo4j-admin import`` command for the files in a directory
+
+    Parameters
+    ----------
+    directory : str
+        Directory containing the files and manifest written by a
+        :class:`~polyglotdb.io.importer.bulk.BulkImportWriter`
+    database : str
+        Name of the Neo4j database to create, defaults to 'graph.db'
+
+    Returns
+    -------
+    list
+        Command line arguments
+    """
+    with open(os.path.join(directory, BULK_MANIFEST), 'r', encoding='utf8') as f:
+        manifest = json.load(f)
+    try:
+        exe = os.path.join(CONFIG['Data']['directory'], 'neo4j', 'bin', 'neo4j-admin')
+    except KeyError:
+        exe = 'neo4j-admin'
+    command = [exe, 'import', '--database={}'.format(database), '--id-type=STRING']
+
+    def files(name):
+        return ','.join(os.path.join(directory, x) for x in ['{}_header.csv'.format(name), '{}.csv'.format(name)])
+
+    for name in manifest['nodes']:
+        command += ['--nodes', files(name)]
+    for name in manifest['relationships']:
+        command += ['--relationships', files(name)]
+    return command
+
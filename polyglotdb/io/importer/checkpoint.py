@@ -0,0 +1,210 @@
+import os
+import json
+import threading
+
+CHECKPOINT_FILE = 'import_checkpoint.jsonl'
+
+
+def checkpoint_path(corpus_context):
+    """
+    Get the path of the import checkpoint of a corpus, which is kept alongside its
+    temporary CSV files
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus being imported
+
+    Returns
+    -------
+    str
+        Full path to the checkpoint file
+    """
+    return os.path.join(corpus_context.config.temporary_directory('csv'), CHECKPOINT_FILE)
+
+
+class ImportCheckpoint(object):
+    """
+    Manifest of the parts of an import that have been committed to the database,
+    so that an import that fails part way through can be resumed rather than
+    started again
+
+    The manifest is a journal with one JSON record per line, appended and flushed to
+    disk as each part is committed, and a record left partially written by a crash
+    is discarded when the checkpoint is loaded.
+    An import goes through three stages: discourses are parsed and written to CSV
+    files (with the names of discourses recorded before their nodes are created), the
+    CSV files are complete (recorded along with the hierarchy, the token properties written
+    to the files and the last file parsed),
+    and then each CSV file is loaded, recorded once its last row is committed, along
+    with enrichment steps such as encoding the hierarchy.
+
+    Parameters
+    ----------
+    path : str
+        Full path to the checkpoint file
+    source : str
+        Full path of the file or directory being imported
+    """
+    def __init__(self, path, source):
+        self.path = path
+        self.source = source
+        self.resumed = False
+        self.discourses = set()
+        self.committed = set()
+        self.csvs = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """
+        Read a checkpoint from disk, removing a final record that was only partially written
+
+        Parameters
+        ----------
+        path : str
+            Full path to the checkpoint file
+
+        Returns
+        -------
+        :class:`ImportCheckpoint` or None
+            The checkpoint, or None if there is no checkpoint file
+        """
+        if not os.path.exists(path):
+            return None
+        checkpoint = cls(path, None)
+        size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line.decode('utf8'))
+                except ValueError:
+                    break
+                checkpoint._replay(record)
+                size += len(line)
+        if size != os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(size)
+        checkpoint.resumed = True
+        return checkpoint
+
+    def _replay(self, record):
+        if 'source' in record:
+            self.source = record['source']
+        elif 'discourse' in record:
+            self.discourses.add(record['discourse'])
+        elif 'csvs' in record:
+            self.csvs = record['csvs']
+        elif 'committed' in record:
+            self.committed.add(record['committed'])
+
+    def _append(self, record):
+        with self._lock:
+            self._replay(record)
+            with open(self.path, 'a', encoding='utf8') as f:
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def start(self):
+        """
+        Start a new import, discarding any previous checkpoint at the same path
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.discourses = set()
+        self.committed = set()
+        self.csvs = None
+        self.resumed = False
+        self._append({'source': self.source})
+
+    def add_discourse(self, name):
+        """
+        Record that the nodes and CSV rows for a discourse are about to be created
+
+        Parameters
+        ----------
+        name : str
+            Name of the discourse
+        """
+        self._append({'discourse': name})
+
+    def has_discourse(self, name):
+        """
+        Check whether a discourse was added by this import
+
+        Parameters
+        ----------
+        name : str
+            Name of the discourse
+
+        Returns
+        -------
+        bool
+            True if the discourse was added by this import
+        """
+        return name in self.discourses
+
+    def finish_csvs(self, hierarchy, last_path, could_not_parse, token_properties=None):
+        """
+        Record that all CSV files for the import have been written
+
+        Parameters
+        ----------
+        hierarchy : :class:`~polyglotdb.structure.Hierarchy`
+            Hierarchy of the corpus after all discourses were added
+        last_path : str
+            Full path of the last file that was parsed, which is parsed again when resuming
+        could_not_parse : list
+            Files that could not be parsed
+        token_properties : dict, optional
+            Token properties of each annotation type across all discourses written to the CSV files
+        """
+        if token_properties is not None:
+            token_properties = {k: sorted(v) for k, v in token_properties.items()}
+        self._append({'csvs': {'hierarchy': hierarchy.to_json(), 'last_path': last_path,
+                               'could_not_parse': could_not_parse, 'token_properties': token_properties}})
+
+    @property
+    def csvs_written(self):
+        """
+        Whether all CSV files for the import have been written, so that
+        resuming only needs to load them
+        """
+        return self.csvs is not None
+
+    def commit(self, key):
+        """
+        Record that a CSV file has been loaded or an enrichment step has finished
+
+        Parameters
+        ----------
+        key : str
+            Name of the file or step
+        """
+        self._append({'committed': key})
+
+    def is_committed(self, key):
+        """
+        Check whether a CSV file has been loaded or an enrichment step has finished
+
+        Parameters
+        ----------
+        key : str
+            Name of the file or step
+
+        Returns
+        -------
+        bool
+            True if it was committed
+        """
+        return key in self.committed
+
+    def remove(self):
+        """
+        Remove the checkpoint file once the import has finished
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
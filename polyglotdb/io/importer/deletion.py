@@ -0,0 +1,283 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from neo4j.exceptions import TransientError
+
+# Seconds between progress reports and checks for stopping while deleting
+PROGRESS_INTERVAL = 0.5
+
+MIN_DELETE_BATCH_SIZE = 100
+
+MAX_DELETE_BATCH_SIZE = 1000000
+
+
+class AdaptiveBatchSize(object):
+    """
+    Number of nodes to delete per transaction, adjusted after each transaction so
+    that transactions take about the same time regardless of how many relationships
+    the nodes have or how loaded the database is
+
+    The size is shared by all sessions deleting the same kind of node, and can grow
+    by at most a factor of two and shrink by at most a factor of four per transaction.
+
+    Parameters
+    ----------
+    initial : int
+        Initial number of nodes per transaction
+    target_time : float
+        Number of seconds that each transaction should take
+    minimum : int
+        Smallest number of nodes per transaction
+    maximum : int
+        Largest number of nodes per transaction
+    """
+    def __init__(self, initial, target_time, minimum=MIN_DELETE_BATCH_SIZE, maximum=MAX_DELETE_BATCH_SIZE):
+        self.size = min(max(initial, minimum), maximum)
+        self.target_time = target_time
+        self.minimum = minimum
+        self.maximum = maximum
+        self._lock = threading.Lock()
+
+    def update(self, count, elapsed):
+        """
+        Adjust the size from the time taken to delete a number of nodes
+
+        Parameters
+        ----------
+        count : int
+            Number of nodes deleted
+        elapsed : float
+            Number of seconds the transaction took
+        """
+        if count == 0 or elapsed <= 0:
+            return
+        with self._lock:
+            proposed = count * self.target_time / elapsed
+            proposed = min(max(proposed, self.size / 4), self.size * 2)
+            self.size = int(min(max(proposed, self.minimum), self.maximum))
+
+    def shrink(self):
+        """
+        Halve the size after a transaction failed, such as from running out of memory
+        or a deadlock with another session
+        """
+        with self._lock:
+            self.size = max(self.size // 2, self.minimum)
+
+
+class DeletionProgress(object):
+    """
+    Thread-safe count of the nodes deleted so far, and whether to stop deleting
+    """
+    def __init__(self):
+        self.deleted = 0
+        self.stopped = threading.Event()
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.deleted += count
+
+
+def delete_in_batches(corpus_context, statement, batch_size, progress, max_retries=5, **parameters):
+    """
+    Repeatedly run a statement that deletes up to ``$limit`` nodes and returns
+    the number deleted as ``deleted_count``, until no nodes are left
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to delete from
+    statement : str
+        Cypher statement to run
+    batch_size : :class:`AdaptiveBatchSize`
+        Number of nodes to delete per transaction
+    progress : :class:`DeletionProgress`
+        Count of nodes deleted, which is also checked for whether to stop
+    max_retries : int
+        Maximum number of consecutive failed transactions before the error is raised
+    parameters
+        Parameters for the statement
+
+    Returns
+    -------
+    bool
+        True if all nodes were deleted, False if deleting was stopped
+    """
+    log = logging.getLogger('{}_loading'.format(corpus_context.corpus_name))
+
+    def run_batch(tx, limit):
+        return tx.run(statement, limit=limit, **parameters).single()['deleted_count']
+
+    failures = 0
+    with corpus_context.graph_driver.session() as session:
+        while True:
+            if progress.stopped.is_set():
+                return False
+            limit = batch_size.size
+            begin = time.time()
+            try:
+                deleted = session.write_transaction(run_batch, limit)
+            except TransientError as e:
+                failures += 1
+                if failures > max_retries:
+                    raise
+                batch_size.shrink()
+                log.warning('Retrying deletion with {} nodes per transaction after a transient error ({})'.format(
+                    batch_size.size, getattr(e, 'code', e)))
+                time.sleep(random.uniform(0.5, 1.5) * 0.1 * 2 ** failures)
+                continue
+            failures = 0
+            batch_size.update(deleted, time.time() - begin)
+            progress.add(deleted)
+            if deleted < limit:
+                return True
+
+
+def run_deletion_tasks(tasks, num_sessions, progress, call_back=None, stop_check=None):
+    """
+    Run deletion tasks over up to ``num_sessions`` sessions at once, reporting progress
+    and checking whether to stop from the calling thread
+
+    Parameters
+    ----------
+    tasks : list
+        Functions that take no arguments and return whether they finished
+    num_sessions : int
+        Number of tasks to run at once
+    progress : :class:`DeletionProgress`
+        Count of nodes deleted
+    call_back : callable, optional
+        Function to report progress
+    stop_check : callable, optional
+        Function to check whether to stop deleting
+
+    Returns
+    -------
+    bool
+        True if all tasks finished, False if deleting was stopped
+    """
+    completed = True
+    with ThreadPoolExecutor(max(num_sessions, 1)) as executor:
+        pending = {executor.submit(t) for t in tasks}
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                for f in done:
+                    if not f.result():
+                        completed = False
+                if call_back is not None:
+                    call_back(progress.deleted)
+                if stop_check is not None and stop_check():
+                    progress.stopped.set()
+        except:
+            progress.stopped.set()
+            for f in pending:
+                f.cancel()
+            raise
+    return completed and not progress.stopped.is_set()
+
+
+def delete_corpus_graph(corpus_context, call_back=None, stop_check=None):
+    """
+    Delete all nodes and relationships of a corpus from the graph database in
+    batches, with the size of batches adapted to how long transactions take
+
+    Nodes are deleted in three stages:
+
+    1. Each speaker's subannotations and then annotations from the lowest annotation
+       type to the highest, with speakers deleted in parallel over up to
+       ``import_num_sessions`` sessions.  The relationships of each batch of annotations
+       are deleted before the annotations themselves.
+    2. Type nodes for each annotation type, in parallel.  Their relationships to
+       annotations are gone by now, so this stage is cheap despite how densely
+       connected type nodes are.
+    3. Everything else with the corpus' label, such as speakers and discourses
+       (also left without relationships by the first stage) and any annotations
+       that were never linked to a speaker.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to delete
+    call_back : callable, optional
+        Function to report progress, as the number of nodes deleted out of the number of nodes in the corpus
+    stop_check : callable, optional
+        Function to check whether to stop deleting
+
+    Returns
+    -------
+    bool
+        True if all nodes were deleted, False if deleting was stopped
+    """
+    config = corpus_context.config
+    corpus = corpus_context.cypher_safe_name
+    num_sessions = config.import_num_sessions
+    progress = DeletionProgress()
+    if call_back is not None:
+        number = corpus_context.execute_cypher(
+            '''MATCH (n:{}) return count(*) as number '''.format(corpus)).single()['number']
+        call_back(0, number)
+
+    subannotation_statement = '''MATCH (s:{corpus}:Speaker)<-[:spoken_by]-(n:{corpus}:{anno})<-[:annotates]-(sub:{corpus}:{subanno})
+    WHERE s.name = $speaker
+    WITH sub LIMIT $limit
+    DETACH DELETE sub
+    RETURN count(sub) as deleted_count'''
+
+    annotation_statement = '''MATCH (s:{corpus}:Speaker)<-[:spoken_by]-(n:{corpus}:{anno})
+    WHERE s.name = $speaker
+    WITH n LIMIT $limit
+    MATCH (n)-[r]-()
+    DELETE r
+    WITH DISTINCT n
+    DELETE n
+    RETURN count(n) as deleted_count'''
+
+    type_statement = '''MATCH (n:{corpus}:{anno}_type)
+    WITH n LIMIT $limit
+    DETACH DELETE n
+    RETURN count(n) as deleted_count'''
+
+    remaining_statement = '''MATCH (n:{corpus})
+    WITH n LIMIT $limit
+    DETACH DELETE n
+    RETURN count(n) as deleted_count'''
+
+    hierarchy = corpus_context.hierarchy
+    token_batch_size = AdaptiveBatchSize(config.delete_batch_size, config.delete_transaction_time)
+
+    def delete_speaker(speaker):
+        for a in hierarchy.lowest_to_highest:
+            for s in sorted(hierarchy.subannotations.get(a, [])):
+                if not delete_in_batches(corpus_context,
+                                         subannotation_statement.format(corpus=corpus, anno=a, subanno=s),
+                                         token_batch_size, progress, speaker=speaker):
+                    return False
+            if not delete_in_batches(corpus_context, annotation_statement.format(corpus=corpus, anno=a),
+                                     token_batch_size, progress, speaker=speaker):
+                return False
+        return True
+
+    type_batch_size = AdaptiveBatchSize(config.delete_batch_size, config.delete_transaction_time)
+
+    def delete_types(annotation_type):
+        return delete_in_batches(corpus_context, type_statement.format(corpus=corpus, anno=annotation_type),
+                                 type_batch_size, progress)
+
+    remaining_batch_size = AdaptiveBatchSize(config.delete_batch_size, config.delete_transaction_time)
+
+    def delete_remaining():
+        return delete_in_batches(corpus_context, remaining_statement.format(corpus=corpus),
+                                 remaining_batch_size, progress)
+
+    stages = [[lambda s=s: delete_speaker(s) for s in corpus_context.speakers],
+              [lambda a=a: delete_types(a) for a in hierarchy.annotation_types],
+              [delete_remaining]]
+    for tasks in stages:
+        if not run_deletion_tasks(tasks, num_sessions, progress, call_back, stop_check):
+            return False
+    return True
@@ -2,9 +2,28 @@ import os
 import logging
 import time
 
+from .loader import make_path_safe, load_csv, load_csv_groups, load_row_stream
+from .schema import ensure_schema
 
-def make_path_safe(path):
-    return path.replace('\\', '/').replace(' ', '%20')
+
+# Token nodes are created without any lookups of other tokens, so they can be committed in larger batches
+TOKEN_COMMIT_SIZE = 10000
+
+PRECEDES_COMMIT_SIZE = 10000
+
+SYLLABLE_CONSTRAINTS = [('syllable', 'id'), ('syllable_type', 'id')]
+
+SYLLABLE_INDEXES = [('syllable', 'begin'), ('syllable', 'prev_id'), ('syllable', 'end'), ('syllable', 'label'),
+                    ('syllable_type', 'label')]
+
+
+def _keyed_rows(key_name, rows, lower=False):
+    for k, v in rows:
+        if lower:
+            k = k.lower()
+        row = dict(v)
+        row[key_name] = k
+        yield row
 
 
 # Use planner=rule to avoid non-use of unique constraints
@@ -25,35 +44,31 @@ def import_type_csvs(corpus_context, type_headers):
     for at, h in type_headers.items():
         path = os.path.join(corpus_context.config.temporary_directory('csv'),
                             '{}_type.csv'.format(at))
-        type_path = 'file:///{}'.format(make_path_safe(path))
 
-        corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:%s_type) ASSERT node.id IS UNIQUE' % at)
+        type_label = '{}_type'.format(at)
+        indexes = [(type_label, x) for x in h if x != 'id']
 
         properties = []
         for x in h:
             properties.append(prop_temp.format(name=x))
         if 'label' in h:
             properties.append('label_insensitive: lower(csvLine.label)')
-            corpus_context.execute_cypher('CREATE INDEX ON :%s_type(label_insensitive)' % at)
-        for x in h:
-            if x != 'id':
-                corpus_context.execute_cypher('CREATE INDEX ON :%s_type(%s)' % (at, x))
+            indexes.append((type_label, 'label_insensitive'))
+        ensure_schema(corpus_context, constraints=[(type_label, 'id')], indexes=indexes)
         if properties:
             type_prop_string = ', '.join(properties)
         else:
             type_prop_string = ''
-        type_import_statement = '''CYPHER planner=rule USING PERIODIC COMMIT 2000
-LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-MERGE (n:{annotation_type}_type:{corpus_name} {{ {type_property_string} }})
+        type_import_statement = '''MERGE (n:{annotation_type}_type:{corpus_name} {{ {type_property_string} }})
         '''
-        kwargs = {'path': type_path, 'annotation_type': at,
+        kwargs = {'annotation_type': at,
                   'type_property_string': type_prop_string,
                   'corpus_name': corpus_context.cypher_safe_name}
         statement = type_import_statement.format(**kwargs)
         log.info('Loading {} types...'.format(at))
         begin = time.time()
         try:
-            corpus_context.execute_cypher(statement)
+            load_csv(corpus_context, path, statement, commit_size=2000)
         except:
             raise
             # finally:
@@ -65,7 +80,8 @@ MERGE (n:{annotation_type}_type:{corpus_name} {{ {type_property_string} }})
         log.debug('{} type loading took: {} seconds.'.format(at, time.time() - begin))
 
 
-def import_csvs(corpus_context, data, call_back=None, stop_check=None):
+def import_csvs(corpus_context, data, call_back=None, stop_check=None, speakers=None, checkpoint=None,
+                token_properties=None):
     """
     Loads data from a csv file
 
@@ -75,6 +91,14 @@ def import_csvs(corpus_context, data, call_back=None, stop_check=None):
         the corpus to load into
     data : :class:`~polyglotdb.io.helper.DiscourseData`
         the data object
+    speakers : iterable, optional
+        Speakers whose CSV files should be loaded, defaults to all speakers in the corpus
+    checkpoint : :class:`~polyglotdb.io.importer.checkpoint.ImportCheckpoint`, optional
+        Checkpoint of the import, files that it records as loaded are skipped, and files
+        that an interrupted import may have partially loaded skip rows that already exist
+    token_properties : dict, optional
+        Token properties for each annotation type across all discourses written to the CSV
+        files, defaults to the token properties of ``data``
     """
     log = logging.getLogger('{}_loading'.format(corpus_context.corpus_name))
     log.info('Beginning to import {} into the graph database...'.format(data.name))
@@ -84,133 +108,148 @@ def import_csvs(corpus_context, data, call_back=None, stop_check=None):
     prop_temp = '''{name}: csvLine.{name}'''
 
     directory = corpus_context.config.temporary_directory('csv')
-    speakers = corpus_context.speakers
+    if speakers is None:
+        speakers = corpus_context.speakers
+    speakers = list(speakers)
     annotation_types = data.highest_to_lowest()
     if call_back is not None:
         call_back('Importing data...')
-        call_back(0, len(speakers) * len(annotation_types))
-        cur = 0
     statements = []
-
-    def unique_function(tx, at):
-        tx.run('CREATE CONSTRAINT ON (node:%s) ASSERT node.id IS UNIQUE' % at)
-
-    def prop_index(tx, at, prop):
-        tx.run('CREATE INDEX ON :%s(%s)' % (at, prop))
-
-    def label_index(tx, at):
-        tx.run('CREATE INDEX ON :%s(label_insensitive)' % at)
-
-    def begin_index(tx, at):
-        tx.run('CREATE INDEX ON :%s(begin)' % (at,))
-
-    def end_index(tx, at):
-        tx.run('CREATE INDEX ON :%s(end)' % (at,))
-
-    with corpus_context.graph_driver.session() as session:
-        for i, s in enumerate(speakers):
-            speaker_statements = []
-            for at in annotation_types:
-                if stop_check is not None and stop_check():
-                    return
-                if call_back is not None:
-                    call_back(cur)
-                    cur += 1
-                path = os.path.join(directory, '{}_{}.csv'.format(s, at))
-                rel_path = 'file:///{}'.format(make_path_safe(path))
-
-                session.write_transaction(unique_function, at)
-
-                properties = []
-
-                for x in data[at].token_property_keys:
-                    properties.append(prop_temp.format(name=x))
-                    session.write_transaction(prop_index, at, x)
-                if 'label' in data[at].token_property_keys:
-                    properties.append('label_insensitive: lower(csvLine.label)')
-                    session.write_transaction(label_index, at)
-                st = data[at].supertype
-                if properties:
-                    token_prop_string = ', ' + ', '.join(properties)
-                else:
-                    token_prop_string = ''
-                if st is not None:
-                    rel_import_statement = '''CYPHER planner=rule USING PERIODIC COMMIT 4000
-            LOAD CSV WITH HEADERS FROM '{path}' AS csvLine
-            MATCH (n:{annotation_type}_type:{corpus_name} {{id: csvLine.type_id}}), (super:{stype}:{corpus_name} {{id: csvLine.{stype}}}),
-            (d:Discourse:{corpus_name} {{name: csvLine.discourse}}),
-            (s:Speaker:{corpus_name} {{name: csvLine.speaker}})
-            CREATE (t:{annotation_type}:{corpus_name}:speech {{id: csvLine.id, begin: toFloat(csvLine.begin),
-                                        end: toFloat(csvLine.end){token_property_string} }}),
-                                        (t)-[:is_a]->(n),
-                                        (t)-[:contained_by]->(super),
-                                        (t)-[:spoken_in]->(d),
-                                        (t)-[:spoken_by]->(s)
-            WITH t, csvLine
-            MATCH (p:{annotation_type}:{corpus_name}:speech {{id: csvLine.previous_id}})
+    precedes_statements = []
+    precedes_import_statement = '''MATCH (p:{annotation_type}:{corpus_name}:speech {{id: csvLine.previous_id}}),
+            (t:{annotation_type}:{corpus_name}:speech {{id: csvLine.id}})
+            {guard}
             CREATE (p)-[:precedes]->(t)
             '''
-                    kwargs = {'path': rel_path, 'annotation_type': at,
-                              'token_property_string': token_prop_string,
-                              'corpus_name': corpus_context.cypher_safe_name,
-                              'stype': st}
-                else:
-
-                    rel_import_statement = '''CYPHER planner=rule USING PERIODIC COMMIT 4000
-            LOAD CSV WITH HEADERS FROM '{path}' AS csvLine
-            MATCH (n:{annotation_type}_type:{corpus_name} {{id: csvLine.type_id}}),
-            (d:Discourse:{corpus_name} {{name: csvLine.discourse}}),
-            (s:Speaker:{corpus_name} {{ name: csvLine.speaker}})
-            CREATE (t:{annotation_type}:{corpus_name}:speech {{id: csvLine.id, begin: toFloat(csvLine.begin),
-                                        end: toFloat(csvLine.end){token_property_string} }}),
-                                        (t)-[:is_a]->(n),
-                                        (t)-[:spoken_in]->(d),
-                                        (t)-[:spoken_by]->(s)
-            WITH t, csvLine
-            MATCH (p:{annotation_type}:{corpus_name}:speech {{id: csvLine.previous_id}})
-            CREATE (p)-[:precedes]->(t)
-            '''
-                    kwargs = {'path': rel_path, 'annotation_type': at,
-                              'token_property_string': token_prop_string,
-                              'corpus_name': corpus_context.cypher_safe_name}
-                statement = rel_import_statement.format(**kwargs)
-                speaker_statements.append(statement)
-                begin = time.time()
-                session.write_transaction(begin_index, at)
-                session.write_transaction(end_index, at)
-            statements.append(speaker_statements)
+    # Used when retrying a file after a deadlock, since some rows may already have been committed
+    token_guard = '''OPTIONAL MATCH (existing:{annotation_type}:{corpus_name}:speech {{id: csvLine.id}})
+        WITH csvLine, existing WHERE existing IS NULL
+        '''
+    if token_properties is None:
+        token_properties = {}
+    token_properties = {at: sorted(token_properties.get(at, data[at].token_property_keys))
+                        for at in annotation_types}
+    constraints = set()
+    indexes = set()
+    for at in annotation_types:
+        constraints.add((at, 'id'))
+        indexes.update([(at, 'begin'), (at, 'end')])
+        indexes.update((at, x) for x in token_properties[at])
+        if 'label' in token_properties[at]:
+            indexes.add((at, 'label_insensitive'))
+    for k, v in data.hierarchy.subannotations.items():
+        constraints.update((s, 'id') for s in v)
+    ensure_schema(corpus_context, constraints=constraints, indexes=indexes)
 
-    for i, speaker_statements in enumerate(statements):
-        if call_back is not None:
-            call_back('Importing data for speaker {} of {} ({})...'.format(i, len(speakers), speakers[i]))
-        for s in speaker_statements:
-            log.info('Loading {} relationships...'.format(at))
-            corpus_context.execute_cypher(s)
-            log.info('Finished loading {} relationships!'.format(at))
-            log.debug('{} relationships loading took: {} seconds.'.format(at, time.time() - begin))
+    for i, s in enumerate(speakers):
+        speaker_statements = []
+        speaker_precedes = []
+        for at in annotation_types:
+            path = os.path.join(directory, '{}_{}.csv'.format(s, at))
+
+            properties = []
+
+            for x in token_properties[at]:
+                properties.append(prop_temp.format(name=x))
+            if 'label' in token_properties[at]:
+                properties.append('label_insensitive: lower(csvLine.label)')
+            st = data[at].supertype
+            if properties:
+                token_prop_string = ', ' + ', '.join(properties)
+            else:
+                token_prop_string = ''
+            if st is not None:
+                rel_import_statement = '''MATCH (n:{annotation_type}_type:{corpus_name} {{id: csvLine.type_id}}), (super:{stype}:{corpus_name} {{id: csvLine.{stype}}}),
+        (d:Discourse:{corpus_name} {{name: csvLine.discourse}}),
+        (s:Speaker:{corpus_name} {{name: csvLine.speaker}})
+        CREATE (t:{annotation_type}:{corpus_name}:speech {{id: csvLine.id, begin: toFloat(csvLine.begin),
+                                    end: toFloat(csvLine.end){token_property_string} }}),
+                                    (t)-[:is_a]->(n),
+                                    (t)-[:contained_by]->(super),
+                                    (t)-[:spoken_in]->(d),
+                                    (t)-[:spoken_by]->(s)
+        '''
+                kwargs = {'annotation_type': at,
+                          'token_property_string': token_prop_string,
+                          'corpus_name': corpus_context.cypher_safe_name,
+                          'stype': st}
+            else:
+
+                rel_import_statement = '''MATCH (n:{annotation_type}_type:{corpus_name} {{id: csvLine.type_id}}),
+        (d:Discourse:{corpus_name} {{name: csvLine.discourse}}),
+        (s:Speaker:{corpus_name} {{ name: csvLine.speaker}})
+        CREATE (t:{annotation_type}:{corpus_name}:speech {{id: csvLine.id, begin: toFloat(csvLine.begin),
+                                    end: toFloat(csvLine.end){token_property_string} }}),
+                                    (t)-[:is_a]->(n),
+                                    (t)-[:spoken_in]->(d),
+                                    (t)-[:spoken_by]->(s)
+        '''
+                kwargs = {'annotation_type': at,
+                          'token_property_string': token_prop_string,
+                          'corpus_name': corpus_context.cypher_safe_name}
+            statement = rel_import_statement.format(**kwargs)
+            retry_statement = token_guard.format(annotation_type=at,
+                                                 corpus_name=corpus_context.cypher_safe_name) + statement
+            speaker_statements.append((path, statement, retry_statement))
+            precedes_path = os.path.join(directory, '{}_{}_precedes.csv'.format(s, at))
+            speaker_precedes.append((precedes_path,
+                                     precedes_import_statement.format(annotation_type=at,
+                                                                      corpus_name=corpus_context.cypher_safe_name,
+                                                                      guard=''),
+                                     precedes_import_statement.format(annotation_type=at,
+                                                                      corpus_name=corpus_context.cypher_safe_name,
+                                                                      guard='WHERE NOT (p)-[:precedes]->(t)')))
+        statements.append(speaker_statements)
+        precedes_statements.append(speaker_precedes)
+
+    # Speakers only share type nodes, which already exist, so their files can be loaded concurrently,
+    # with each speaker's files loaded from the highest annotation type to the lowest
+    num_sessions = getattr(corpus_context.config, 'import_num_sessions', 1)
+    log.info('Loading tokens for {} speakers...'.format(len(speakers)))
+    begin = time.time()
+    if not load_csv_groups(corpus_context, statements, num_sessions=num_sessions, call_back=call_back,
+                           stop_check=stop_check, checkpoint=checkpoint, commit_size=TOKEN_COMMIT_SIZE):
+        return
+    log.info('Finished loading tokens!')
+    log.debug('Token loading took: {} seconds.'.format(time.time() - begin))
+
+    if call_back is not None:
+        call_back('Linking annotations...')
+    log.info('Loading precedence relationships...')
+    begin = time.time()
+    if not load_csv_groups(corpus_context, precedes_statements, num_sessions=num_sessions, call_back=call_back,
+                           stop_check=stop_check, checkpoint=checkpoint, commit_size=PRECEDES_COMMIT_SIZE):
+        return
+    log.info('Finished loading precedence relationships!')
+    log.debug('Precedence relationships loading took: {} seconds.'.format(time.time() - begin))
 
     log.info('Finished importing {} into the graph database!'.format(data.name))
     log.debug('Graph importing took: {} seconds'.format(time.time() - initial_begin))
 
-    for sp in corpus_context.speakers:
+    for sp in speakers:
         for k, v in data.hierarchy.subannotations.items():
             for s in v:
                 path = os.path.join(directory, '{}_{}_{}.csv'.format(sp, k, s))
-                corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:%s) ASSERT node.id IS UNIQUE' % s)
-                sub_path = 'file:///{}'.format(make_path_safe(path))
+                key = os.path.basename(path)
+                if checkpoint is not None and checkpoint.is_committed(key):
+                    continue
 
-                rel_import_statement = '''CYPHER planner=rule USING PERIODIC COMMIT 1000
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:{annotation_type} {{id: csvLine.annotation_id}})
+                rel_import_statement = '''{guard}MATCH (n:{annotation_type} {{id: csvLine.annotation_id}})
     CREATE (t:{subannotation_type}:{corpus_name}:speech {{id: csvLine.id, begin: toFloat(csvLine.begin),
                                 end: toFloat(csvLine.end), label: CASE csvLine.label WHEN NULL THEN '' ELSE csvLine.label END  }})
     CREATE (t)-[:annotates]->(n)'''
-                kwargs = {'path': sub_path, 'annotation_type': k,
+                kwargs = {'annotation_type': k,
                           'subannotation_type': s,
-                          'corpus_name': corpus_context.cypher_safe_name}
+                          'corpus_name': corpus_context.cypher_safe_name,
+                          'guard': ''}
+                if checkpoint is not None and checkpoint.resumed:
+                    kwargs['guard'] = token_guard.format(annotation_type=s,
+                                                         corpus_name=corpus_context.cypher_safe_name)
                 statement = rel_import_statement.format(**kwargs)
                 try:
-                    corpus_context.execute_cypher(statement)
+                    load_csv(corpus_context, path, statement, commit_size=1000)
+                    if checkpoint is not None:
+                        checkpoint.commit(key)
                 except:
                     raise
                     # finally:
@@ -219,7 +258,7 @@ def import_csvs(corpus_context, data, call_back=None, stop_check=None):
                     # os.remove(path) # FIXME Neo4j 2.3 does not release files
 
 
-def import_lexicon_csvs(corpus_context, typed_data, case_sensitive=False):
+def import_lexicon_csvs(corpus_context, typed_data, case_sensitive=False, rows=None):
     """
     Import a lexicon from csv file
 
@@ -231,7 +270,9 @@ def import_lexicon_csvs(corpus_context, typed_data, case_sensitive=False):
         the data
     case_sensitive : boolean
         defaults to false
-
+    rows : iterable, optional
+        Label and properties of each row to stream to the database, instead of
+        loading the file written by :func:`~polyglotdb.io.importer.to_csv.lexicon_data_to_csvs`
     """
     string_set_template = 'n.{name} = csvLine.{name}'
     float_set_template = 'n.{name} = toFloat(csvLine.{name})'
@@ -251,30 +292,28 @@ def import_lexicon_csvs(corpus_context, typed_data, case_sensitive=False):
     properties = ',\n'.join(properties)
     directory = corpus_context.config.temporary_directory('csv')
     path = os.path.join(directory, 'lexicon_import.csv')
-    lex_path = 'file:///{}'.format(make_path_safe(path))
     if case_sensitive:
-        import_statement = '''CYPHER planner=rule USING PERIODIC COMMIT 3000
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    with csvLine
+        import_statement = '''with csvLine
     MATCH (n:{word_type}_type:{corpus_name}) where n.label = csvLine.label
     SET {new_properties}'''
     else:
-        import_statement = '''CYPHER planner=rule USING PERIODIC COMMIT 3000
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:{word_type}_type:{corpus_name}) where n.label_insensitive = csvLine.label
+        import_statement = '''MATCH (n:{word_type}_type:{corpus_name}) where n.label_insensitive = csvLine.label
     SET {new_properties}'''
 
-    statement = import_statement.format(path=lex_path,
-                                        corpus_name=corpus_context.cypher_safe_name,
+    statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                         word_type=corpus_context.word_name,
                                         new_properties=properties)
-    corpus_context.execute_cypher(statement)
-    for h, v in typed_data.items():
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % (corpus_context.word_name, h))
+    if rows is None:
+        load_csv(corpus_context, path, statement, commit_size=3000)
+    else:
+        header = ['label'] + sorted(typed_data.keys())
+        load_row_stream(corpus_context, path, header, _keyed_rows('label', rows, lower=not case_sensitive),
+                        statement, commit_size=3000)
+    ensure_schema(corpus_context, indexes=[(corpus_context.word_name, h) for h in typed_data.keys()])
         # os.remove(path) # FIXME Neo4j 2.3 does not release files
 
 
-def import_feature_csvs(corpus_context, typed_data):
+def import_feature_csvs(corpus_context, typed_data, rows=None):
     """
     Import features from csv file
 
@@ -284,6 +323,9 @@ def import_feature_csvs(corpus_context, typed_data):
         the corpus to load into
     typed_data : dict
         the data
+    rows : iterable, optional
+        Label and properties of each row to stream to the database, instead of
+        loading the file written by :func:`~polyglotdb.io.importer.to_csv.feature_data_to_csvs`
     """
     string_set_template = 'n.{name} = csvLine.{name}'
     float_set_template = 'n.{name} = toFloat(csvLine.{name})'
@@ -303,19 +345,18 @@ def import_feature_csvs(corpus_context, typed_data):
     properties = ',\n'.join(properties)
     directory = corpus_context.config.temporary_directory('csv')
     path = os.path.join(directory, 'feature_import.csv')
-    feat_path = 'file:///{}'.format(make_path_safe(path))
-    import_statement = '''CYPHER planner=rule
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:{phone_type}_type:{corpus_name}) where n.label = csvLine.label
+    import_statement = '''MATCH (n:{phone_type}_type:{corpus_name}) where n.label = csvLine.label
     SET {new_properties}'''
 
-    statement = import_statement.format(path=feat_path,
-                                        corpus_name=corpus_context.cypher_safe_name,
+    statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                         phone_type=corpus_context.phone_name,
                                         new_properties=properties)
-    corpus_context.execute_cypher(statement)
-    for h, v in typed_data.items():
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % (corpus_context.phone_name, h))
+    if rows is None:
+        load_csv(corpus_context, path, statement)
+    else:
+        header = ['label'] + sorted(typed_data.keys())
+        load_row_stream(corpus_context, path, header, _keyed_rows('label', rows), statement)
+    ensure_schema(corpus_context, indexes=[(corpus_context.phone_name, h) for h in typed_data.keys()])
         # os.remove(path) # FIXME Neo4j 2.3 does not release files
 
 
@@ -348,19 +389,14 @@ def import_syllable_enrichment_csvs(corpus_context, typed_data):
     properties = ',\n'.join(properties)
     directory = corpus_context.config.temporary_directory('csv')
     path = os.path.join(directory, 'syllable_import.csv')
-    syl_path = 'file:///{}'.format(make_path_safe(path))
-    import_statement = '''CYPHER planner=rule
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:syllable_type:{corpus_name}) where n.label = csvLine.label
+    import_statement = '''MATCH (n:syllable_type:{corpus_name}) where n.label = csvLine.label
     SET {new_properties}'''
 
-    statement = import_statement.format(path=syl_path,
-                                        corpus_name=corpus_context.cypher_safe_name,
+    statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                         phone_type="syllable",
                                         new_properties=properties)
-    corpus_context.execute_cypher(statement)
-    for h, v in typed_data.items():
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % ("syllable", h))
+    load_csv(corpus_context, path, statement)
+    ensure_schema(corpus_context, indexes=[('syllable', h) for h in typed_data.keys()])
 
 
 def import_utterance_enrichment_csvs(corpus_context, typed_data):
@@ -392,22 +428,17 @@ def import_utterance_enrichment_csvs(corpus_context, typed_data):
     properties = ',\n'.join(properties)
     directory = corpus_context.config.temporary_directory('csv')
     path = os.path.join(directory, 'utterance_enrichment.csv')
-    utt_path = 'file:///{}'.format(make_path_safe(path))
-    import_statement = '''CYPHER planner=rule
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:utterance:{corpus_name}) where n.id = csvLine.id
+    import_statement = '''MATCH (n:utterance:{corpus_name}) where n.id = csvLine.id
     SET {new_properties}'''
 
-    statement = import_statement.format(path=utt_path,
-                                        corpus_name=corpus_context.cypher_safe_name,
+    statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                         phone_type="syllable",
                                         new_properties=properties)
-    corpus_context.execute_cypher(statement)
-    for h, v in typed_data.items():
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % ("utterance", h))
+    load_csv(corpus_context, path, statement)
+    ensure_schema(corpus_context, indexes=[('utterance', h) for h in typed_data.keys()])
 
 
-def import_speaker_csvs(corpus_context, typed_data):
+def import_speaker_csvs(corpus_context, typed_data, rows=None):
     """
     Import a speaker from csv file
 
@@ -417,6 +448,9 @@ def import_speaker_csvs(corpus_context, typed_data):
         the corpus to load into
     typed_data : dict
         the data
+    rows : iterable, optional
+        Name and properties of each row to stream to the database, instead of
+        loading the file written by :func:`~polyglotdb.io.importer.to_csv.speaker_data_to_csvs`
     """
     string_set_template = 'n.{name} = csvLine.{name}'
     float_set_template = 'n.{name} = toFloat(csvLine.{name})'
@@ -436,22 +470,21 @@ def import_speaker_csvs(corpus_context, typed_data):
     properties = ',\n'.join(properties)
     directory = corpus_context.config.temporary_directory('csv')
     path = os.path.join(directory, 'speaker_import.csv')
-    feat_path = 'file:///{}'.format(make_path_safe(path))
-    import_statement = '''CYPHER planner=rule
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:Speaker:{corpus_name}) where n.name = csvLine.name
+    import_statement = '''MATCH (n:Speaker:{corpus_name}) where n.name = csvLine.name
     SET {new_properties}'''
 
-    statement = import_statement.format(path=feat_path,
-                                        corpus_name=corpus_context.cypher_safe_name,
+    statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                         new_properties=properties)
-    corpus_context.execute_cypher(statement)
-    for h, v in typed_data.items():
-        corpus_context.execute_cypher('CREATE INDEX ON :Speaker(%s)' % h)
+    if rows is None:
+        load_csv(corpus_context, path, statement)
+    else:
+        header = ['name'] + sorted(typed_data.keys())
+        load_row_stream(corpus_context, path, header, _keyed_rows('name', rows), statement)
+    ensure_schema(corpus_context, indexes=[('Speaker', h) for h in typed_data.keys()])
         # os.remove(path) # FIXME Neo4j 2.3 does not release files
 
 
-def import_discourse_csvs(corpus_context, typed_data):
+def import_discourse_csvs(corpus_context, typed_data, rows=None):
     """
     Import a discourse from csv file
 
@@ -461,6 +494,9 @@ def import_discourse_csvs(corpus_context, typed_data):
         the corpus to load into
     typed_data : dict
         the data
+    rows : iterable, optional
+        Name and properties of each row to stream to the database, instead of
+        loading the file written by :func:`~polyglotdb.io.importer.to_csv.discourse_data_to_csvs`
     """
     string_set_template = 'n.{name} = csvLine.{name}'
     float_set_template = 'n.{name} = toFloat(csvLine.{name})'
@@ -480,18 +516,17 @@ def import_discourse_csvs(corpus_context, typed_data):
     properties = ',\n'.join(properties)
     directory = corpus_context.config.temporary_directory('csv')
     path = os.path.join(directory, 'discourse_import.csv')
-    feat_path = 'file:///{}'.format(make_path_safe(path))
-    import_statement = '''CYPHER planner=rule
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-    MATCH (n:Discourse:{corpus_name}) where n.name = csvLine.name
+    import_statement = '''MATCH (n:Discourse:{corpus_name}) where n.name = csvLine.name
     SET {new_properties}'''
 
-    statement = import_statement.format(path=feat_path,
-                                        corpus_name=corpus_context.cypher_safe_name,
+    statement = import_statement.format(corpus_name=corpus_context.cypher_safe_name,
                                         new_properties=properties)
-    corpus_context.execute_cypher(statement)
-    for h, v in typed_data.items():
-        corpus_context.execute_cypher('CREATE INDEX ON :Discourse(%s)' % h)
+    if rows is None:
+        load_csv(corpus_context, path, statement)
+    else:
+        header = ['name'] + sorted(typed_data.keys())
+        load_row_stream(corpus_context, path, header, _keyed_rows('name', rows), statement)
+    ensure_schema(corpus_context, indexes=[('Discourse', h) for h in typed_data.keys()])
         # os.remove(path) # FIXME Neo4j 2.3 does not release files
 
 
@@ -510,7 +545,7 @@ def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
     if call_back is not None:
         call_back('Importing data...')
         call_back(0, len(speakers))
-    corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:utterance) ASSERT node.id IS UNIQUE')
+    ensure_schema(corpus_context, constraints=[('utterance', 'id')])
     for i, s in enumerate(speakers):
         if stop_check is not None and stop_check():
             return
@@ -519,11 +554,8 @@ def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
             call_back(i)
 
         path = os.path.join(corpus_context.config.temporary_directory('csv'), '{}_utterance.csv'.format(s))
-        csv_path = 'file:///{}'.format(make_path_safe(path))
 
-        statement = '''USING PERIODIC COMMIT 1000
-                LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-                MATCH (d:Discourse:{corpus})<-[:spoken_in]-(begin:{word_type}:{corpus}:speech {{id: csvLine.begin_word_id}})-[:spoken_by]->(s:Speaker:{corpus}),
+        statement = '''MATCH (d:Discourse:{corpus})<-[:spoken_in]-(begin:{word_type}:{corpus}:speech {{id: csvLine.begin_word_id}})-[:spoken_by]->(s:Speaker:{corpus}),
                 (end:{word_type}:{corpus}:speech {{id: csvLine.end_word_id}})
                 CREATE (utt:utterance:{corpus}:speech {{id: csvLine.id, begin: begin.begin, end: end.end}})-[:is_a]->(u_type:utterance_type:{corpus}),
                     (d)<-[:spoken_in]-(utt),
@@ -539,10 +571,9 @@ def import_utterance_csv(corpus_context, call_back=None, stop_check=None):
                 WITH utt, begin, end, nodes(path) as words
                 UNWIND words as w
                 CREATE (w)-[:contained_by]->(utt)'''
-        statement = statement.format(path=csv_path,
-                                     corpus=corpus_context.cypher_safe_name,
+        statement = statement.format(corpus=corpus_context.cypher_safe_name,
                                      word_type=corpus_context.word_name)
-        corpus_context.execute_cypher(statement)
+        load_csv(corpus_context, path, statement, commit_size=1000, planner_rule=False, ordered=True)
         # os.remove(path) # FIXME Neo4j 2.3 does not release files
 
 
@@ -562,13 +593,7 @@ def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
     if call_back is not None:
         call_back('Importing syllables...')
         call_back(0, len(speakers))
-    corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:syllable) ASSERT node.id IS UNIQUE')
-    corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:syllable_type) ASSERT node.id IS UNIQUE')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(begin)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(prev_id)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(end)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(label)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable_type(label)')
+    ensure_schema(corpus_context, constraints=SYLLABLE_CONSTRAINTS, indexes=SYLLABLE_INDEXES)
     for i, s in enumerate(speakers):
         if stop_check is not None and stop_check():
             return
@@ -577,11 +602,8 @@ def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
             call_back(i)
         path = os.path.join(corpus_context.config.temporary_directory('csv'),
                             '{}_syllable.csv'.format(s))
-        csv_path = 'file:///{}'.format(make_path_safe(path))
 
-        statement = '''CYPHER planner=rule USING PERIODIC COMMIT 500
-        LOAD CSV WITH HEADERS FROM "{path}" as csvLine
-        MERGE (s_type:syllable_type:{corpus} {{id: csvLine.type_id}})
+        statement = '''MERGE (s_type:syllable_type:{corpus} {{id: csvLine.type_id}})
         ON CREATE SET s_type.label = csvLine.label
         WITH s_type, csvLine
         MATCH (n:{phone_name}:{corpus}:speech {{id: csvLine.vowel_id}})-[r:contained_by]->(w:{word_name}:{corpus}:speech),
@@ -633,11 +655,10 @@ def import_syllable_csv(corpus_context, call_back=None, stop_check=None):
         FOREACH (c in cod | CREATE (c)-[:contained_by]->(s))
         FOREACH (r in rels | DELETE r)'''
 
-        statement = statement.format(path=csv_path,
-                                     corpus=corpus_context.cypher_safe_name,
+        statement = statement.format(corpus=corpus_context.cypher_safe_name,
                                      word_name=corpus_context.word_name,
                                      phone_name=corpus_context.phone_name)
-        corpus_context.execute_cypher(statement)
+        load_csv(corpus_context, path, statement, commit_size=500, ordered=True)
 
 
 def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
@@ -655,13 +676,7 @@ def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
     if call_back is not None:
         call_back('Importing degenerate syllables...')
         call_back(0, len(speakers))
-    corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:syllable) ASSERT node.id IS UNIQUE')
-    corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:syllable_type) ASSERT node.id IS UNIQUE')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(begin)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(prev_id)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(end)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable(label)')
-    corpus_context.execute_cypher('CREATE INDEX ON :syllable_type(label)')
+    ensure_schema(corpus_context, constraints=SYLLABLE_CONSTRAINTS, indexes=SYLLABLE_INDEXES)
     for i, s in enumerate(speakers):
         if stop_check is not None and stop_check():
             return
@@ -670,11 +685,8 @@ def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
             call_back(i)
         path = os.path.join(corpus_context.config.temporary_directory('csv'),
                             '{}_nonsyl.csv'.format(s))
-        csv_path = 'file:///{}'.format(make_path_safe(path))
 
-        statement = '''CYPHER planner=rule USING PERIODIC COMMIT 500
-        LOAD CSV WITH HEADERS FROM "{path}" as csvLine
-        MERGE (s_type:syllable_type:{corpus} {{id: csvLine.type_id}})
+        statement = '''MERGE (s_type:syllable_type:{corpus} {{id: csvLine.type_id}})
         ON CREATE SET s_type.label = csvLine.label
         WITH s_type, csvLine
     MATCH (o:{phone_name}:{corpus}:speech {{id: csvLine.onset_id}})-[r:contained_by]->(w:{word_name}:{corpus}:speech),
@@ -715,12 +727,11 @@ def import_nonsyl_csv(corpus_context, call_back=None, stop_check=None):
         FOREACH (c in cod | CREATE (c)-[:contained_by]->(s))
         FOREACH (r in rels | DELETE r)'''
 
-        statement = statement.format(path=csv_path,
-                                     corpus=corpus_context.cypher_safe_name,
+        statement = statement.format(corpus=corpus_context.cypher_safe_name,
                                      word_name=corpus_context.word_name,
                                      phone_name=corpus_context.phone_name
                                      )
-        corpus_context.execute_cypher(statement)
+        load_csv(corpus_context, path, statement, commit_size=500, ordered=True)
 
 
 def import_subannotation_csv(corpus_context, type, annotated_type, props):
@@ -740,11 +751,10 @@ def import_subannotation_csv(corpus_context, type, annotated_type, props):
     """
     path = os.path.join(corpus_context.config.temporary_directory('csv'),
                         '{}_subannotations.csv'.format(type))
-    csv_path = 'file:///{}'.format(make_path_safe(path))
     prop_temp = '''{name}: csvLine.{name}'''
     properties = []
 
-    corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:%s) ASSERT node.id IS UNIQUE' % type)
+    ensure_schema(corpus_context, constraints=[(type, 'id')])
 
     for p in props:
         if p in ['id', 'annotated_id', 'begin', 'end']:
@@ -754,21 +764,15 @@ def import_subannotation_csv(corpus_context, type, annotated_type, props):
         properties = ', ' + ', '.join(properties)
     else:
         properties = ''
-    statement = '''CYPHER planner=rule USING PERIODIC COMMIT 500
-    LOAD CSV WITH HEADERS FROM "{path}" AS csvLine
-            MATCH (annotated:{a_type}:{corpus} {{id: csvLine.annotated_id}})
+    statement = '''MATCH (annotated:{a_type}:{corpus} {{id: csvLine.annotated_id}})
             CREATE (annotated) <-[:annotates]-(annotation:{type}:{corpus}
                 {{id: csvLine.id, begin: toFloat(csvLine.begin),
                 end: toFloat(csvLine.end){properties}}})
             '''
-    statement = statement.format(path=csv_path,
-                                 corpus=corpus_context.cypher_safe_name,
+    statement = statement.format(corpus=corpus_context.cypher_safe_name,
                                  a_type=annotated_type,
                                  type=type,
                                  properties=properties)
-    corpus_context.execute_cypher(statement)
-    for p in props:
-        if p in ['id', 'annotated_id']:
-            continue
-        corpus_context.execute_cypher('CREATE INDEX ON :%s(%s)' % (type, p))
+    load_csv(corpus_context, path, statement, commit_size=500)
+    ensure_schema(corpus_context, indexes=[(type, p) for p in props if p not in ['id', 'annotated_id']])
         # os.remove(path) # FIXME Neo4j 2.3 does not release files
@@ -0,0 +1,320 @@
+import os
+import csv
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, as_completed
+
+from neo4j.exceptions import TransientError
+
+from ...exceptions import CorpusConfigError
+
+LOADER_BACKENDS = ['csv', 'unwind']
+
+# Number of times a file is retried after a deadlock or other transient error
+TRANSIENT_RETRIES = 5
+
+
+def make_path_safe(path):
+    return path.replace('\\', '/').replace(' ', '%20')
+
+
+def load_csv(corpus_context, path, statement, commit_size=None, planner_rule=True, ordered=False):
+    """
+    Load the rows of a CSV file into the graph database
+
+    The statement is run once per row, with the row available as ``csvLine``.
+    How rows get to the database depends on the ``import_backend`` setting of the corpus config:
+
+    * ``'csv'``: the database reads the file itself with ``LOAD CSV``, so it must
+      share a file system with the client
+    * ``'unwind'``: the client reads the file and sends rows over Bolt in batches
+      of ``import_batch_size`` rows with ``UNWIND``, using up to ``import_num_sessions``
+      sessions at once
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to load into
+    path : str
+        Full path to the CSV file
+    statement : str
+        Cypher statement to run for each row, referring to the row as ``csvLine``
+    commit_size : int, optional
+        Number of rows per transaction for the CSV backend, defaults to loading
+        the whole file in one transaction
+    planner_rule : bool
+        Whether to use the rule planner, defaults to True
+    ordered : bool
+        Whether rows depend on earlier rows having been committed, in which case
+        batches are never sent in parallel, defaults to False
+    """
+    backend = getattr(corpus_context.config, 'import_backend', 'csv')
+    prefix = ''
+    if planner_rule:
+        prefix = 'CYPHER planner=rule '
+    if backend == 'csv':
+        if commit_size is not None:
+            prefix += 'USING PERIODIC COMMIT {} '.format(commit_size)
+        csv_path = 'file:///{}'.format(make_path_safe(path))
+        statement = '''{}
+    LOAD CSV WITH HEADERS FROM "{}" AS csvLine
+    {}'''.format(prefix, csv_path, statement)
+        corpus_context.execute_cypher(statement)
+    elif backend == 'unwind':
+        statement = '''{}
+    UNWIND $rows AS csvLine
+    {}'''.format(prefix, statement)
+        num_sessions = 1
+        if not ordered:
+            num_sessions = corpus_context.config.import_num_sessions
+        load_rows(corpus_context, statement, read_csv_batches(path, corpus_context.config.import_batch_size),
+                  num_sessions)
+    else:
+        raise CorpusConfigError('The import backend \'{}\' is not one of: {}.'.format(backend,
+                                                                                     ', '.join(LOADER_BACKENDS)))
+
+
+def read_csv_batches(path, batch_size):
+    """
+    Read a CSV file with a header in batches of rows, with empty fields treated
+    as missing, the same as ``LOAD CSV``
+
+    Parameters
+    ----------
+    path : str
+        Full path to the CSV file
+    batch_size : int
+        Number of rows per batch
+
+    Yields
+    ------
+    list
+        Batch of rows as dictionaries
+    """
+    with open(path, 'r', newline='', encoding='utf8') as f:
+        reader = csv.DictReader(f)
+        batch = []
+        for row in reader:
+            batch.append({k: v if v != '' else None for k, v in row.items()})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def load_row_stream(corpus_context, path, header, rows, statement, commit_size=None, planner_rule=True):
+    """
+    Load rows generated by the client into the graph database without keeping them in memory
+
+    With the ``'csv'`` backend, rows are written to a CSV file as they are generated
+    and the file is then loaded with :func:`load_csv`.  With the ``'unwind'`` backend,
+    rows are sent in batches of ``import_batch_size`` rows as they are generated,
+    without writing a file.  Either way, the statement sees each value the way it
+    would be read from a CSV file: as a string, or null if it is missing or empty.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to load into
+    path : str
+        Full path to the CSV file to write for the CSV backend
+    header : list
+        Names of the columns, other keys of the rows are ignored
+    rows : iterable
+        Rows as dictionaries
+    statement : str
+        Cypher statement to run for each row, referring to the row as ``csvLine``
+    commit_size : int, optional
+        Number of rows per transaction for the CSV backend, defaults to loading
+        the whole file in one transaction
+    planner_rule : bool
+        Whether to use the rule planner, defaults to True
+    """
+    backend = getattr(corpus_context.config, 'import_backend', 'csv')
+    if backend != 'unwind':
+        with open(path, 'w', newline='', encoding='utf8') as f:
+            writer = csv.DictWriter(f, header, delimiter=',', extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+        load_csv(corpus_context, path, statement, commit_size=commit_size, planner_rule=planner_rule)
+        return
+
+    def batches():
+        batch_size = corpus_context.config.import_batch_size
+        batch = []
+        for row in rows:
+            batch.append({k: str(row[k]) if row.get(k) not in (None, '') else None for k in header})
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    prefix = ''
+    if planner_rule:
+        prefix = 'CYPHER planner=rule '
+    statement = '''{}
+    UNWIND $rows AS csvLine
+    {}'''.format(prefix, statement)
+    load_rows(corpus_context, statement, batches(), corpus_context.config.import_num_sessions)
+
+
+def load_rows(corpus_context, statement, batches, num_sessions=1):
+    """
+    Run a statement taking a ``rows`` parameter for each batch of rows, each
+    batch in its own write transaction
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to load into
+    statement : str
+        Cypher statement with a ``$rows`` parameter
+    batches : iterable
+        Batches of rows
+    num_sessions : int
+        Number of sessions to send batches over in parallel, defaults to 1
+    """
+
+    def run_batch(tx, rows):
+        tx.run(statement, rows=rows)
+
+    def load_batch(rows):
+        with corpus_context.graph_driver.session() as session:
+            session.write_transaction(run_batch, rows)
+
+    if num_sessions <= 1:
+        with corpus_context.graph_driver.session() as session:
+            for rows in batches:
+                session.write_transaction(run_batch, rows)
+        return
+    with ThreadPoolExecutor(num_sessions) as executor:
+        pending = set()
+        for rows in batches:
+            if len(pending) >= num_sessions * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for f in done:
+                    f.result()
+            pending.add(executor.submit(load_batch, rows))
+        for f in pending:
+            f.result()
+
+
+def load_csv_with_retry(corpus_context, path, statement, retry_statement=None, max_retries=TRANSIENT_RETRIES,
+                        resumed=False, **kwargs):
+    """
+    Load the rows of a CSV file with :func:`load_csv`, retrying after deadlocks
+    and other transient errors
+
+    Rows may already have been committed when a load fails part way through, so
+    any retry uses ``retry_statement``, which should skip rows that were already loaded.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to load into
+    path : str
+        Full path to the CSV file
+    statement : str
+        Cypher statement to run for each row
+    retry_statement : str, optional
+        Cypher statement to run for each row when retrying, defaults to ``statement``
+    max_retries : int
+        Maximum number of retries before the error is raised
+    resumed : bool
+        Whether rows may already have been committed by an earlier import that
+        was interrupted, in which case ``retry_statement`` is used from the start,
+        defaults to False
+    kwargs
+        Keyword arguments for :func:`load_csv`
+    """
+    if retry_statement is None:
+        retry_statement = statement
+    log = logging.getLogger('{}_loading'.format(corpus_context.corpus_name))
+    for attempt in range(max_retries + 1):
+        try:
+            load_csv(corpus_context, path, statement if attempt == 0 and not resumed else retry_statement, **kwargs)
+            return
+        except TransientError as e:
+            if attempt == max_retries:
+                raise
+            log.warning('Retrying {} after a transient error ({})'.format(path, getattr(e, 'code', e)))
+            time.sleep(random.uniform(0.5, 1.5) * 0.1 * 2 ** attempt)
+
+
+def load_csv_groups(corpus_context, groups, num_sessions=1, call_back=None, stop_check=None, checkpoint=None,
+                    **kwargs):
+    """
+    Load groups of CSV files, running independent groups concurrently
+
+    Files within a group are always loaded in order, one after the other, while up to
+    ``num_sessions`` groups are loaded at once, each over its own session.
+    Progress is reported through ``call_back`` as each group finishes.
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to load into
+    groups : list
+        Groups of files, each a list of tuples of the path, statement and retry
+        statement for a file (see :func:`load_csv_with_retry`)
+    num_sessions : int
+        Number of groups to load at once, defaults to 1
+    call_back : callable, optional
+        Function to report progress
+    stop_check : callable, optional
+        Function to check whether to stop loading
+    checkpoint : :class:`~polyglotdb.io.importer.checkpoint.ImportCheckpoint`, optional
+        Checkpoint of the import, which files are recorded in once loaded; files that
+        it already records are skipped
+    kwargs
+        Keyword arguments for :func:`load_csv`
+
+    Returns
+    -------
+    bool
+        True if all groups were loaded, False if loading was stopped
+    """
+    if call_back is not None:
+        call_back(0, len(groups))
+
+    def load_group(group):
+        for path, statement, retry_statement in group:
+            if stop_check is not None and stop_check():
+                return False
+            if checkpoint is None:
+                load_csv_with_retry(corpus_context, path, statement, retry_statement, **kwargs)
+                continue
+            key = os.path.basename(path)
+            if checkpoint.is_committed(key):
+                continue
+            load_csv_with_retry(corpus_context, path, statement, retry_statement, resumed=checkpoint.resumed,
+                                **kwargs)
+            checkpoint.commit(key)
+        return True
+
+    if num_sessions <= 1:
+        for i, group in enumerate(groups):
+            if not load_group(group):
+                return False
+            if call_back is not None:
+                call_back(i + 1)
+        return True
+    # Each group gets a single session, so the total number of sessions stays bounded
+    kwargs['ordered'] = True
+    completed = True
+    with ThreadPoolExecutor(num_sessions) as executor:
+        futures = [executor.submit(load_group, g) for g in groups]
+        try:
+            for i, f in enumerate(as_completed(futures)):
+                if not f.result():
+                    completed = False
+                if call_back is not None:
+                    call_back(i + 1)
+        except:
+            for f in futures:
+                f.cancel()
+            raise
+    return completed
@@ -0,0 +1,184 @@
+import re
+import logging
+
+INDEX_PATTERN = re.compile(r'INDEX ON :`?([^`(]+)`?\(`?([^`)]+)`?\)')
+CONSTRAINT_PATTERN = re.compile(r'CONSTRAINT ON \(\s*`?\w+`?:`?([^`\s)]+)`?\s*\) ASSERT `?\w+`?\.`?([^`\s]+)`? IS UNIQUE')
+
+
+def parse_schema_description(description):
+    """
+    Parse the description of an index or uniqueness constraint returned by
+    ``db.indexes()`` or ``db.constraints()``
+
+    Parameters
+    ----------
+    description : str
+        Description of the index or constraint
+
+    Returns
+    -------
+    tuple or None
+        Node label and property, or None if the description could not be parsed
+    """
+    m = CONSTRAINT_PATTERN.search(description)
+    if m is None:
+        m = INDEX_PATTERN.search(description)
+    if m is None:
+        return None
+    return m.group(1), m.group(2)
+
+
+def hierarchy_schema(hierarchy):
+    """
+    Compute the uniqueness constraints and indexes for the annotation types of a hierarchy
+
+    Parameters
+    ----------
+    hierarchy : :class:`~polyglotdb.structure.Hierarchy`
+        Hierarchy of the corpus
+
+    Returns
+    -------
+    set
+        Uniqueness constraints as tuples of node label and property
+    set
+        Indexes as tuples of node label and property
+    """
+    constraints = {('Corpus', 'name')}
+    indexes = {('Discourse', 'name'), ('Speaker', 'name')}
+    for at in hierarchy.annotation_types:
+        type_label = '{}_type'.format(at)
+        constraints.add((at, 'id'))
+        constraints.add((type_label, 'id'))
+        indexes.update([(at, 'begin'), (at, 'end'), (at, 'label'), (at, 'label_insensitive'),
+                        (type_label, 'label'), (type_label, 'label_insensitive')])
+        for name, t in hierarchy.token_properties.get(at, []):
+            indexes.add((at, name))
+        for name, t in hierarchy.type_properties.get(at, []):
+            indexes.add((type_label, name))
+    for at, subannotations in hierarchy.subannotations.items():
+        for s in subannotations:
+            constraints.add((s, 'id'))
+    return constraints, indexes
+
+
+class SchemaManager(object):
+    """
+    Class for creating uniqueness constraints and indexes in the graph database,
+    creating only those that do not exist yet
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to manage the schema for
+    """
+    def __init__(self, corpus_context):
+        self.corpus_context = corpus_context
+        self.constraints = None
+        self.indexes = None
+
+    def refresh(self):
+        """
+        Get the existing constraints and indexes from the database
+        """
+        self.constraints = set()
+        self.indexes = set()
+        for r in self.corpus_context.execute_cypher('CALL db.constraints()'):
+            parsed = parse_schema_description(r['description'])
+            if parsed is not None:
+                self.constraints.add(parsed)
+        for r in self.corpus_context.execute_cypher('CALL db.indexes()'):
+            parsed = parse_schema_description(r['description'])
+            if parsed is not None:
+                self.indexes.add(parsed)
+
+    def ensure(self, constraints=None, indexes=None):
+        """
+        Create any of the specified constraints and indexes that do not exist
+
+        Parameters
+        ----------
+        constraints : iterable, optional
+            Uniqueness constraints as tuples of node label and property
+        indexes : iterable, optional
+            Indexes as tuples of node label and property
+
+        Returns
+        -------
+        dict
+            Lists of the constraints and indexes that were created, and the number
+            that already existed
+        """
+        if constraints is None:
+            constraints = set()
+        if indexes is None:
+            indexes = set()
+        if self.constraints is None:
+            self.refresh()
+        report = {'constraints': [], 'indexes': [], 'existing': 0}
+        for label, prop in sorted(set(constraints)):
+            if (label, prop) in self.constraints:
+                report['existing'] += 1
+                continue
+            self.corpus_context.execute_cypher('CREATE CONSTRAINT ON (node:`%s`) ASSERT node.`%s` IS UNIQUE'
+                                               % (label, prop))
+            self.constraints.add((label, prop))
+            self.indexes.add((label, prop))
+            report['constraints'].append((label, prop))
+        for label, prop in sorted(set(indexes)):
+            # Uniqueness constraints come with their own index
+            if (label, prop) in self.indexes or (label, prop) in self.constraints:
+                report['existing'] += 1
+                continue
+            self.corpus_context.execute_cypher('CREATE INDEX ON :`%s`(`%s`)' % (label, prop))
+            self.indexes.add((label, prop))
+            report['indexes'].append((label, prop))
+        log = logging.getLogger('{}_loading'.format(self.corpus_context.corpus_name))
+        if report['constraints'] or report['indexes']:
+            log.info('Created {} constraints and {} indexes ({} already existed)'.format(
+                len(report['constraints']), len(report['indexes']), report['existing']))
+            for label, prop in report['constraints']:
+                log.debug('Created constraint on :{}({})'.format(label, prop))
+            for label, prop in report['indexes']:
+                log.debug('Created index on :{}({})'.format(label, prop))
+        return report
+
+    def ensure_hierarchy(self, hierarchy):
+        """
+        Create any missing constraints and indexes for the annotation types of a hierarchy
+
+        Parameters
+        ----------
+        hierarchy : :class:`~polyglotdb.structure.Hierarchy`
+            Hierarchy of the corpus
+
+        Returns
+        -------
+        dict
+            Lists of the constraints and indexes that were created, and the number
+            that already existed
+        """
+        return self.ensure(*hierarchy_schema(hierarchy))
+
+
+def ensure_schema(corpus_context, constraints=None, indexes=None):
+    """
+    Create any of the specified constraints and indexes that do not exist yet,
+    using the corpus' schema manager
+
+    Parameters
+    ----------
+    corpus_context : :class:`~polyglotdb.corpus.CorpusContext`
+        Corpus to create the constraints and indexes for
+    constraints : iterable, optional
+        Uniqueness constraints as tuples of node label and property
+    indexes : iterable, optional
+        Indexes as tuples of node label and property
+
+    Returns
+    -------
+    dict
+        Lists of the constraints and indexes that were created, and the number
+        that already existed
+    """
+    return corpus_context.schema.ensure(constraints, indexes)
@@ -1,6 +1,6 @@
 import csv
 import os
-from collections import defaultdict
+from collections import OrderedDict
 from ...exceptions import AlphabetError
 
 
@@ -36,7 +36,142 @@ def data_to_type_csvs(corpus_context, types, type_headers):
         write_csv_file(path, header, data)
 
 
-def data_to_graph_csvs(corpus_context, data):
+class GraphCSVWriter(object):
+    """
+    Writer for the per-speaker token and subannotation CSV files of a corpus import
+
+    File handles are kept open between discourses so that each file is only
+    opened once for the whole import, but at most ``max_open_files`` handles
+    are kept open at any time, with the least recently used handle being
+    closed first.  Rows are written as sequences in the order of the file's header.
+    Token files whose header differs from the token headers of the discourse being
+    written, such as when files are written over several discourses with different
+    token properties, have their header recorded in ``headers`` (see :meth:`extend_header`),
+    and token rows are written in the order of that header instead.
+
+    Parameters
+    ----------
+    directory : str
+        Full path to the directory containing the CSV files
+    max_open_files : int
+        Maximum number of files to keep open at once, defaults to 128
+    buffer_size : int
+        Size of the write buffer for each file in bytes, defaults to 65536
+    """
+    def __init__(self, directory, max_open_files=128, buffer_size=65536):
+        self.directory = directory
+        self.max_open_files = max_open_files
+        self.buffer_size = buffer_size
+        self._files = OrderedDict()
+        self._writers = {}
+        self.headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def writer(self, name):
+        """
+        Get a CSV writer for a file in the directory, opening the file in append mode if necessary
+
+        Parameters
+        ----------
+        name : str
+            File name of the CSV file
+
+        Returns
+        -------
+        :class:`csv.writer`
+            Writer for the file
+        """
+        if name in self._files:
+            self._files.move_to_end(name)
+            return self._writers[name]
+        while len(self._files) >= self.max_open_files:
+            old_name, f = self._files.popitem(last=False)
+            del self._writers[old_name]
+            f.close()
+        f = open(os.path.join(self.directory, name), 'a', newline='', encoding='utf8',
+                 buffering=self.buffer_size)
+        self._files[name] = f
+        self._writers[name] = csv.writer(f, delimiter=',')
+        return self._writers[name]
+
+    def writerows(self, name, rows):
+        """
+        Write rows to a file in the directory
+
+        Parameters
+        ----------
+        name : str
+            File name of the CSV file
+        rows : iterable
+            Rows to write, each in the order of the file's header
+        """
+        self.writer(name).writerows(rows)
+
+    def close_file(self, name):
+        """
+        Close a file if it is open, so that it can be rewritten
+
+        Parameters
+        ----------
+        name : str
+            File name of the CSV file
+        """
+        f = self._files.pop(name, None)
+        if f is not None:
+            del self._writers[name]
+            f.close()
+
+    def extend_header(self, name, header):
+        """
+        Record the header of a token file, adding any columns that are missing from the
+        header it was written with so far, so that each file has a single header covering
+        the token properties of all the discourses written to it
+
+        Existing rows are left empty for the new columns, and rows are then written in the
+        order of the file's recorded header.
+
+        Parameters
+        ----------
+        name : str
+            File name of the CSV file, which must already have a header if it is not recorded yet
+        header : list
+            Header of the discourse about to be written to the file
+        """
+        if name not in self.headers:
+            self.headers[name] = list(header)
+            return
+        missing = [x for x in header if x not in self.headers[name]]
+        if not missing:
+            return
+        self.close_file(name)
+        path = os.path.join(self.directory, name)
+        with open(path, 'r', newline='', encoding='utf8') as f_in, \
+                open(path + '.tmp', 'w', newline='', encoding='utf8') as f_out:
+            reader = csv.reader(f_in, delimiter=',')
+            writer = csv.writer(f_out, delimiter=',')
+            next(reader)
+            self.headers[name] = self.headers[name] + missing
+            writer.writerow(self.headers[name])
+            for row in reader:
+                writer.writerow(row + [''] * len(missing))
+        os.replace(path + '.tmp', path)
+
+    def close(self):
+        """
+        Close all open files
+        """
+        for f in self._files.values():
+            f.close()
+        self._files = OrderedDict()
+        self._writers = {}
+
+
+def data_to_graph_csvs(corpus_context, data, writer=None):
     """
     Convert a DiscourseData object into CSV files for efficient loading
     of graph nodes and relationships
@@ -45,54 +180,46 @@ def data_to_graph_csvs(corpus_context, data):
     ----------
     data : :class:`~polyglotdb.io.helper.DiscourseData`
         Data to load into a graph
-    directory: str
-        Full path to a directory to store CSV files
+    writer : :class:`~polyglotdb.io.importer.to_csv.GraphCSVWriter`, optional
+        Writer to use, which will be left open, otherwise a new writer is
+        created and closed once the data is written
     """
-    directory = corpus_context.config.temporary_directory('csv')
-    rfs = {}
-    rel_writers = {}
+    if writer is None:
+        with GraphCSVWriter(corpus_context.config.temporary_directory('csv')) as writer:
+            data_to_graph_csvs(corpus_context, data, writer)
+        return
+    corpus_name = corpus_context.corpus_name
     token_headers = data.token_headers
-    for s in data.speakers:
-        for x in data.annotation_types:
-            path = os.path.join(directory, '{}_{}.csv'.format(s, x))
-            rfs[s, x] = open(path, 'a', newline='', encoding='utf8')
-            rel_writers[s, x] = csv.DictWriter(rfs[s, x], token_headers[x], delimiter=',')
-    subanno_files = {}
-    subanno_writers = {}
-    for sp in data.speakers:
-        for k, v in data.hierarchy.subannotations.items():
-            for s in v:
-                path = os.path.join(directory, '{}_{}_{}.csv'.format(sp, k, s))
-                subanno_files[sp, k, s] = open(path, 'a', newline='', encoding='utf8')
-                header = ['id', 'begin', 'end', 'annotation_id', 'label']
-                subanno_writers[sp, k, s] = csv.DictWriter(subanno_files[sp, k, s], header, delimiter=',')
-
-    segment_type = data.segment_type
     for level in data.highest_to_lowest():
-        for d in data[level]:
-            if d.begin is None or d.end is None:
+        header = token_headers[level]
+        additional_headers = {}
+        annotations = data[level]
+        supertype = annotations.supertype
+        # Rows are written as they are generated, so only one row is held in memory at a time
+        for i in range(len(annotations)):
+            begin, end = annotations.row_times(i)
+            if begin is None or end is None:
                 continue
-            token_additional = dict(zip(d.token_keys(), d.token_values()))
-            if d.super_id is not None:
-                token_additional[data[level].supertype] = d.super_id
-            s = d.speaker
+            token_additional = annotations.row_token_properties(i)
+            token_id = annotations.row_id(i)
+            previous_id = annotations.row_previous_id(i)
+            super_id = annotations.row_super_id(i)
+            if super_id is not None:
+                token_additional[supertype] = super_id
+            s = annotations.row_speaker(i)
             if s is None:
                 s = 'unknown'
-            rel_writers[s, level].writerow(dict(begin=d.begin, end=d.end,
-                                                type_id=d.sha(corpus=corpus_context.corpus_name),
-                                                id=d.id, speaker=s, discourse=data.name,
-                                                previous_id=d.previous_id,
-                                                **token_additional))
-            if d.subannotations:
-                for sub in d.subannotations:
-                    row = {'begin': sub.begin, 'end': sub.end, 'label': sub.label,
-                           'annotation_id': d.id, 'id': sub.id}
-                    subanno_writers[s, level, sub.type].writerow(row)
-
-    for x in rfs.values():
-        x.close()
-    for x in subanno_files.values():
-        x.close()
+            row = [begin, end, annotations.row_sha(i, corpus=corpus_name), token_id, previous_id, s, data.name]
+            name = '{}_{}.csv'.format(s, level)
+            if name not in additional_headers:
+                additional_headers[name] = writer.headers.get(name, header)[7:]
+            row.extend(token_additional.get(x) for x in additional_headers[name])
+            writer.writer(name).writerow(row)
+            if previous_id is not None:
+                writer.writer('{}_{}_precedes.csv'.format(s, level)).writerow((previous_id, token_id))
+            for sub in annotations.row_subannotations(i):
+                writer.writer('{}_{}_{}.csv'.format(s, level, sub.type)).writerow(
+                    (sub.id, sub.begin, sub.end, token_id, sub.label))
 
 
 def utterance_data_to_csvs(corpus_context, speaker_data):
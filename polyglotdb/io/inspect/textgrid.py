@@ -1,11 +1,11 @@
 import os
 import math
 
-from textgrid import TextGrid, IntervalTier
 
 from polyglotdb.structure import Hierarchy
 
 from ..helper import guess_type, guess_trans_delimiter
+from ..textgrid_reader import read_textgrid, IntervalTier
 
 from ..types.parsing import *
 
@@ -224,8 +224,7 @@ def inspect_textgrid(path):
         textgrids.append(path)
     anno_types = []
     for t in textgrids:
-        tg = TextGrid()
-        tg.read(t)
+        tg = read_textgrid(t)
         if len(anno_types) == 0:
             tier_guesses, hierarchy = guess_tiers(tg)
             for ti in tg.tiers:
@@ -1,13 +1,193 @@
-import os
+import multiprocessing
+from collections import deque
 
-from ..types.standardized import PGAnnotation, PGSubAnnotation, PGAnnotationType
+from ..types.standardized import PGSubAnnotation, PGAnnotationType
 
 from ..types.parsing import Tobi, BreakIndex
 
 from ..discoursedata import DiscourseData
 
+from ..helper import TypeIdCache, set_type_id_cache
+
 from ...exceptions import ParseError
 
+_job_parser = None
+
+
+def _initialize_parse_job(parser):
+    global _job_parser
+    _job_parser = parser
+    # Each worker process keeps its own type id cache for the files it parses
+    set_type_id_cache(TypeIdCache())
+
+
+def _run_parse_job(parser, path, corpus_name, types_only):
+    if types_only:
+        return parser.parse_information(path, corpus_name)
+    return parser.parse_discourse(path)
+
+
+def _run_job(func, parser, path, args):
+    try:
+        return func(parser, path, *args)
+    except ParseError as e:
+        return e
+
+
+def _executor_job(job):
+    func, path, args = job
+    return _run_job(func, _job_parser, path, args)
+
+
+def _merge_subannotations(hierarchy, subannotations):
+    for k, v in subannotations.items():
+        if k not in hierarchy.subannotations:
+            hierarchy.subannotations[k] = set()
+        hierarchy.subannotations[k].update(v)
+
+
+def _merge_parse_result(parser, result):
+    # Each worker parses with its own copy of the parser's hierarchy, so fold
+    # changes back into the parent's hierarchy the same way serial parsing would
+    if isinstance(result, DiscourseData):
+        subannotations = result.hierarchy.subannotations
+        result.hierarchy.subannotations = {}
+        parser.hierarchy.update(result.hierarchy)
+        _merge_subannotations(parser.hierarchy, subannotations)
+        result.hierarchy = parser.hierarchy
+    elif isinstance(result, dict):
+        _merge_subannotations(parser.hierarchy, result['subannotations'])
+        result['subannotations'] = parser.hierarchy.subannotations
+
+
+class DiscourseExecutor(object):
+    """
+    Executor for mapping a function over the files of a corpus, optionally across
+    multiple processes, with results handed back in the order of the files
+
+    The parser is sent to each worker process once, and at most ``max_pending``
+    files are being parsed or waiting to be consumed at any time, so that the
+    memory used by parsed discourses stays bounded when they are parsed faster
+    than they can be written.  The executor holds no open resources between calls
+    to :meth:`map`, so it can be pickled along with the parser.
+
+    Parameters
+    ----------
+    parser : :class:`~polyglotdb.io.parsers.base.BaseParser`
+        Parser passed to the mapped function
+    num_jobs : int
+        Number of processes to use, defaults to 1 (run in the current process)
+    max_pending : int, optional
+        Maximum number of results that have been submitted but not yet consumed,
+        defaults to twice the number of processes
+    """
+    def __init__(self, parser, num_jobs=1, max_pending=None):
+        if num_jobs is None or num_jobs < 1:
+            num_jobs = 1
+        if max_pending is None:
+            max_pending = 2 * num_jobs
+        self.parser = parser
+        self.num_jobs = num_jobs
+        self.max_pending = max(max_pending, 1)
+
+    def map(self, func, paths, *args, stop_check=None):
+        """
+        Apply a function to each file
+
+        The function is called as ``func(parser, path, *args)`` and has to be
+        defined at the top level of a module so that it can be sent to worker
+        processes.  A :class:`~polyglotdb.exceptions.ParseError` raised by the
+        function is yielded as the result for that file instead of being raised.
+
+        Parameters
+        ----------
+        func : callable
+            Function to apply
+        paths : list
+            Full paths of the files
+        args
+            Additional arguments to the function
+        stop_check : callable, optional
+            Function to check whether to halt, checked before each result is yielded
+
+        Yields
+        ------
+        str
+            Path of the file
+        object
+            Result of the function for the file
+        """
+        if self.num_jobs == 1:
+            for path in paths:
+                if stop_check is not None and stop_check():
+                    return
+                yield path, _run_job(func, self.parser, path, args)
+            return
+        paths = iter(paths)
+        pending = deque()
+        pool = multiprocessing.Pool(self.num_jobs, initializer=_initialize_parse_job, initargs=(self.parser,))
+        try:
+            for path in paths:
+                pending.append((path, pool.apply_async(_executor_job, ((func, path, args),))))
+                if len(pending) >= self.max_pending:
+                    break
+            while pending:
+                path, result = pending.popleft()
+                result = result.get()
+                if stop_check is not None and stop_check():
+                    return
+                # Only submit the next file once a result has been consumed
+                for next_path in paths:
+                    pending.append((next_path, pool.apply_async(_executor_job, ((func, next_path, args),))))
+                    break
+                yield path, result
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+def parse_files(parser, paths, corpus_name=None, types_only=False, num_jobs=1, stop_check=None,
+                max_pending=None):
+    """
+    Parse a list of files, optionally across multiple processes
+
+    Results are yielded in the same order as the paths, regardless of the
+    number of processes used.  Files that raise a
+    :class:`~polyglotdb.exceptions.ParseError` yield the error rather than
+    raising it, so that callers can decide how to handle them.
+
+    Parameters
+    ----------
+    parser : :class:`~polyglotdb.io.parsers.base.BaseParser`
+        Parser to use for each file
+    paths : list
+        Full paths of the files to parse
+    corpus_name : str, optional
+        Name of the corpus, required when ``types_only`` is True
+    types_only : bool
+        If True, yield the output of ``parse_information`` rather than
+        :class:`~polyglotdb.io.discoursedata.DiscourseData` objects
+    num_jobs : int
+        Number of processes to use, defaults to 1 (parse in the current process)
+    stop_check : callable, optional
+        Function to check whether to halt parsing
+    max_pending : int, optional
+        Maximum number of parsed files waiting to be consumed, see
+        :class:`~polyglotdb.io.parsers.base.DiscourseExecutor`
+
+    Yields
+    ------
+    str
+        Path of the file
+    dict, :class:`~polyglotdb.io.discoursedata.DiscourseData` or :class:`~polyglotdb.exceptions.ParseError`
+        Result of parsing the file
+    """
+    executor = DiscourseExecutor(parser, num_jobs, max_pending)
+    for path, result in executor.map(_run_parse_job, paths, corpus_name, types_only, stop_check=stop_check):
+        if executor.num_jobs > 1:
+            _merge_parse_result(parser, result)
+        yield path, result
+
 
 class BaseParser(object):
     '''
@@ -40,6 +220,13 @@ class BaseParser(object):
         self.stop_check = stop_check
         self.call_back = call_back
 
+    def __getstate__(self):
+        # Callbacks are only meaningful in the process that created them
+        state = self.__dict__.copy()
+        state['stop_check'] = None
+        state['call_back'] = None
+        return state
+
     def match_extension(self, filename):
         """
         Ensures that filename ends with acceptable extension
@@ -96,6 +283,7 @@ class BaseParser(object):
                     raise (
                     ParseError('Annotations sharing a linguistic type and a speaker don\'t have a consistent length.'))
             for speaker, speaker_levels in relevent_levels.items():
+                previous = None
                 for i in range(lengths[speaker]):
                     type_properties = {}
                     token_properties = {}
@@ -137,13 +325,11 @@ class BaseParser(object):
                             if False and not types_only:
                                 print(rl.name, 'is token!')
                             token_properties[rl.name] = rl[i].value
-                    a = PGAnnotation(label, begin, end)
-                    a.type_properties.update(type_properties)
-                    a.token_properties.update(token_properties)
-                    a.speaker = speaker
-                    if i != 0:
-                        a.previous_id = annotation_types[k][-1].id
-                    annotation_types[k].add(a)
+                    if previous is not None:
+                        previous = annotation_types[k].row_id_bytes(previous)
+                    previous = annotation_types[k].add_row(label, begin, end, speaker=speaker, previous_id=previous,
+                                                           type_properties=type_properties,
+                                                           token_properties=token_properties)
                 for rl in speaker_levels:
                     if types_only:
                         continue
@@ -157,7 +343,7 @@ class BaseParser(object):
                             a = PGSubAnnotation(sub.value, 'break', sub.begin, sub.end)
                         else:
                             a = PGSubAnnotation(None, sub.label, sub.begin, sub.end)
-                        annotation.subannotations.append(a)
+                        annotation_types[k].add_subannotation(annotation.index, a)
                         if k not in self.hierarchy.subannotations:
                             self.hierarchy.subannotations[k] = set()
                         self.hierarchy.subannotations[k].add(a.type)
@@ -167,13 +353,10 @@ class BaseParser(object):
                 st = v.supertype
                 if st is not None:
                     annotation_types[st].optimize_lookups()
-                    for a in annotation_types[k]:
-                        super_annotation = annotation_types[st].lookup(a.midpoint, speaker=a.speaker)
-                        try:
-                            a.super_id = super_annotation.id
-                        except AttributeError:
-                            pass
-                            # raise
+                    for i in range(len(v)):
+                        super_annotation = annotation_types[st].lookup(v.row_midpoint(i), speaker=v.row_speaker(i))
+                        if super_annotation is not None:
+                            v.set_super_id(i, annotation_types[st].row_id_bytes(super_annotation.index))
             if self.make_transcription and segment_type is not None and v.is_word:
                 v.type_property_keys.update(['transcription'])
                 annotation_types[segment_type].optimize_lookups()
@@ -188,6 +371,8 @@ class BaseParser(object):
                         a.label = ''.join(a.type_properties['transcription'])
                         annotation_types[k].type_property_keys.add('label')
                         annotation_types[k].token_property_keys.add('label')
+        for v in annotation_types.values():
+            v.clear_lookups()
         return annotation_types
 
     def parse_information(self, path, corpus_name):
@@ -232,3 +417,27 @@ class BaseParser(object):
         pg_annotations = self._parse_annotations(types_only)
         data = DiscourseData(name, pg_annotations, self.hierarchy)
         return data
+
+    def parse_discourses(self, paths, num_jobs=1, max_pending=None):
+        '''
+        Parse multiple files, optionally across multiple processes, see
+        :class:`~polyglotdb.io.parsers.base.DiscourseExecutor`
+
+        Parameters
+        ----------
+        paths : list
+            Full paths of the files to parse
+        num_jobs : int
+            Number of processes to use, defaults to 1
+        max_pending : int, optional
+            Maximum number of parsed files waiting to be consumed, defaults to
+            twice the number of processes
+
+        Yields
+        ------
+        str
+            Path of the file
+        :class:`~polyglotdb.io.discoursedata.DiscourseData` or :class:`~polyglotdb.exceptions.ParseError`
+            Parsed data, or the error raised when parsing the file
+        '''
+        return parse_files(self, paths, num_jobs=num_jobs, stop_check=self.stop_check, max_pending=max_pending)
@@ -5,7 +5,7 @@ import hashlib
 
 from polyglotdb.exceptions import BuckeyeParseError
 
-from .base import BaseParser, PGAnnotation, PGAnnotationType, DiscourseData
+from .base import BaseParser, PGAnnotationType, DiscourseData
 
 from .speaker import FilenameSpeakerParser
 
@@ -1,7 +1,5 @@
 import os
 
-from textgrid import TextGrid, IntervalTier
-
 from .textgrid import TextgridParser
 
 from ..types.parsing import OrthographyTier
@@ -49,8 +47,7 @@ class FaveParser(TextgridParser):
         :class:`~polyglotdb.io.discoursedata.DiscourseData`
             Parsed data from the file
         '''
-        tg = TextGrid()
-        tg.read(path)
+        tg = self.load_textgrid(path)
         if not self._is_valid(tg):
             raise (TextGridError('The file "{}" cannot be parsed by the FAVE parser.'.format(path)))
         name = os.path.splitext(os.path.split(path)[1])[0]
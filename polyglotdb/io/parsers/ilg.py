@@ -10,7 +10,7 @@ from ..helper import guess_type, ilg_text_to_lines
 
 from ..discoursedata import DiscourseData
 
-from .base import BaseParser, PGAnnotation, PGAnnotationType, DiscourseData
+from .base import BaseParser, PGAnnotationType, DiscourseData
 
 
 class IlgParser(BaseParser):
@@ -1,7 +1,5 @@
 import os
 
-from textgrid import TextGrid, IntervalTier
-
 from .textgrid import TextgridParser
 
 from polyglotdb.exceptions import TextGridError
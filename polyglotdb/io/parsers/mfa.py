@@ -1,8 +1,6 @@
 #from __future__ import absolute_import
 import os
 
-from textgrid import TextGrid, IntervalTier
-
 from .textgrid import TextgridParser
 from ..types.parsing import OrthographyTier
 
@@ -70,8 +68,7 @@ class MfaParser(TextgridParser):
         :class:`~polyglotdb.io.discoursedata.DiscourseData`
             Parsed data from the file
         '''
-        tg = TextGrid()
-        tg.read(path)
+        tg = self.load_textgrid(path)
 
         multiple_speakers, is_valid = self._is_valid(tg)
 
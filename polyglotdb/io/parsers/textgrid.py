@@ -1,6 +1,5 @@
 import os
 
-from textgrid import TextGrid, IntervalTier
 
 from polyglotdb.exceptions import TextGridError
 from polyglotdb.structure import Hierarchy
@@ -8,6 +7,7 @@ from polyglotdb.structure import Hierarchy
 from .base import BaseParser, DiscourseData
 
 from ..helper import find_wav_path
+from ..textgrid_reader import read_textgrid, iter_textgrid
 
 
 class TextgridParser(BaseParser):
@@ -38,9 +38,8 @@ class TextgridParser(BaseParser):
                                              stop_check=stop_check, call_back=call_back)
 
     def load_textgrid(self, path):
-        tg = TextGrid()
         try:
-            tg.read(path)
+            tg = read_textgrid(path)
         except ValueError as e:
             raise (TextGridError('The file {} could not be parsed: {}'.format(path, str(e))))
         return tg
@@ -59,12 +58,6 @@ class TextgridParser(BaseParser):
         :class:`~polyglotdb.io.discoursedata.DiscourseData`
             Parsed data from the file
         '''
-        tg = self.load_textgrid(path)
-
-        if len(tg.tiers) != len(self.annotation_types):
-            raise (TextGridError(
-                "The TextGrid ({}) does not have the same number of interval tiers as the number of annotation types specified.".format(
-                    path)))
         name = os.path.splitext(os.path.split(path)[1])[0]
 
         if self.speaker_parser is not None:
@@ -76,13 +69,22 @@ class TextgridParser(BaseParser):
             a.reset()
             a.speaker = speaker
 
-        # Parse the tiers
-        for i, ti in enumerate(tg.tiers):
-
-            if isinstance(ti, IntervalTier):
-                self.annotation_types[i].add(((x.mark.strip(), x.minTime, x.maxTime) for x in ti))
+        # Stream the tiers straight into the annotation types
+        num_tiers = 0
+        for i, (info, entries) in enumerate(iter_textgrid(path)):
+            num_tiers += 1
+            if i >= len(self.annotation_types):
+                continue
+            if info.tier_class == 'IntervalTier':
+                self.annotation_types[i].add(((x[0].strip(), x[1], x[2]) for x in entries))
             else:
-                self.annotation_types[i].add(((x.mark.strip(), x.time) for x in ti))
+                self.annotation_types[i].add(((x[0].strip(), x[1]) for x in entries))
+        if num_tiers != len(self.annotation_types):
+            for a in self.annotation_types:
+                a.reset()
+            raise (TextGridError(
+                "The TextGrid ({}) does not have the same number of interval tiers as the number of annotation types specified.".format(
+                    path)))
         pg_annotations = self._parse_annotations(types_only)
 
         data = DiscourseData(name, pg_annotations, self.hierarchy)
@@ -0,0 +1,395 @@
+import os
+import codecs
+from collections import namedtuple, OrderedDict
+
+from polyglotdb.exceptions import TextGridError
+
+# Praat times are rounded to the same precision as the textgrid package
+DEFAULT_TEXTGRID_PRECISION = 5
+
+# Maximum number of files to keep tier information for
+TEXTGRID_INFO_CACHE_SIZE = 10000
+
+# Maximum number of intervals and points across all files to keep in memory,
+# so that inspecting a directory and then loading it only reads each file once
+TEXTGRID_CACHE_ENTRIES = 500000
+
+Interval = namedtuple('Interval', ['mark', 'minTime', 'maxTime'])
+
+Point = namedtuple('Point', ['mark', 'time'])
+
+TierInfo = namedtuple('TierInfo', ['name', 'tier_class', 'minTime', 'maxTime', 'size'])
+
+_info_cache = OrderedDict()
+_entry_cache = OrderedDict()
+_entry_cache_size = 0
+
+
+class IntervalTier(object):
+    """
+    Interval tier of a TextGrid, with intervals stored as tuples of mark, begin and end
+
+    Parameters
+    ----------
+    name : str
+        Name of the tier
+    minTime : float
+        Beginning of the tier
+    maxTime : float
+        End of the tier
+    intervals : list, optional
+        :class:`Interval` tuples of the tier
+    """
+    def __init__(self, name, minTime, maxTime, intervals=None):
+        self.name = name
+        self.minTime = minTime
+        self.maxTime = maxTime
+        if intervals is None:
+            intervals = []
+        self.intervals = intervals
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def __getitem__(self, i):
+        return self.intervals[i]
+
+
+class PointTier(object):
+    """
+    Point tier of a TextGrid, with points stored as tuples of mark and time
+
+    Parameters
+    ----------
+    name : str
+        Name of the tier
+    minTime : float
+        Beginning of the tier
+    maxTime : float
+        End of the tier
+    points : list, optional
+        :class:`Point` tuples of the tier
+    """
+    def __init__(self, name, minTime, maxTime, points=None):
+        self.name = name
+        self.minTime = minTime
+        self.maxTime = maxTime
+        if points is None:
+            points = []
+        self.points = points
+
+    def __iter__(self):
+        return iter(self.points)
+
+    def __len__(self):
+        return len(self.points)
+
+    def __getitem__(self, i):
+        return self.points[i]
+
+
+class TextGrid(object):
+    """
+    Praat TextGrid, read with :func:`read_textgrid`
+
+    Parameters
+    ----------
+    minTime : float
+        Beginning of the TextGrid
+    maxTime : float
+        End of the TextGrid
+    """
+    def __init__(self, minTime=0., maxTime=None):
+        self.minTime = minTime
+        self.maxTime = maxTime
+        self.tiers = []
+
+    def __iter__(self):
+        return iter(self.tiers)
+
+    def __len__(self):
+        return len(self.tiers)
+
+    def __getitem__(self, i):
+        return self.tiers[i]
+
+    def read(self, path):
+        """
+        Read the tiers of a TextGrid file
+
+        Parameters
+        ----------
+        path : str
+            Full path to the TextGrid file
+        """
+        tg = read_textgrid(path)
+        self.minTime, self.maxTime, self.tiers = tg.minTime, tg.maxTime, tg.tiers
+
+
+def detect_encoding(path):
+    """
+    Detect the encoding of a TextGrid file, which Praat writes as either UTF-8
+    or UTF-16
+
+    Parameters
+    ----------
+    path : str
+        Full path to the TextGrid file
+
+    Returns
+    -------
+    str
+        Encoding of the file
+    """
+    with open(path, 'rb') as f:
+        start = f.read(4)
+    if start.startswith(codecs.BOM_UTF16_LE) or start.startswith(codecs.BOM_UTF16_BE):
+        return 'utf-16'
+    if start.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    # UTF-16 without a byte order mark still has null bytes in the ASCII header
+    if len(start) >= 2:
+        if start[0] == 0 and start[1] != 0:
+            return 'utf-16-be'
+        if start[0] != 0 and start[1] == 0:
+            return 'utf-16-le'
+    return 'utf-8'
+
+
+def _iter_values(lines):
+    # Both the long and the short text formats are a sequence of strings and numbers,
+    # the long format just adds labels and lines for item numbers
+    for line in lines:
+        value = line.strip()
+        if not value or value.startswith('!'):
+            continue
+        if not value.startswith('"'):
+            if '=' in value:
+                value = value.split('=', 1)[1].strip()
+            elif value.endswith(':') or value.startswith('<') or value.endswith('>'):
+                continue
+        if value.startswith('"'):
+            while value.count('"') % 2:
+                try:
+                    value += '\n' + next(lines).rstrip('\r\n')
+                except StopIteration:
+                    raise TextGridError('The TextGrid ended in the middle of a label.')
+            value = value.strip()
+            yield value[1:-1].replace('""', '"')
+        else:
+            yield value
+
+
+def _number(value, round_digits):
+    try:
+        return round(float(value), round_digits)
+    except ValueError:
+        raise TextGridError('Expected a number but found \'{}\'.'.format(value))
+
+
+def _iter_entries(values, info, round_digits, store=None):
+    for i in range(info.size):
+        if info.tier_class == 'IntervalTier':
+            begin = _number(next(values), round_digits)
+            end = _number(next(values), round_digits)
+            mark = next(values)
+            if begin >= end:
+                continue
+            entry = Interval(mark, begin, end)
+        else:
+            time = _number(next(values), round_digits)
+            entry = Point(next(values), time)
+        if store is not None:
+            store.append(entry)
+        yield entry
+
+
+def _stamp(path):
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def _cache_get(cache, key, stamp):
+    try:
+        cached_stamp, value = cache[key]
+    except KeyError:
+        return None
+    if cached_stamp != stamp:
+        return None
+    cache.move_to_end(key)
+    return value
+
+
+def _cache_entries(key, stamp, minTime, maxTime, tiers):
+    global _entry_cache_size
+    size = sum(len(x[1]) for x in tiers)
+    if size > TEXTGRID_CACHE_ENTRIES:
+        return
+    if key in _entry_cache:
+        _entry_cache_size -= sum(len(x[1]) for x in _entry_cache.pop(key)[1][2])
+    _entry_cache[key] = (stamp, (minTime, maxTime, tiers))
+    _entry_cache_size += size
+    while _entry_cache_size > TEXTGRID_CACHE_ENTRIES:
+        _, (_, (_, _, old)) = _entry_cache.popitem(last=False)
+        _entry_cache_size -= sum(len(x[1]) for x in old)
+
+
+def _cache_info(path, stamp, infos):
+    _info_cache[path] = (stamp, infos)
+    _info_cache.move_to_end(path)
+    while len(_info_cache) > TEXTGRID_INFO_CACHE_SIZE:
+        _info_cache.popitem(last=False)
+
+
+def clear_textgrid_cache():
+    """
+    Remove all TextGrid information and tiers kept in memory
+    """
+    global _entry_cache_size
+    _info_cache.clear()
+    _entry_cache.clear()
+    _entry_cache_size = 0
+
+
+def iter_textgrid(path, round_digits=DEFAULT_TEXTGRID_PRECISION):
+    """
+    Stream the tiers of a TextGrid file in either the long or the short text format
+
+    Each tier is yielded along with an iterator over its intervals, as
+    ``(mark, minTime, maxTime)`` tuples, or points, as ``(mark, time)``
+    tuples, that are read from the file as they are iterated over.  Intervals
+    that are not iterated over before moving to the next tier are skipped.
+    Tiers of recently read files are kept in memory (up to ``TEXTGRID_CACHE_ENTRIES``
+    intervals and points), in which case the file is not read again.
+
+    Parameters
+    ----------
+    path : str
+        Full path to the TextGrid file
+    round_digits : int
+        Number of digits to round times to, defaults to 5
+
+    Yields
+    ------
+    :class:`TierInfo`
+        Name, class ('IntervalTier' or 'TextTier'), times and number of entries of the tier
+    iterator
+        Intervals or points of the tier
+    """
+    yield from _iter_textgrid(path, round_digits)
+
+
+def _iter_textgrid(path, round_digits, times=None):
+    # The overall times of the TextGrid are stored in times, if given, before any tier is yielded
+    stamp = _stamp(path)
+    cached = _cache_get(_entry_cache, (path, round_digits), stamp)
+    if cached is not None:
+        if times is not None:
+            times[:] = cached[:2]
+        _cache_info(path, stamp, (cached[0], cached[1], [x[0] for x in cached[2]]))
+        for info, entries in cached[2]:
+            yield info, iter(entries)
+        return
+    try:
+        with open(path, 'r', encoding=detect_encoding(path)) as f:
+            values = _iter_values(iter(f))
+            try:
+                file_type = next(values)
+                object_class = next(values)
+            except StopIteration:
+                raise TextGridError('The file {} is empty.'.format(path))
+            if not file_type.startswith('ooTextFile') or object_class != 'TextGrid':
+                raise TextGridError('The file {} could not be parsed as a TextGrid '
+                                    'as it is lacking a proper header.'.format(path))
+            try:
+                minTime = _number(next(values), round_digits)
+                maxTime = _number(next(values), round_digits)
+                num_tiers = int(_number(next(values), 0))
+            except StopIteration:
+                num_tiers = 0
+                minTime, maxTime = None, None
+            if times is not None:
+                times[:] = [minTime, maxTime]
+            infos = []
+            tiers = []
+            remaining = TEXTGRID_CACHE_ENTRIES
+            for i in range(num_tiers):
+                tier_class = next(values)
+                name = next(values)
+                tier_min = _number(next(values), round_digits)
+                tier_max = _number(next(values), round_digits)
+                size = int(_number(next(values), 0))
+                info = TierInfo(name, tier_class, tier_min, tier_max, size)
+                infos.append(info)
+                store = None
+                if tiers is not None:
+                    remaining -= size
+                    if remaining < 0:
+                        tiers = None
+                    else:
+                        store = []
+                        tiers.append((info, store))
+                entries = _iter_entries(values, info, round_digits, store)
+                yield info, entries
+                for _ in entries:
+                    pass
+    except StopIteration:
+        raise TextGridError('The file {} ended before all of its tiers were read.'.format(path))
+    except UnicodeError as e:
+        raise TextGridError('The file {} could not be decoded: {}'.format(path, str(e)))
+    _cache_info(path, stamp, (minTime, maxTime, infos))
+    if tiers is not None:
+        _cache_entries((path, round_digits), stamp, minTime, maxTime, tiers)
+
+
+def textgrid_info(path):
+    """
+    Get the names, classes, times and sizes of the tiers in a TextGrid file,
+    without keeping any intervals or points
+
+    Parameters
+    ----------
+    path : str
+        Full path to the TextGrid file
+
+    Returns
+    -------
+    list
+        :class:`TierInfo` for each tier
+    """
+    cached = _cache_get(_info_cache, path, _stamp(path))
+    if cached is not None:
+        return cached[2]
+    return [info for info, entries in iter_textgrid(path)]
+
+
+def read_textgrid(path, round_digits=DEFAULT_TEXTGRID_PRECISION):
+    """
+    Read all the tiers of a TextGrid file
+
+    Parameters
+    ----------
+    path : str
+        Full path to the TextGrid file
+    round_digits : int
+        Number of digits to round times to, defaults to 5
+
+    Returns
+    -------
+    :class:`TextGrid`
+        TextGrid with interval and point tiers
+    """
+    times = []
+    tiers = []
+    for info, entries in _iter_textgrid(path, round_digits, times):
+        if info.tier_class == 'IntervalTier':
+            tiers.append(IntervalTier(info.name, info.minTime, info.maxTime, list(entries)))
+        else:
+            tiers.append(PointTier(info.name, info.minTime, info.maxTime, list(entries)))
+    tg = TextGrid()
+    tg.minTime, tg.maxTime = times
+    tg.tiers = tiers
+    return tg
@@ -1,7 +1,10 @@
-from uuid import uuid1
-import hashlib
+import sys
+from uuid import uuid1, UUID
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
 
-from ..helper import normalize_values_for_neo4j
+from ..helper import normalize_values_for_neo4j, make_type_id
 
 
 class PGAnnotation(object):
@@ -38,13 +41,7 @@ class PGAnnotation(object):
         str
             a hex string containing the digest of the values as hexadecimal numbers
         """
-        m = hashlib.sha1()
-        value = ' '.join(map(str, self.type_values()))
-        if corpus is not None:
-            value += ' ' + corpus
-        m.update(value.encode())
-        out = m.hexdigest()
-        return out
+        return make_type_id(self.type_values(), corpus)
 
     def type_keys(self):
         """
@@ -111,31 +108,329 @@ class PGAnnotation(object):
                 yield normalized[k]
 
 
+class _InternTable(object):
+    # Maps values to small integers, so that each distinct value is only stored once
+    __slots__ = ('values', 'indices')
+
+    def __init__(self):
+        self.values = []
+        self.indices = {}
+
+    def intern(self, value):
+        if value is None:
+            return -1
+        try:
+            return self.indices[value]
+        except KeyError:
+            index = len(self.values)
+            self.indices[value] = index
+            self.values.append(value)
+            return index
+
+    def get(self, index):
+        if index < 0:
+            return None
+        return self.values[index]
+
+
+_MISSING = object()
+
+_NULL_ID = bytes(16)
+
+
+def _get_time(times, index):
+    # Missing times are stored as NaN
+    value = times[index]
+    if value != value:
+        return None
+    return value
+
+
+def _sort_time(value):
+    if value != value:
+        return float('-inf')
+    return value
+
+
+def _id_bytes(value):
+    # Ids are stored as the 16 bytes of a UUID, and returned in the UUID's string format
+    if value is None:
+        return _NULL_ID
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, UUID):
+        return value.bytes
+    return bytes.fromhex(str(value).replace('-', ''))
+
+
+def _get_id(ids, index):
+    value = ids[index * 16:(index + 1) * 16]
+    if value == _NULL_ID:
+        return None
+    h = value.hex()
+    return '{}-{}-{}-{}-{}'.format(h[:8], h[8:12], h[12:16], h[16:20], h[20:])
+
+
+def _set_id(ids, index, value):
+    ids[index * 16:(index + 1) * 16] = _id_bytes(value)
+
+
+def _set_property(columns, key, index, value, length=None):
+    if key not in columns:
+        if length is None:
+            length = index + 1
+        columns[key] = [_MISSING] * length
+    if isinstance(value, str):
+        value = sys.intern(value)
+    columns[key][index] = value
+
+
+class _RowProperties(MutableMapping):
+    # Dictionary view of the type or token properties of a single row of a PGAnnotationType
+    __slots__ = ('_tier', '_columns', '_index')
+
+    def __init__(self, tier, columns, index):
+        self._tier = tier
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key):
+        try:
+            value = self._columns[key][self._index]
+        except KeyError:
+            raise KeyError(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        _set_property(self._columns, key, self._index, value, len(self._tier))
+
+    def __delitem__(self, key):
+        self[key]
+        self._columns[key][self._index] = _MISSING
+
+    def __iter__(self):
+        return (k for k, v in self._columns.items() if v[self._index] is not _MISSING)
+
+    def __len__(self):
+        return sum(1 for k in self)
+
+
+class PGAnnotationRow(object):
+    """
+    View of a single annotation in a :class:`PGAnnotationType`, with the same
+    attributes and methods as :class:`PGAnnotation`, reading from and writing to
+    the columns of the annotation type
+    """
+    __slots__ = ('_tier', '_index')
+
+    def __init__(self, tier, index):
+        self._tier = tier
+        self._index = index
+
+    @property
+    def index(self):
+        return self._index
+
+    @property
+    def id(self):
+        return self._tier.row_id(self._index)
+
+    @property
+    def label(self):
+        return self._tier.row_label(self._index)
+
+    @label.setter
+    def label(self, value):
+        self._tier.set_label(self._index, value)
+
+    @property
+    def begin(self):
+        return _get_time(self._tier._begins, self._index)
+
+    @property
+    def end(self):
+        return _get_time(self._tier._ends, self._index)
+
+    @property
+    def midpoint(self):
+        return self._tier.row_midpoint(self._index)
+
+    @property
+    def speaker(self):
+        return self._tier.row_speaker(self._index)
+
+    @speaker.setter
+    def speaker(self, value):
+        self._tier._speakers[self._index] = self._tier._speaker_table.intern(value)
+
+    @property
+    def super_id(self):
+        return _get_id(self._tier._super_ids, self._index)
+
+    @super_id.setter
+    def super_id(self, value):
+        _set_id(self._tier._super_ids, self._index, value)
+
+    @property
+    def previous_id(self):
+        return _get_id(self._tier._previous_ids, self._index)
+
+    @previous_id.setter
+    def previous_id(self, value):
+        _set_id(self._tier._previous_ids, self._index, value)
+
+    @property
+    def type_properties(self):
+        return _RowProperties(self._tier, self._tier._type_columns, self._index)
+
+    @property
+    def token_properties(self):
+        return _RowProperties(self._tier, self._tier._token_columns, self._index)
+
+    @property
+    def subannotations(self):
+        return self._tier.row_subannotations(self._index)
+
+    def sha(self, corpus=None):
+        return self._tier.row_sha(self._index, corpus)
+
+    def type_keys(self):
+        return self._tier.row_type_keys(self._index)
+
+    def type_values(self):
+        return self._tier.row_type_values(self._index)
+
+    def token_keys(self):
+        return self._tier.row_token_keys(self._index)
+
+    def token_values(self):
+        return self._tier.row_token_values(self._index)
+
+
 class PGAnnotationType(object):
+    """
+    Annotations of a single linguistic type, stored by column rather than as
+    separate objects to keep memory use low for large discourses
+
+    Begin and end times are kept in arrays, labels and speakers as indices into tables
+    of distinct values, ids and the ids of previous and containing annotations as
+    16 bytes each, and type and token properties as one list per property.
+    Iterating over or indexing an annotation type gives :class:`PGAnnotationRow`
+    views that behave like :class:`PGAnnotation` objects.  Views refer to positions,
+    which change when annotations are sorted by :meth:`optimize_lookups`.
+
+    Parameters
+    ----------
+    name : str
+        Name of the linguistic type
+    """
     def __init__(self, name):
         self.name = name
-        self._list = []
         self.supertype = None
         self.type_property_keys = set()
         self.token_property_keys = set()
         self.type_properties = set()
         self.token_properties = set()
         self.is_word = False
-        self._lookup_dict = None
 
-    def optimize_lookups(self):
+        self._ids = bytearray()
+        self._begins = array('d')
+        self._ends = array('d')
+        self._label_table = _InternTable()
+        self._labels = array('i')
+        self._speaker_table = _InternTable()
+        self._speakers = array('i')
+        self._previous_ids = bytearray()
+        self._super_ids = bytearray()
+        self._type_columns = {}
+        self._token_columns = {}
+        self._subannotations = {}
+        self._lookup_index = None
+
+    def __len__(self):
+        return len(self._begins)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [PGAnnotationRow(self, i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if key < 0 or key >= len(self):
+            raise IndexError('Annotation index out of range')
+        return PGAnnotationRow(self, key)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield PGAnnotationRow(self, i)
+
+    def add_row(self, label, begin, end, speaker=None, previous_id=None, super_id=None,
+                type_properties=None, token_properties=None, id=None):
         """
-        optimizes the lookup dictionary
+        Add an annotation
+
+        Parameters
+        ----------
+        label : str
+            Label of the annotation
+        begin : float
+            Beginning of the annotation
+        end : float
+            End of the annotation
+        speaker : str, optional
+            Speaker of the annotation
+        previous_id : str, optional
+            Id of the preceding annotation
+        super_id : str, optional
+            Id of the containing annotation
+        type_properties : dict, optional
+            Type properties of the annotation
+        token_properties : dict, optional
+            Token properties of the annotation
+        id : :class:`uuid.UUID` or str, optional
+            Id of the annotation, a new id is generated if not specified
+
+        Returns
+        -------
+        int
+            Index of the added annotation
         """
-        if self._lookup_dict is not None:
-            return
-        self._list = sorted(self._list, key=lambda x: x.begin)
-        if len(self._list) > 1000:
-            self._lookup_dict = {}
-            cur = 0
-            while cur < len(self._list):
-                self._lookup_dict[cur] = self._list[cur].begin
-                cur += 1000
+        if begin is None:
+            begin = float('nan')
+        if end is None:
+            end = float('nan')
+        if begin > end:
+            begin, end = end, begin
+        index = len(self)
+        if id is None:
+            id = uuid1().bytes
+        self._ids += _id_bytes(id)
+        self._begins.append(begin)
+        self._ends.append(end)
+        self._labels.append(self._label_table.intern(label))
+        self._speakers.append(self._speaker_table.intern(speaker))
+        self._previous_ids += _id_bytes(previous_id)
+        self._super_ids += _id_bytes(super_id)
+        for columns in (self._type_columns, self._token_columns):
+            for v in columns.values():
+                v.append(_MISSING)
+        if type_properties:
+            for k, v in type_properties.items():
+                _set_property(self._type_columns, k, index, v, index + 1)
+                self.type_property_keys.add(k)
+                self.type_properties.add((k, str if isinstance(v, list) else type(v)))
+        if label is not None:
+            self.type_property_keys.add('label')
+            self.token_property_keys.add('label')
+        if token_properties:
+            for k, v in token_properties.items():
+                _set_property(self._token_columns, k, index, v, index + 1)
+                self.token_property_keys.add(k)
+                if v is not None:
+                    self.token_properties.add((k, type(v)))
+        self._lookup_index = None
+        return index
 
     def add(self, annotation):
         """
@@ -146,16 +441,133 @@ class PGAnnotationType(object):
         annotation :class: `~polyglotdb.io.types.BaseAnnotation`
             the annotation to add
         """
-        self._list.append(annotation)
-        self.type_property_keys.update(annotation.type_keys())
-        for k, v in annotation.type_properties.items():
-            if isinstance(v, list):
-                t = str
-            else:
-                t = type(v)
-            self.type_properties.add((k, t))
-        self.token_property_keys.update(annotation.token_keys())
-        self.token_properties.update((k, type(v)) for k, v in annotation.token_properties.items() if v is not None)
+        index = self.add_row(annotation.label, annotation.begin, annotation.end, speaker=annotation.speaker,
+                             previous_id=annotation.previous_id, super_id=annotation.super_id,
+                             type_properties=annotation.type_properties,
+                             token_properties=annotation.token_properties, id=annotation.id)
+        if annotation.subannotations:
+            self._subannotations[index] = list(annotation.subannotations)
+
+    def add_subannotation(self, index, subannotation):
+        """
+        Add a subannotation to an annotation
+
+        Parameters
+        ----------
+        index : int
+            Index of the annotation
+        subannotation : :class:`PGSubAnnotation`
+            Subannotation to add
+        """
+        if index not in self._subannotations:
+            self._subannotations[index] = []
+        self._subannotations[index].append(subannotation)
+
+    def set_label(self, index, label):
+        self._labels[index] = self._label_table.intern(label)
+
+    def set_type_property(self, index, key, value):
+        _set_property(self._type_columns, key, index, value, len(self))
+
+    def row_id(self, index):
+        return _get_id(self._ids, index)
+
+    def row_id_bytes(self, index):
+        return bytes(self._ids[index * 16:(index + 1) * 16])
+
+    def set_super_id(self, index, super_id):
+        _set_id(self._super_ids, index, super_id)
+
+    def row_label(self, index):
+        return self._label_table.get(self._labels[index])
+
+    def row_speaker(self, index):
+        return self._speaker_table.get(self._speakers[index])
+
+    def row_times(self, index):
+        return _get_time(self._begins, index), _get_time(self._ends, index)
+
+    def row_subannotations(self, index):
+        return self._subannotations.get(index, ())
+
+    def row_midpoint(self, index):
+        begin = self._begins[index]
+        midpoint = (self._ends[index] - begin) / 2 + begin
+        if midpoint != midpoint:
+            return None
+        return midpoint
+
+    def row_super_id(self, index):
+        return _get_id(self._super_ids, index)
+
+    def row_previous_id(self, index):
+        return _get_id(self._previous_ids, index)
+
+    def _row_properties(self, columns, index):
+        # Sorted keys and values of the properties of a row, with the label as a property,
+        # matching PGAnnotation.type_keys and PGAnnotation.type_values
+        properties = {}
+        for k, v in columns.items():
+            value = v[index]
+            if value is not _MISSING:
+                properties[k] = value
+        if properties:
+            properties = normalize_values_for_neo4j(properties)
+        label = self.row_label(index)
+        if label is not None:
+            properties['label'] = label
+        keys = sorted(properties)
+        return keys, [properties[k] for k in keys]
+
+    def row_type_keys(self, index):
+        return self._row_properties(self._type_columns, index)[0]
+
+    def row_type_values(self, index):
+        return iter(self._row_properties(self._type_columns, index)[1])
+
+    def row_token_keys(self, index):
+        return self._row_properties(self._token_columns, index)[0]
+
+    def row_token_values(self, index):
+        return iter(self._row_properties(self._token_columns, index)[1])
+
+    def row_token_properties(self, index):
+        """
+        Get the normalized token properties of an annotation, including its label
+
+        Parameters
+        ----------
+        index : int
+            Index of the annotation
+
+        Returns
+        -------
+        dict
+            Token property values keyed by name
+        """
+        return dict(zip(*self._row_properties(self._token_columns, index)))
+
+    def row_sha(self, index, corpus=None):
+        return self.row_type(index, corpus)[0]
+
+    def row_type(self, index, corpus=None):
+        """
+        Get the type id and type values of an annotation, hashing the values only once
+
+        Parameters
+        ----------
+        index : int
+            Index of the annotation
+        corpus : str
+            Name of the corpus, defaults to None
+
+        Returns
+        -------
+        tuple
+            Type id followed by the values of :meth:`row_type_keys`
+        """
+        values = self._row_properties(self._type_columns, index)[1]
+        return tuple([make_type_id(values, corpus)] + values)
 
     @property
     def speakers(self):
@@ -168,54 +580,130 @@ class PGAnnotationType(object):
             a set of speakers
         """
         speakers = set()
-        for x in self:
-            s = 'unknown'
-            if x.speaker is not None:
-                s = x.speaker
-            speakers.add(s)
+        for s in set(self._speakers):
+            speaker = self._speaker_table.get(s)
+            if speaker is None:
+                speaker = 'unknown'
+            speakers.add(speaker)
         return speakers
 
+    def _sort(self):
+        # Reorder all columns by begin time, keeping the relative order of annotations
+        # with the same begin time
+        n = len(self)
+        order = sorted(range(n), key=lambda i: _sort_time(self._begins[i]))
+        if order == list(range(n)):
+            return
+        new_positions = [0] * n
+        for new, old in enumerate(order):
+            new_positions[old] = new
+
+        def reorder_ids(ids):
+            return bytearray(b''.join(ids[i * 16:(i + 1) * 16] for i in order))
+
+        self._ids = reorder_ids(self._ids)
+        self._previous_ids = reorder_ids(self._previous_ids)
+        self._super_ids = reorder_ids(self._super_ids)
+        self._begins = array('d', (self._begins[i] for i in order))
+        self._ends = array('d', (self._ends[i] for i in order))
+        self._labels = array('i', (self._labels[i] for i in order))
+        self._speakers = array('i', (self._speakers[i] for i in order))
+        for columns in (self._type_columns, self._token_columns):
+            for k, v in columns.items():
+                columns[k] = [v[i] for i in order]
+        self._subannotations = {new_positions[k]: v for k, v in self._subannotations.items()}
+
+    def optimize_lookups(self):
+        """
+        Sorts the annotations by their begin time and builds the index used by
+        :meth:`lookup` and :meth:`lookup_range`
+        """
+        if self._lookup_index is not None:
+            return
+        self._build_index()
+
+    def _build_index(self):
+        # For each speaker (and for all speakers, under None), annotations are indexed
+        # by begin time, along with the running maximum of their end times, so that
+        # the first annotation containing a time point can be found by bisection, and
+        # by midpoint, so that annotations with midpoints in a range are a single slice
+        self._sort()
+        rows = {None: array('i', range(len(self)))}
+        for i, s in enumerate(self._speakers):
+            if s < 0:
+                continue
+            s = self._speaker_table.get(s)
+            if s not in rows:
+                rows[s] = array('i')
+            rows[s].append(i)
+        speaker_aliases = {}
+        for s, v in list(rows.items()):
+            if s is not None and len(v) == len(self):
+                # A single speaker shares the index for all speakers
+                del rows[s]
+                speaker_aliases[s] = None
+        all_midpoints = array('d', (_sort_time((e - b) / 2 + b) for b, e in zip(self._begins, self._ends)))
+        self._lookup_index = {}
+        for s, v in rows.items():
+            begins = array('d', (_sort_time(self._begins[i]) for i in v))
+            max_ends = array('d')
+            max_end = float('-inf')
+            for i in v:
+                # Missing end times never contain a time point, so they don't raise the maximum
+                max_end = max(max_end, _sort_time(self._ends[i]))
+                max_ends.append(max_end)
+            by_midpoint = array('i', sorted(range(len(v)), key=lambda i: all_midpoints[v[i]]))
+            midpoints = array('d', (all_midpoints[v[i]] for i in by_midpoint))
+            self._lookup_index[s] = (v, begins, max_ends, midpoints, by_midpoint)
+        for s, alias in speaker_aliases.items():
+            self._lookup_index[s] = self._lookup_index[alias]
+
+    def clear_lookups(self):
+        """
+        Remove the index built by :meth:`optimize_lookups`, to free its memory once
+        no more lookups are needed
+        """
+        self._lookup_index = None
+
+    def _speaker_index(self, speaker):
+        if self._lookup_index is None:
+            self._build_index()
+        return self._lookup_index.get(speaker, None)
+
     def lookup(self, timepoint, speaker=None):
         """
-        Searches the lookup_dict for a particular begin time, and optionally a speaker 
+        Searches for the first annotation (by begin time) that contains a time point,
+        optionally only for a particular speaker
 
         Parameters
         ----------
         timepoint : double
-            the begin of the desired linguistic object
+            the time point that the annotation should contain
         speaker : str
             Defaults to None
+
+        Returns
+        -------
+        :class:`~polyglotdb.io.types.standardized.PGAnnotationRow` or None
+            the annotation containing the time point, if one exists
         """
-        if self._lookup_dict is not None:
-            prev = 0
-            for ind, time in sorted(self._lookup_dict.items()):
-                if timepoint < time:
-                    if prev != 0:
-                        prev -= 500
-                    lookup_list = self._list[prev:ind + 100]
-                    break
-                prev = ind
-            else:
-                if ind != 0:
-                    ind -= 500
-                lookup_list = self._list[ind:]
-        else:
-            lookup_list = self._list
-        if speaker is None:
-            return next((x for x in lookup_list
-                         if timepoint >= x.begin and
-                         timepoint <= x.end),
-                        None)
-        else:
-            return next((x for x in lookup_list
-                         if x.speaker == speaker and
-                         timepoint >= x.begin and
-                         timepoint <= x.end),
-                        None)
+        index = self._speaker_index(speaker)
+        if index is None:
+            return None
+        rows, begins, max_ends, midpoints, by_midpoint = index
+        # Only annotations beginning at or before the time point can contain it, and the
+        # first of them that ends at or after the time point is where the running maximum
+        # of end times reaches the time point
+        candidates = bisect_right(begins, timepoint)
+        first = bisect_left(max_ends, timepoint, 0, candidates)
+        if first < candidates:
+            return PGAnnotationRow(self, rows[first])
+        return None
 
     def lookup_range(self, begin, end, speaker=None):
         """
-        Searches the lookup_dict for objects between begin time, end time, and optionally a speaker 
+        Searches for annotations with midpoints between begin time and end time,
+        and optionally a speaker
 
         Parameters
         ----------
@@ -225,43 +713,18 @@ class PGAnnotationType(object):
             the upper bound of the range
         speaker : str
             Defaults to None
-        """
-        if self._lookup_dict is not None:
-            prev = 0
-            mapping = sorted(self._lookup_dict.items())
-            for i, (ind, time) in enumerate(mapping):
-                if begin < time:
-                    if end < time:
-                        lookup_list = self._list[prev:ind]
-                    else:
-                        try:
-                            lookup_list = self._list[prev:mapping[i + 1][0]]
-                        except IndexError:
-                            lookup_list = self._list[prev:]
-                    break
-                prev = ind
-            else:
-                lookup_list = self._list[ind:]
-        else:
-            lookup_list = self._list
-        if speaker is None:
-            return sorted([x for x in lookup_list
-                           if x.midpoint >= begin and
-                           x.midpoint <= end],
-                          key=lambda x: x.begin)
-        else:
-            return sorted([x for x in lookup_list
-                           if x.speaker == speaker and
-                           x.midpoint >= begin and
-                           x.midpoint <= end],
-                          key=lambda x: x.begin)
-
-    def __getitem__(self, key):
-        return self._list[key]
 
-    def __iter__(self):
-        for a in self._list:
-            yield a
+        Returns
+        -------
+        list
+            the annotations in the range, sorted by begin time
+        """
+        index = self._speaker_index(speaker)
+        if index is None:
+            return []
+        rows, begins, max_ends, midpoints, by_midpoint = index
+        positions = by_midpoint[bisect_left(midpoints, begin):bisect_right(midpoints, end)]
+        return [PGAnnotationRow(self, rows[i]) for i in sorted(positions)]
 
 
 class PGSubAnnotation(PGAnnotation):
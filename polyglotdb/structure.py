@@ -452,6 +452,62 @@ class Hierarchy(object):
             self.speaker_properties.update(other.speaker_properties)
             self.discourse_properties.update(other.discourse_properties)
 
+    def merge(self, other):
+        '''
+        Add linguistic types, properties and subannotations from another Hierarchy
+        that are not already present.  Unlike :meth:`update`, existing
+        relationships between linguistic types (i.e., from enrichment) are never changed,
+        see :meth:`conflicts` for checking whether they differ.
+
+        Parameters
+        ----------
+        other : Hierarchy
+            Hierarchy to be merged in
+
+        Returns
+        -------
+        bool
+            True if anything was added to the Hierarchy
+        '''
+        changed = False
+        for k, v in other.items():
+            if k not in self._data:
+                self._data[k] = v
+                changed = True
+        for attr in ['subannotations', 'subannotation_properties', 'type_properties', 'token_properties']:
+            current = getattr(self, attr)
+            for k, v in getattr(other, attr).items():
+                if k not in current:
+                    current[k] = set(v)
+                    changed = True
+                elif not set(v) <= current[k]:
+                    current[k] = current[k] | set(v)
+                    changed = True
+        for attr in ['speaker_properties', 'discourse_properties']:
+            current = getattr(self, attr)
+            if not getattr(other, attr) <= current:
+                current.update(getattr(other, attr))
+                changed = True
+        return changed
+
+    def conflicts(self, other):
+        '''
+        Find linguistic types that are contained by different types in another Hierarchy,
+        such as phones contained by syllables after syllabic encoding but by words
+        in a newly parsed Hierarchy
+
+        Parameters
+        ----------
+        other : Hierarchy
+            Hierarchy to compare to
+
+        Returns
+        -------
+        list
+            Linguistic types in both Hierarchies that have different supertypes
+        '''
+        return sorted(k for k, v in other.items() if k in self._data and self._data[k] != v)
+
     @property
     def lowest(self):
         for k in self.keys():
@@ -22,6 +22,29 @@ def pytest_addoption(parser):
                      help="skip acoustic tests")
 
 
+class StubCorpus(object):
+    """
+    Stand-in for a corpus context in tests that don't use a database, with a real
+    config whose directories are in a temporary directory, and any other attributes
+    that a test needs given as keyword arguments
+    """
+    corpus_name = 'test_stub'
+    cypher_safe_name = '`test_stub`'
+
+    def __init__(self, data_dir, **kwargs):
+        self.config = CorpusConfig(self.corpus_name, data_dir=data_dir)
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+
+@pytest.fixture
+def stub_corpus(tmpdir):
+    def make(**kwargs):
+        return StubCorpus(str(tmpdir.join('stub_data')), **kwargs)
+
+    return make
+
+
 @pytest.fixture(scope='session')
 def test_dir():
     base = os.path.dirname(os.path.abspath(__file__))
@@ -31,6 +54,30 @@ def test_dir():
     return os.path.join(base, 'data')  # was tests/data
 
 
+@pytest.fixture(scope='session')
+def synthetic_vowel_path(test_dir):
+    """
+    A three second vowel with formants at 700, 1200, 2600, 3500 and 4500 Hz and a pitch of
+    200 Hz with 5% vibrato at 3 Hz, followed by half a second of silence
+    """
+    import numpy as np
+    from scipy.io import wavfile
+    from scipy.signal import lfilter
+    path = os.path.join(test_dir, 'generated', 'synthetic_vowel.wav')
+    sr = 16000
+    t = np.arange(3 * sr) / sr
+    phase = np.cumsum(200 * (1 + 0.05 * np.sin(2 * np.pi * 3 * t)) / sr)
+    signal = np.zeros(t.shape[0])
+    signal[np.where(np.diff(np.floor(phase)) > 0)[0] + 1] = 1
+    for frequency, bandwidth in [(700, 80), (1200, 90), (2600, 120), (3500, 200), (4500, 250)]:
+        r = np.exp(-np.pi * bandwidth / sr)
+        signal = lfilter([1 - r], [1, -2 * r * np.cos(2 * np.pi * frequency / sr), r * r], signal)
+    signal = lfilter([1], [1, -0.9], signal)
+    signal = np.concatenate([signal / np.max(np.abs(signal)) * 0.5, np.zeros(sr // 2)])
+    wavfile.write(path, sr, (signal * 32767).astype(np.int16))
+    return path
+
+
 @pytest.fixture(scope='session')
 def buckeye_test_dir(test_dir):
     return os.path.join(test_dir, 'buckeye')
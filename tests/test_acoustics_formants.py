@@ -162,3 +162,42 @@ def test_extract_formants_full(acoustic_utt_config, praat_path, export_test_dir)
             assert (r['F1'])
 
             # assert False, "dumb assert
+
+
+def test_numpy_formant_tracks(synthetic_vowel_path):
+    from conch.analysis.segments import FileSegment
+    from polyglotdb.acoustics.batch import NumpyFormantTrackFunction, FORMANT_METHODS
+    segments = [FileSegment(synthetic_vowel_path, 0.1 + 0.2 * i, 0.25 + 0.2 * i, padding=0.1) for i in range(13)]
+    for method in FORMANT_METHODS:
+        formant_function = NumpyFormantTrackFunction(max_frequency=5500, num_formants=5, method=method)
+        outputs = formant_function.analyze_many(segments)
+        assert (outputs[0] == formant_function(segments[0]))
+        for segment, output in zip(segments, outputs):
+            assert (len(output) >= 15)
+            for time, values in output.items():
+                assert (segment.begin <= time <= segment.end)
+                assert (sorted(values) == ['B1', 'B2', 'B3', 'B4', 'B5', 'F1', 'F2', 'F3', 'F4', 'F5'])
+                for formant, expected in [('F1', 700), ('F2', 1200), ('F3', 2600)]:
+                    assert (abs(values[formant] / expected - 1) < 0.05)
+
+
+def test_load_segments(synthetic_vowel_path):
+    import librosa
+    import numpy as np
+    from conch.analysis.segments import FileSegment
+    from polyglotdb.acoustics.batch import load_segments, segment_signal
+    whole, sr = librosa.load(synthetic_vowel_path, sr=None, mono=False)
+    whole = np.atleast_2d(whole).astype(np.float64)
+    segments = [FileSegment(synthetic_vowel_path, 1.0, 1.2, padding=0.1),
+                FileSegment(synthetic_vowel_path, 0.02, 0.1, padding=0.1),
+                FileSegment(synthetic_vowel_path, 3.4, 3.5, padding=0.1)]
+    for i in range(len(segments)):
+        signal, span_sr, offset, duration = load_segments(synthetic_vowel_path, segments[:i + 1])
+        assert (span_sr == sr and duration == whole.shape[1] / sr)
+        # Only the span of the segments is loaded
+        assert (signal.shape[1] < whole.shape[1] or i == 2)
+        for segment in segments[:i + 1]:
+            part, first_time = segment_signal(signal, sr, segment, offset, duration)
+            expected, expected_time = segment_signal(whole, sr, segment)
+            assert (first_time == expected_time)
+            assert (np.array_equal(part, expected))
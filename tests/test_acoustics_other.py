@@ -47,3 +47,239 @@ def test_analyze_script(acoustic_utt_config, praat_path, praatscript_test_dir):
         assert (len(results) > 0)
         for r in results:
             assert (r.values)
+
+
+def test_generate_segments(acoustic_utt_config):
+    from polyglotdb.acoustics.segments import generate_segments
+    with CorpusContext(acoustic_utt_config) as g:
+        g.encode_class(['s', 'z', 'sh', 'zh'], 'sibilant')
+        segment_mapping = generate_segments(g, g.phone_name, 'sibilant', file_type='consonant')
+        q = g.query_graph(g.phone).filter(g.phone.subset == 'sibilant')
+        q = q.columns(g.phone.id.column_name('id'), g.phone.label.column_name('label'),
+                      g.phone.speaker.name.column_name('speaker'),
+                      g.phone.discourse.name.column_name('discourse'))
+        expected = {r['id']: (r['label'], r['speaker'], r['discourse']) for r in q.all()}
+        assert (len(segment_mapping) == len(expected))
+        for seg in segment_mapping:
+            assert (expected[seg['id']] == (seg['label'], seg['speaker'], seg['discourse']))
+            assert (seg['annotation_type'] == g.phone_name)
+            assert (seg['end'] > seg['begin'])
+
+        speaker = segment_mapping[0]['speaker']
+        subset_mapping = generate_segments(g, g.phone_name, 'sibilant', file_type='consonant', speakers=[speaker])
+        assert (len(subset_mapping) == len([x for x in expected.values() if x[1] == speaker]))
+
+
+def test_prepare_discourse_audio(textgrid_test_dir, tmpdir, monkeypatch):
+    import shutil
+    from scipy.io import wavfile
+    from polyglotdb.acoustics import io
+    from polyglotdb.acoustics.io import prepare_discourse_audio
+    wav_path = os.path.join(textgrid_test_dir, 'fave', 'fave_stereo.wav')
+    audio_dir = str(tmpdir.join('fave_stereo'))
+    info = prepare_discourse_audio('fave_stereo', wav_path, audio_dir)
+    assert (info['sampling_rate'] == 18000)
+    assert (info['num_channels'] == 2)
+    for name, rate in [('consonant', 16000), ('vowel', 11000), ('low_freq', 2000)]:
+        sr, signal = wavfile.read(os.path.expanduser(info['{}_file_path'.format(name)]))
+        assert (sr == rate)
+        assert (signal.shape[1] == 2)
+    # Existing copies are not created again
+    mtime = os.path.getmtime(os.path.join(audio_dir, 'vowel.wav'))
+    prepare_discourse_audio('fave_stereo', wav_path, audio_dir)
+    assert (os.path.getmtime(os.path.join(audio_dir, 'vowel.wav')) == mtime)
+
+    # With sox, each copy is resampled from the previous one
+    calls = []
+
+    def resample_audio(filepath, new_filepath, new_sr):
+        calls.append((os.path.basename(filepath), os.path.basename(new_filepath), new_sr))
+        shutil.copy(filepath, new_filepath)
+
+    monkeypatch.setattr(io.shutil, 'which', lambda x: '/usr/bin/sox')
+    monkeypatch.setattr(io, 'resample_audio', resample_audio)
+    prepare_discourse_audio('fave_stereo', wav_path, str(tmpdir.join('sox')))
+    assert (calls == [('fave_stereo.wav', 'consonant.tmp.wav', 16000), ('consonant.wav', 'vowel.tmp.wav', 11000),
+                      ('vowel.wav', 'low_freq.tmp.wav', 2000)])
+
+
+def test_audio_store(textgrid_test_dir, tmpdir, monkeypatch):
+    import shutil
+    from polyglotdb.acoustics.io import prepare_discourse_audio
+    from polyglotdb.acoustics.store import AudioStore
+    wav_path = os.path.join(textgrid_test_dir, 'fave', 'fave_stereo.wav')
+    store = AudioStore(str(tmpdir.join('store')))
+    prepare_discourse_audio('first', wav_path, str(tmpdir.join('first')), store.directory)
+    report = store.report()
+    assert (report['entries'] == 3 and report['orphans'] == 0)
+
+    # A discourse with the same audio links the stored files instead of resampling
+    prepare_discourse_audio('second', wav_path, str(tmpdir.join('second')), store.directory)
+    assert (store.report()['entries'] == 3)
+    assert (os.stat(str(tmpdir.join('second', 'vowel.wav'))).st_nlink == 3)
+
+    shutil.rmtree(str(tmpdir.join('first')))
+    shutil.rmtree(str(tmpdir.join('second')))
+    assert (store.report()['orphans'] == 3)
+    assert (store.collect_garbage()[0] == 3)
+    assert (store.report()['entries'] == 0)
+
+    # Without hard links the store isn't used, as copied files would look like orphans
+    def link(source, destination):
+        raise OSError('Hard links are not supported')
+
+    monkeypatch.setattr(os, 'link', link)
+    assert not store.can_link(str(tmpdir))
+    prepare_discourse_audio('third', wav_path, str(tmpdir.join('third')), store.directory)
+    assert (os.path.exists(str(tmpdir.join('third', 'vowel.wav'))))
+    assert (store.report()['entries'] == 0)
+
+
+def _segment_duration(segment):
+    return segment['end'] - segment['begin']
+
+
+def test_analyze_speakers(stub_corpus):
+    from conch.analysis.segments import SegmentMapping
+    from polyglotdb.acoustics.scheduler import analyze_speakers
+
+    context = stub_corpus()
+
+    mapping = SegmentMapping()
+    for speaker in ['a', 'b', 'c']:
+        for i in range(40):
+            mapping.add_file_segment('{}.wav'.format(speaker), i, i + 0.5, 0, speaker=speaker)
+    mapping.add_file_segment('d.wav', 0, 1, 0, speaker='d')
+    segment_mapping = mapping.grouped_mapping('speaker')
+    segment_mapping[('e',)] = []
+
+    for num_jobs in [1, 2]:
+        functions = []
+        saved = {}
+
+        def make_function(speaker):
+            functions.append(speaker)
+            return _segment_duration
+
+        progress = []
+        assert analyze_speakers(context, segment_mapping, make_function, lambda o, s: saved.update({s: o}),
+                                num_jobs=num_jobs, call_back=lambda *args: progress.append(args))
+        assert (sorted(functions) == [('a',), ('b',), ('c',), ('d',)])
+        assert (sorted(saved) == [('a',), ('b',), ('c',), ('d',), ('e',)])
+        assert (saved[('e',)] == {})
+        for speaker, segments in segment_mapping.items():
+            assert (saved[speaker] == {s: 0.5 if speaker != ('d',) else 1 for s in segments})
+        assert (progress[1] == (0, 121))
+        assert (progress[-1] == (121,))
+
+        saved = {}
+        assert not analyze_speakers(context, segment_mapping, make_function, lambda o, s: saved.update({s: o}),
+                                    num_jobs=num_jobs, stop_check=lambda: True)
+        assert (len(saved) < len(segment_mapping))
+
+
+class _CountingDuration(object):
+    def __init__(self, scale):
+        self.scale = scale
+        self.calls = 0
+
+    def __call__(self, segment):
+        self.calls += 1
+        return (segment['end'] - segment['begin']) * self.scale
+
+
+class _SlotDuration(object):
+    __slots__ = ('scale',)
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def __call__(self, segment):
+        return (segment['end'] - segment['begin']) * self.scale
+
+
+def test_analysis_cache(tmpdir, stub_corpus):
+    from conch.analysis.segments import SegmentMapping
+    from polyglotdb.acoustics.cache import AnalysisCache, function_fingerprint
+    from polyglotdb.acoustics.scheduler import analyze_speakers
+
+    wav_path = str(tmpdir.join('a.wav'))
+    with open(wav_path, 'wb') as f:
+        f.write(b'RIFF0000WAVE')
+    cache_dir = str(tmpdir.join('cache'))
+
+    context = stub_corpus()
+    context.config.analysis_cache_dir = cache_dir
+
+    mapping = SegmentMapping()
+    for i in range(20):
+        mapping.add_file_segment(wav_path, i, i + 0.5, 0, speaker='a', padding=0.1)
+    segment_mapping = mapping.grouped_mapping('speaker')
+
+    assert (function_fingerprint(_CountingDuration(1)) != function_fingerprint(_CountingDuration(2)))
+
+    function = _CountingDuration(1)
+    saved = {}
+    assert analyze_speakers(context, segment_mapping, lambda s: function, lambda o, s: saved.update(o), num_jobs=1)
+    assert (function.calls == 20)
+    assert (len(saved) == 20)
+
+    saved = {}
+    function = _CountingDuration(1)
+    assert analyze_speakers(context, segment_mapping, lambda s: function, lambda o, s: saved.update(o), num_jobs=1)
+    assert (function.calls == 0)
+    assert (saved == {s: 0.5 for s in mapping})
+
+    function = _CountingDuration(2)
+    assert analyze_speakers(context, segment_mapping, lambda s: function, lambda o, s: saved.update(o), num_jobs=1)
+    assert (function.calls == 20)
+    assert (saved == {s: 1 for s in mapping})
+
+    # Functions that can only be described by their memory address are not cached
+    assert (function_fingerprint(_SlotDuration(3)) is None)
+    assert analyze_speakers(context, segment_mapping, lambda s: _SlotDuration(3),
+                            lambda o, s: saved.update(o), num_jobs=1)
+    assert (saved == {s: 1.5 for s in mapping})
+
+    with AnalysisCache(cache_dir) as cache:
+        report = cache.report()
+        assert (report['entries'] == 40)
+        removed, removed_size = cache.evict(report['size'] // 2)
+        assert (removed >= 20)
+        assert (cache.report()['size'] <= report['size'] // 2)
+        cache.clear()
+        assert (cache.report()['entries'] == 0)
+
+
+class _ScriptFunction(object):
+    def __init__(self, script_path):
+        self.praat_script_path = script_path
+
+    def __call__(self, segment):
+        return segment['begin']
+
+
+def test_analysis_cache_paths(tmpdir, monkeypatch):
+    from conch.analysis.segments import FileSegment
+    from polyglotdb.acoustics.cache import AnalysisCache, function_fingerprint
+
+    monkeypatch.setenv('HOME', str(tmpdir))
+    with open(str(tmpdir.join('a.wav')), 'wb') as f:
+        f.write(b'RIFF0000WAVE')
+    script_path = str(tmpdir.join('script.praat'))
+    with open(script_path, 'w') as f:
+        f.write('echo a')
+
+    with AnalysisCache(str(tmpdir.join('cache'))) as cache:
+        fingerprint = function_fingerprint(_ScriptFunction(script_path))
+        segment = FileSegment(os.path.join('~', 'a.wav'), 0, 1, 0, padding=0.1)
+        key = cache.segment_key(segment, fingerprint)
+        assert (key == cache.segment_key(FileSegment(str(tmpdir.join('a.wav')), 0, 1, 0, padding=0.1),
+                                         fingerprint))
+        cache.put_many([(key, 0)])
+        assert (cache.get_many([key]) == {key: 0})
+
+    with open(script_path, 'w') as f:
+        f.write('echo b')
+    os.utime(script_path, (0, 0))
+    assert (function_fingerprint(_ScriptFunction(script_path)) != fingerprint)
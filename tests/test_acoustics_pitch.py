@@ -154,6 +154,64 @@ def test_analyze_pitch_gendered_praat(acoustic_utt_config, praat_path):
         assert (g.has_pitch('acoustic_corpus'))
 
 
+@acoustic
+def test_analyze_pitch_speaker_adjusted_sampled(acoustic_utt_config, praat_path):
+    with CorpusContext(acoustic_utt_config) as g:
+        g.reset_acoustics()
+        g.config.pitch_source = 'praat'
+        g.config.praat_path = praat_path
+        g.config.pitch_algorithm = 'speaker_adjusted'
+        g.config.pitch_sample_size = 2
+        g.analyze_pitch(recalculate_speaker_statistics=True)
+        assert (g.has_pitch('acoustic_corpus'))
+        assert (g.hierarchy.has_speaker_property('pitch_mean'))
+        q = g.query_speakers().columns(g.speaker.name.column_name('name'),
+                                       g.speaker.pitch_mean.column_name('mean'),
+                                       g.speaker.pitch_statistics_utterances.column_name('utterances'))
+        results = q.all()
+        assert (len(results) > 0)
+        for r in results:
+            assert (r['mean'] > 0)
+            assert (r['utterances'] <= 2)
+
+
+def test_pitch_statistics():
+    from polyglotdb.acoustics.pitch.base import pitch_statistics, sample_segments
+    output = {'a': {0.1: {'F0': 100}, 0.2: {'F0': None}, 0.3: {'F0': 0}},
+              'b': {0.1: {'F0': 200}, 0.2: {'F0': 150}}}
+    mean, sd = pitch_statistics(output)
+    assert (mean == 150)
+    assert (abs(sd - 50) < 0.0001)
+    assert (pitch_statistics({'a': {0.1: {'F0': 100}}}) is None)
+
+    segments = list(range(100))
+    assert (sample_segments(segments, None, 'a') == segments)
+    assert (sample_segments(segments, 200, 'a') == segments)
+    sample = sample_segments(segments, 10, 'a')
+    assert (len(set(sample)) == 10)
+    assert (sample == sample_segments(list(reversed(segments)), 10, 'a'))
+
+
+def test_numpy_pitch_tracks(synthetic_vowel_path):
+    import math
+    from conch.analysis.segments import FileSegment
+    from polyglotdb.acoustics.batch import NumpyPitchTrackFunction, PITCH_METHODS
+    segments = [FileSegment(synthetic_vowel_path, 0.1 + 0.2 * i, 0.25 + 0.2 * i, padding=0.1) for i in range(13)]
+    silence = FileSegment(synthetic_vowel_path, 3.1, 3.4, padding=0.05)
+    for method in PITCH_METHODS:
+        pitch_function = NumpyPitchTrackFunction(min_pitch=55, max_pitch=480, method=method)
+        outputs = pitch_function.analyze_many(segments + [silence])
+        assert (outputs[0] == pitch_function(segments[0]))
+        for segment, output in zip(segments, outputs):
+            assert (len(output) >= 15)
+            for time, values in output.items():
+                assert (segment.begin <= time <= segment.end)
+                expected = 200 * (1 + 0.05 * math.sin(2 * math.pi * 3 * time))
+                assert (abs(values['F0'] / expected - 1) < 0.01)
+        assert (outputs[-1])
+        assert (all(v['F0'] is None for v in outputs[-1].values()))
+
+
 def test_query_pitch(acoustic_utt_config):
     with CorpusContext(acoustic_utt_config) as g:
         g.config.pitch_source = 'dummy'
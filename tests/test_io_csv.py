@@ -71,3 +71,263 @@ def test_to_csv(acoustic_utt_config, export_test_dir):
             i += 1
 
 
+def test_graph_csv_writer(tmpdir):
+    from polyglotdb.io.importer import GraphCSVWriter
+    directory = str(tmpdir)
+    with GraphCSVWriter(directory, max_open_files=2) as writer:
+        for i in range(3):
+            for name in ['a.csv', 'b.csv', 'c.csv']:
+                writer.writerows(name, [(i, name, None)])
+                assert (len(writer._files) <= 2)
+    for name in ['a.csv', 'b.csv', 'c.csv']:
+        with open(os.path.join(directory, name), encoding='utf8') as f:
+            assert (f.read().splitlines() == ['{},{},'.format(i, name) for i in range(3)])
+
+
+def test_graph_csv_writer_extend_header(tmpdir):
+    from polyglotdb.io.importer import GraphCSVWriter
+    directory = str(tmpdir)
+    base = ['begin', 'end', 'type_id', 'id', 'previous', 'speaker', 'discourse']
+
+    with open(os.path.join(directory, 's_word.csv'), 'w', encoding='utf8') as f:
+        f.write(','.join(base + ['pos']) + '\n')
+    with GraphCSVWriter(directory) as writer:
+        writer.extend_header('s_word.csv', base + ['pos'])
+        writer.writerows('s_word.csv', [list(range(7)) + ['NN']])
+        writer.extend_header('s_word.csv', base + ['frequency', 'pos'])
+        assert (writer.headers['s_word.csv'] == base + ['pos', 'frequency'])
+        writer.writerows('s_word.csv', [list(range(7)) + ['VB', 3]])
+    with open(os.path.join(directory, 's_word.csv'), encoding='utf8') as f:
+        assert (f.read().splitlines() == [','.join(base + ['pos', 'frequency']),
+                                          '0,1,2,3,4,5,6,NN,', '0,1,2,3,4,5,6,VB,3'])
+
+
+def test_import_token_properties_across_discourses(graph_db):
+    from polyglotdb.io.discoursedata import DiscourseData
+    from polyglotdb.io.types.standardized import PGAnnotationType
+    from polyglotdb.structure import Hierarchy
+
+    def discourse(name, label, token_properties):
+        words = PGAnnotationType('word')
+        words.is_word = True
+        words.add_row(label, 0, 1, speaker='a', token_properties=token_properties)
+        return DiscourseData(name, {'word': words}, Hierarchy({'word': None}))
+
+    # Only the first discourse has the token property, and the last one is passed to finalize_import
+    first = discourse('first', 'cat', {'pos': 'NN'})
+    last = discourse('last', 'dog', None)
+    types, type_headers = first.types('test_token_properties')
+    for k, v in last.types('test_token_properties')[0].items():
+        types[k].update(v)
+    with CorpusContext('test_token_properties', **graph_db) as c:
+        c.reset()
+        c.initialize_import(['a'], first.token_headers)
+        c.add_types(types, type_headers)
+        c.add_discourse(first)
+        c.add_discourse(last)
+        c.finalize_import(last)
+        q = c.query_graph(c.word).order_by(c.word.label)
+        q = q.columns(c.word.label.column_name('label'), c.word.pos.column_name('pos'))
+        assert ([(x['label'], x['pos']) for x in q.all()] == [('cat', 'NN'), ('dog', None)])
+
+
+def test_read_csv_batches(tmpdir):
+    from polyglotdb.io.importer import read_csv_batches
+    path = os.path.join(str(tmpdir), 'rows.csv')
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('id,label\n')
+        for i in range(5):
+            f.write('{},{}\n'.format(i, 'a' if i % 2 else ''))
+    batches = list(read_csv_batches(path, 2))
+    assert ([len(x) for x in batches] == [2, 2, 1])
+    assert (batches[0] == [{'id': '0', 'label': None}, {'id': '1', 'label': 'a'}])
+
+
+def test_load_csv_groups(monkeypatch, stub_corpus):
+    from neo4j.exceptions import TransientError
+    from polyglotdb.io.importer import loader
+
+    context = stub_corpus()
+    loaded = []
+    failed = set()
+
+    def load_csv(corpus_context, path, statement, **kwargs):
+        if path == 'b_phone' and path not in failed:
+            failed.add(path)
+            raise TransientError('deadlock')
+        loaded.append((path, statement))
+
+    monkeypatch.setattr(loader, 'load_csv', load_csv)
+    monkeypatch.setattr(loader.time, 'sleep', lambda x: None)
+    groups = [[(s + '_' + at, 'load', 'retry') for at in ['word', 'phone']] for s in ['a', 'b', 'c']]
+    progress = []
+    assert loader.load_csv_groups(context, groups, num_sessions=2, call_back=lambda *args: progress.append(args))
+    assert (progress == [(0, 3), (1,), (2,), (3,)])
+    assert (sorted(loaded) == [('a_phone', 'load'), ('a_word', 'load'), ('b_phone', 'retry'), ('b_word', 'load'),
+                               ('c_phone', 'load'), ('c_word', 'load')])
+    paths = [x[0] for x in loaded]
+    for s in ['a', 'b', 'c']:
+        assert (paths.index(s + '_word') < paths.index(s + '_phone'))
+
+    assert not loader.load_csv_groups(context, groups, stop_check=lambda: True)
+
+
+def test_delete_in_batches(monkeypatch, stub_corpus):
+    from neo4j.exceptions import TransientError
+    from polyglotdb.io.importer import deletion
+
+    batch_size = deletion.AdaptiveBatchSize(1000, 1.0)
+    batch_size.update(1000, 0.1)
+    assert (batch_size.size == 2000)
+    batch_size.update(2000, 100)
+    assert (batch_size.size == 500)
+    batch_size.shrink()
+    assert (batch_size.size == 250)
+    for _ in range(10):
+        batch_size.shrink()
+    assert (batch_size.size == deletion.MIN_DELETE_BATCH_SIZE)
+
+    remaining = [2500]
+    limits = []
+
+    class Session(object):
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def write_transaction(self, unit_of_work, limit):
+            limits.append(limit)
+            if len(limits) == 2:
+                raise TransientError('deadlock')
+            deleted = min(limit, remaining[0])
+            remaining[0] -= deleted
+            return deleted
+
+    class Driver(object):
+        def session(self):
+            return Session()
+
+    context = stub_corpus(graph_driver=Driver())
+    monkeypatch.setattr(deletion.time, 'sleep', lambda x: None)
+    progress = deletion.DeletionProgress()
+    batch_size = deletion.AdaptiveBatchSize(1000, 1.0)
+    assert deletion.delete_in_batches(context, 'delete', batch_size, progress)
+    assert (remaining[0] == 0)
+    assert (progress.deleted == 2500)
+    assert (limits[2] == limits[1] // 2)
+
+    progress.stopped.set()
+    assert not deletion.delete_in_batches(context, 'delete', batch_size, progress)
+
+
+def test_stream_enrichment_file(tmpdir):
+    from polyglotdb.io.enrichment.helper import stream_file
+    path = os.path.join(str(tmpdir), 'lexicon.txt')
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('Word;Frequency;Neighborhood Density\n')
+        f.write('Cat;1;2.5\n')
+        f.write('dog;2;3\n')
+        f.write('mouse;x;NA\n')
+    type_data, rows = stream_file(path, labels={'cat', 'mouse'}, case_sensitive=False, sample_size=1)
+    assert (type_data == {'frequency': int, 'neighborhood_density': float})
+    assert (list(rows) == [('cat', {'frequency': 1, 'neighborhood_density': 2.5}),
+                           ('mouse', {'frequency': 'x', 'neighborhood_density': None})])
+
+    type_data, rows = stream_file(path, labels={'horse'})
+    assert (rows is None)
+
+
+def test_stream_feature_enrichment(tmpdir, stub_corpus):
+    from polyglotdb.exceptions import AlphabetError
+    from polyglotdb.io.enrichment import enrich_features_from_csv
+
+    enriched = {}
+
+    def enrich_features(rows, type_data):
+        enriched['rows'] = rows
+        enriched['data'] = [next(rows)]
+        raise ValueError
+
+    path = os.path.join(str(tmpdir), 'features.txt')
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('symbol,place\n')
+        f.write('aa,back\n')
+        f.write('zz,front\n')
+        f.write('k,velar\n')
+    c = stub_corpus(phones=['aa', 'k'], enrich_features=enrich_features)
+    with pytest.raises(ValueError):
+        enrich_features_from_csv(c, path)
+    assert (enriched['data'] == [('aa', {'place': 'back'})])
+    assert (list(enriched['rows']) == [])
+
+    c.phones = ['p']
+    with pytest.raises(AlphabetError) as e:
+        enrich_features_from_csv(c, path)
+    assert ('\'symbol\' column of {}'.format(path) in str(e.value))
+
+
+def test_load_row_stream(monkeypatch, tmpdir, stub_corpus):
+    from polyglotdb.io.importer import loader
+
+    context = stub_corpus()
+    context.config.import_backend = 'unwind'
+    context.config.import_batch_size = 2
+
+    batches = []
+    monkeypatch.setattr(loader, 'load_rows', lambda context, statement, rows, num_sessions: batches.extend(rows))
+    rows = ({'label': str(i), 'frequency': i, 'stressed': i % 2 == 0, 'other': 'ignored'} for i in range(3))
+    path = os.path.join(str(tmpdir), 'rows.csv')
+    loader.load_row_stream(context, path, ['label', 'frequency', 'stressed'], rows, 'SET n.frequency = 1')
+    assert (batches == [[{'label': '0', 'frequency': '0', 'stressed': 'True'},
+                         {'label': '1', 'frequency': '1', 'stressed': 'False'}],
+                        [{'label': '2', 'frequency': '2', 'stressed': 'True'}]])
+    assert not os.path.exists(path)
+
+
+def test_import_checkpoint(monkeypatch, tmpdir, stub_corpus):
+    from polyglotdb.io.importer import loader
+    from polyglotdb.io.importer.checkpoint import ImportCheckpoint
+    from polyglotdb.structure import Hierarchy
+
+    context = stub_corpus()
+
+    path = os.path.join(str(tmpdir), 'checkpoint.jsonl')
+    checkpoint = ImportCheckpoint(path, '/corpus')
+    checkpoint.start()
+    checkpoint.add_discourse('a')
+    checkpoint.finish_csvs(Hierarchy({'word': None, 'phone': 'word'}), '/corpus/a.TextGrid', [],
+                           {'word': {'pos', 'label'}, 'phone': {'label'}})
+
+    loaded = []
+    killed = set()
+
+    def load_csv(corpus_context, path, statement, **kwargs):
+        if path == 'a_phone.csv' and path not in killed:
+            killed.add(path)
+            raise RuntimeError('killed')
+        loaded.append((path, statement))
+
+    monkeypatch.setattr(loader, 'load_csv', load_csv)
+    groups = [[('a_word.csv', 'load', 'retry'), ('a_phone.csv', 'load', 'retry')]]
+    with pytest.raises(RuntimeError):
+        loader.load_csv_groups(context, groups, checkpoint=checkpoint)
+    with open(path, 'a', encoding='utf8') as f:
+        f.write('{"committed": "a_ph')
+
+    resumed = ImportCheckpoint.load(path)
+    assert resumed.resumed
+    assert (resumed.source == '/corpus')
+    assert resumed.has_discourse('a')
+    assert resumed.csvs_written
+    assert (resumed.csvs['last_path'] == '/corpus/a.TextGrid')
+    assert (resumed.csvs['token_properties'] == {'word': ['label', 'pos'], 'phone': ['label']})
+    assert (resumed.committed == {'a_word.csv'})
+    assert (loaded == [('a_word.csv', 'load')])
+    assert loader.load_csv_groups(context, groups, checkpoint=resumed)
+    assert (loaded == [('a_word.csv', 'load'), ('a_phone.csv', 'retry')])
+    assert ImportCheckpoint.load(path).is_committed('a_phone.csv')
+
+    resumed.remove()
+    assert ImportCheckpoint.load(path) is None
@@ -5,7 +5,7 @@ from polyglotdb.io import inspect_fave
 
 from polyglotdb import CorpusContext
 
-from polyglotdb.exceptions import TextGridError, GraphQueryError
+from polyglotdb.exceptions import TextGridError, GraphQueryError, ParseError, HierarchyError
 
 
 def test_load_fave(fave_test_dir, graph_db):
@@ -92,3 +92,116 @@ def test_load_fave_stereo(fave_test_dir, graph_db):
 
         assert (len(s['channels']) == 1)
         assert (s['channels'] == [1])
+
+
+def test_load_fave_single_pass(fave_test_dir, graph_db):
+    with CorpusContext('test_fave_single_pass', **graph_db) as c:
+        c.reset()
+        parser = inspect_fave(fave_test_dir)
+        c.load(parser, fave_test_dir, single_pass=True)
+        assert (c.hierarchy.has_type_property('word', 'transcription'))
+
+        q = c.query_graph(c.word).filter(c.word.label == 'JURASSIC')
+        q = q.filter(c.word.speaker.name == 'Gary Salvi')
+        q = q.columns(c.word.label)
+        assert (len(q.all()) == 1)
+
+        q = c.query_speakers().filter(c.speaker.name == 'Interviewer')
+        q = q.columns(c.speaker.discourses.name.column_name('discourses'))
+        interviewer = q.get()
+        assert (sorted(interviewer['discourses']) == ['fave_test', 'fave_test2'])
+
+
+def test_load_fave_bulk_files(fave_test_dir, graph_db):
+    import csv
+    import json
+    with CorpusContext('test_fave_bulk', **graph_db) as c:
+        parser = inspect_fave(fave_test_dir)
+        could_not_parse = c.load_bulk(parser, fave_test_dir)
+        assert (could_not_parse == [])
+        directory = c.config.temporary_directory('bulk')
+        with open(os.path.join(directory, 'manifest.json')) as f:
+            manifest = json.load(f)
+        assert (sorted(x[0] for x in manifest['discourses']) == ['fave_stereo', 'fave_test', 'fave_test2'])
+
+        def read(name):
+            with open(os.path.join(directory, name + '_header.csv'), newline='') as f:
+                header = next(csv.reader(f))
+            with open(os.path.join(directory, name + '.csv'), newline='') as f:
+                rows = list(csv.reader(f))
+            for row in rows:
+                assert (len(row) == len(header))
+            return rows
+
+        words = set(x[0] for x in read('word'))
+        word_types = set(x[0] for x in read('word_type'))
+        phones = set(x[0] for x in read('phone'))
+        assert (all(x[0] in words and x[1] in word_types for x in read('word_is_a')))
+        assert (all(x[0] in phones and x[1] in words for x in read('phone_contained_by')))
+        assert (all(x[0] in words and x[1] in words for x in read('word_precedes')))
+        assert (sorted(x[0] for x in read('speaker')) == ['Gary Salvi', 'Interviewer', 'Rose Pseudonym',
+                                                          'Speaker 1', 'Speaker 2'])
+
+
+def test_parse_files_parallel(fave_test_dir):
+    from polyglotdb.io.parsers.base import parse_files
+    parser = inspect_fave(fave_test_dir)
+    paths = sorted(os.path.join(fave_test_dir, x) for x in os.listdir(fave_test_dir) if parser.match_extension(x))
+    serial = list(parse_files(parser, paths, num_jobs=1))
+    parallel = list(parse_files(parser, paths, num_jobs=2))
+    assert [x[0] for x in serial] == [x[0] for x in parallel] == paths
+    for (_, s), (_, p) in zip(serial, parallel):
+        assert s.name == p.name
+        assert s.speakers == p.speakers
+        assert p.hierarchy is parser.hierarchy
+        for k in s.annotation_types:
+            assert [(x.label, x.begin, x.end) for x in s[k]] == [(x.label, x.begin, x.end) for x in p[k]]
+
+    serial = list(parse_files(parser, paths, corpus_name='test', types_only=True, num_jobs=1))
+    parallel = list(parse_files(parser, paths, corpus_name='test', types_only=True, num_jobs=2))
+    assert [x[1]['types'] for x in serial] == [x[1]['types'] for x in parallel]
+
+
+def test_add_discourses_fave(fave_test_dir, graph_db):
+    with CorpusContext('test_fave_add', **graph_db) as c:
+        c.reset()
+        parser = inspect_fave(fave_test_dir)
+        c.load(parser, os.path.join(fave_test_dir, 'fave_test.TextGrid'))
+        q = c.query_graph(c.word).filter(c.word.label == 'JURASSIC')
+        assert (len(q.all()) == 1)
+        word_types = c.execute_cypher('MATCH (n:word_type:test_fave_add) RETURN count(n) AS count').single()['count']
+
+        parser = inspect_fave(fave_test_dir)
+        could_not_parse = c.add_discourses(parser, [os.path.join(fave_test_dir, 'fave_test2.TextGrid')])
+        assert (could_not_parse == [])
+        assert (sorted(c.discourses) == ['fave_test', 'fave_test2'])
+        q = c.query_graph(c.word).filter(c.word.label == 'JURASSIC')
+        assert (len(q.all()) == 1)
+        assert (c.execute_cypher('MATCH (n:word_type:test_fave_add) RETURN count(n) AS count').single()['count']
+                >= word_types)
+        assert (c.hierarchy.has_type_property('word', 'transcription'))
+
+        with pytest.raises(ParseError):
+            c.add_discourses(inspect_fave(fave_test_dir), [os.path.join(fave_test_dir, 'fave_test2.TextGrid')])
+
+
+def test_add_discourses_enriched_fave(fave_test_dir, graph_db):
+    with CorpusContext('test_fave_add_enriched', **graph_db) as c:
+        c.reset()
+        c.load(inspect_fave(fave_test_dir), os.path.join(fave_test_dir, 'fave_test.TextGrid'))
+        c.encode_utterances(min_pause_length=0.15)
+        with pytest.raises(HierarchyError):
+            c.add_discourses(inspect_fave(fave_test_dir), [os.path.join(fave_test_dir, 'fave_test2.TextGrid')])
+        assert (c.discourses == ['fave_test'])
+
+
+def test_discourse_executor(fave_test_dir):
+    import pickle
+    from polyglotdb.io.parsers.base import DiscourseExecutor
+    parser = inspect_fave(fave_test_dir)
+    paths = sorted(os.path.join(fave_test_dir, x) for x in os.listdir(fave_test_dir) if parser.match_extension(x))
+    executor = pickle.loads(pickle.dumps(DiscourseExecutor(parser, num_jobs=2, max_pending=1)))
+    assert (executor.max_pending == 1)
+    results = list(parser.parse_discourses(paths, num_jobs=2, max_pending=1))
+    assert ([x[0] for x in results] == paths)
+    assert ([x[1].name for x in results] == [x.name for _, x in parser.parse_discourses(paths)])
@@ -1,6 +1,7 @@
 from polyglotdb.io.helper import (inspect_directory, find_wav_path,
                                   normalize_values_for_neo4j,
-                                  guess_type, text_to_lines)
+                                  guess_type, text_to_lines, make_type_id,
+                                  TypeIdCache, cached_type_ids)
 
 
 def test_inspect_directory(textgrid_test_dir, buckeye_test_dir, timit_test_dir):
@@ -28,3 +29,37 @@ def test_guess_type():
 
 def test_text_to_lines():
     pass
+
+
+def test_parse_schema_description():
+    from polyglotdb.io.importer.schema import parse_schema_description
+    assert (parse_schema_description('INDEX ON :phone(label)') == ('phone', 'label'))
+    assert (parse_schema_description('INDEX ON :`phone_type`(`label_insensitive`)') == ('phone_type',
+                                                                                      'label_insensitive'))
+    assert (parse_schema_description('CONSTRAINT ON ( node:word ) ASSERT node.id IS UNIQUE') == ('word', 'id'))
+    assert (parse_schema_description('CONSTRAINT ON ( corpus:Corpus ) ASSERT corpus.name IS UNIQUE') == ('Corpus',
+                                                                                                       'name'))
+    assert (parse_schema_description('something else') is None)
+
+
+def test_type_id_cache():
+    cache = TypeIdCache(max_size=2)
+    uncached = make_type_id(['a', 1], 'corpus')
+    assert (make_type_id(['a', 1], 'corpus', cache=cache) == uncached)
+    assert (make_type_id(('a', 1), 'corpus', cache=cache) == uncached)
+    assert (cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1)
+    make_type_id(['b'], 'corpus', cache=cache)
+    make_type_id(['c'], 'corpus', cache=cache)
+    assert (len(cache) == 2 and cache.evictions == 1)
+    assert (cache.hit_rate == 0.25)
+
+    cache = TypeIdCache()
+    for values in [['a', 1], ['a', 1.0], ['a', True], ['a', [1]]]:
+        assert (make_type_id(values, 'corpus', cache=cache) == make_type_id(values, 'corpus'))
+    assert (len(set(cache.get(v, 'corpus') for v in [['a', 1], ['a', 1.0], ['a', True]])) == 3)
+
+    with cached_type_ids() as active:
+        make_type_id(['a'], 'corpus')
+        make_type_id(['a'], 'corpus')
+    make_type_id(['a'], 'corpus')
+    assert ((active.hits, active.misses) == (1, 1))
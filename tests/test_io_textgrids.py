@@ -113,3 +113,48 @@ def test_word_transcription(graph_db, textgrid_test_dir):
         parser = inspect_textgrid(path)
         c.load(parser, path)
         assert (c.hierarchy.has_type_property('word', 'transcription'))
+
+
+def test_read_textgrid_short_format(tmpdir):
+    from polyglotdb.io.textgrid_reader import read_textgrid, textgrid_info, IntervalTier, PointTier
+
+    short = ['File type = "ooTextFile"', 'Object class = "TextGrid"', '', '0', '2', '<exists>', '2',
+             '"IntervalTier"', '"words"', '0', '2', '3',
+             '0', '0.5', '""', '0.5', '1.2', '"say ""hi"""', '1.2', '2', '"two', 'lines"',
+             '"TextTier"', '"tones"', '0', '2', '1',
+             '0.7', '"H*"']
+    for encoding in ['utf8', 'utf-16']:
+        path = os.path.join(str(tmpdir), 'short_{}.TextGrid'.format(encoding))
+        with open(path, 'w', encoding=encoding) as f:
+            f.write('\n'.join(short) + '\n')
+        tg = read_textgrid(path)
+        assert (tg.minTime == 0 and tg.maxTime == 2)
+        assert (isinstance(tg.tiers[0], IntervalTier) and isinstance(tg.tiers[1], PointTier))
+        assert ([tuple(x) for x in tg.tiers[0]] == [('', 0, 0.5), ('say "hi"', 0.5, 1.2), ('two\nlines', 1.2, 2)])
+        assert (tg.tiers[1][0].mark == 'H*' and tg.tiers[1][0].time == 0.7)
+        assert ([(x.name, x.size) for x in textgrid_info(path)] == [('words', 3), ('tones', 1)])
+
+
+def test_read_textgrid_uncached(tmpdir, monkeypatch):
+    from polyglotdb.io import textgrid_reader
+
+    path = os.path.join(str(tmpdir), 'uncached.TextGrid')
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('\n'.join(['File type = "ooTextFile"', 'Object class = "TextGrid"', '', '0', '3', '<exists>', '1',
+                           '"IntervalTier"', '"words"', '0', '3', '1', '0', '3', '"hi"']) + '\n')
+    # Times of the TextGrid don't depend on its information staying in the cache
+    monkeypatch.setattr(textgrid_reader, 'TEXTGRID_INFO_CACHE_SIZE', 0)
+    textgrid_reader.clear_textgrid_cache()
+    for _ in range(2):
+        tg = textgrid_reader.read_textgrid(path)
+        assert (tg.minTime == 0 and tg.maxTime == 3)
+        assert ([tuple(x) for x in tg.tiers[0]] == [('hi', 0, 3)])
+
+
+def test_read_textgrid_bad_header(tmpdir):
+    from polyglotdb.io.textgrid_reader import read_textgrid
+    path = os.path.join(str(tmpdir), 'bad.TextGrid')
+    with open(path, 'w') as f:
+        f.write('not a textgrid\n')
+    with pytest.raises(TextGridError):
+        read_textgrid(path)
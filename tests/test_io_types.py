@@ -52,3 +52,70 @@ def test_compile_digraphs():
 
     digraph_at.digraphs = set(['aa', 'aab'])
     assert (digraph_at.digraph_pattern == re.compile('aab|aa|\d+|\S'))
+
+
+def test_annotation_type_lookups():
+    from polyglotdb.io.types.standardized import PGAnnotation, PGAnnotationType
+    at = PGAnnotationType('phone')
+    for speaker, offset in [('a', 0), ('b', 0.05)]:
+        for i in range(2000):
+            a = PGAnnotation(str(i), i * 0.1 + offset, (i + 1) * 0.1 + offset)
+            a.speaker = speaker
+            at.add(a)
+    at.optimize_lookups()
+    assert (at.lookup(10.02, speaker='a').label == '100')
+    assert (at.lookup(10.02, speaker='b').label == '99')
+    assert (at.lookup(10.02).label == '99')
+    assert (at.lookup(500, speaker='a') is None)
+    assert (at.lookup(1, speaker='c') is None)
+    assert ([x.label for x in at.lookup_range(10, 10.3, speaker='a')] == ['100', '101', '102'])
+    assert ([x.begin for x in at.lookup_range(10, 10.3)] == sorted(x.begin for x in at.lookup_range(10, 10.3)))
+    assert (at.lookup_range(10, 10.3, speaker='c') == [])
+
+    # Adding annotations after lookups updates the index
+    a = PGAnnotation('new', 500, 501)
+    a.speaker = 'a'
+    at.add(a)
+    assert (at.lookup(500.5, speaker='a').label == 'new')
+
+    # Annotations missing an end time never contain a time point
+    at = PGAnnotationType('phone')
+    for label, begin, end in [('a', 0, None), ('b', 1, 2), ('c', 2, 3)]:
+        at.add_row(label, begin, end)
+    assert (at.lookup(2.5).label == 'c')
+    assert (at.lookup(1.5).label == 'b')
+    assert (at.lookup(0.5) is None)
+
+
+def test_annotation_type_columns():
+    from polyglotdb.io.types.standardized import PGAnnotation, PGAnnotationType, PGSubAnnotation
+    at = PGAnnotationType('word')
+    first = at.add_row('cat', 0.5, 0.2, speaker='a', type_properties={'freq': 2})
+    at.add_row('dog', 0.6, 0.9, speaker='a', previous_id=at.row_id_bytes(first),
+               token_properties={'pos': 'N'})
+    at.add_row(None, 0.0, 0.2, speaker='b')
+    at.add_subannotation(first, PGSubAnnotation(None, 'burst', 0.2, 0.25))
+    assert (len(at) == 3)
+    assert ((at[0].begin, at[0].end, at[0].midpoint) == (0.2, 0.5, 0.35))
+    assert (at[1].previous_id == at[0].id)
+    assert (at[-1].speaker == 'b')
+    assert (at.speakers == {'a', 'b'})
+    assert (at.type_property_keys == {'freq', 'label'})
+    assert (at[1].token_properties == {'pos': 'N'})
+
+    a = PGAnnotation('cat', 0.2, 0.5)
+    a.type_properties['freq'] = 2
+    assert (at[0].type_keys() == a.type_keys())
+    assert (at[0].sha('corpus') == a.sha('corpus'))
+    assert (at[1].sha('corpus') != at[0].sha('corpus'))
+
+    at[2].type_properties['transcription'] = ['k', 'a']
+    assert (at[2].type_keys() == ['transcription'])
+    assert ('transcription' not in at[0].type_properties)
+
+    # Sorting for lookups keeps the columns and subannotations of each annotation together
+    at.optimize_lookups()
+    assert ([x.label for x in at] == [None, 'cat', 'dog'])
+    assert ([x.type for x in at[1].subannotations] == ['burst'])
+    assert (at[2].previous_id == at[1].id)
+    assert (at.lookup(0.3, speaker='a').label == 'cat')
@@ -14,3 +14,23 @@ def test_generate_hierarchy_subannotations(subannotation_config):
         h = c.generate_hierarchy()
         assert (h._data == c.hierarchy._data)
         assert (h.subannotations['phone'] == c.hierarchy.subannotations['phone'])
+
+
+def test_hierarchy_merge():
+    from polyglotdb.structure import Hierarchy
+    h = Hierarchy({'word': None, 'syllable': 'word', 'phone': 'syllable'})
+    h.type_properties['word'] = {('transcription', str)}
+    other = Hierarchy({'word': None, 'phone': 'word'})
+    other.type_properties['word'] = {('transcription', str)}
+    assert not h.merge(other)
+    assert h['phone'] == 'syllable'
+
+    other.token_properties['word'] = {('frequency', float)}
+    other.subannotations['phone'] = {'burst'}
+    assert h.merge(other)
+    assert h['phone'] == 'syllable'
+    assert h.token_properties['word'] == {('frequency', float)}
+    assert h.subannotations['phone'] == {'burst'}
+    assert h.type_properties['word'] == {('transcription', str)}
+    assert h.conflicts(other) == ['phone']
+    assert Hierarchy({'word': None, 'phone': 'word'}).conflicts(other) == []